@@ -0,0 +1 @@
+# Parser micro-benchmarks over a saved page corpus, checked against golden rows
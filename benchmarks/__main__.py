@@ -0,0 +1,3 @@
+from benchmarks.parsers import main
+
+main()
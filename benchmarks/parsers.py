@@ -0,0 +1,295 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from html.parser import HTMLParser
+
+from config.sites import SUPPORTED_SITES
+from scrapers.common.crawl import site_module
+from scrapers.common.engine import PARSER
+from scrapers.common.stream import STREAMING_AVAILABLE
+
+# --- Parser Benchmarks ---
+#
+# Times each scraper's parse_task (the extraction step only: no network, no
+# crawl loop) over a corpus of saved pages in fixtures/, and checks its rows
+# and follow-up pages against the golden output in golden/. Sites that
+# parse while downloading ("streaming": true, with lxml) are also run
+# through stream_task, fed the same page in chunks, as a "[streamed]"
+# variant checked against the same golden file. Timings are compared with
+# baseline.json, which keeps one baseline per HTML parser (lxml and
+# html.parser differ a lot); a fixture that parses more than `threshold`
+# slower than its baseline, or whose output differs from its golden file,
+# fails the run.
+#
+# Baselines are recorded on one machine and checked on others, so each
+# fixture's time is stored relative to a fixed pure-Python calibration
+# workload timed right next to it (a busy or slower machine slows both).
+# Noise only ever adds time, so every timing is the best of many runs, and
+# a fixture over the limit is measured once more before it fails.
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCHMARK_DIR, 'fixtures')
+GOLDEN_DIR = os.path.join(BENCHMARK_DIR, 'golden')
+MANIFEST_FILE = os.path.join(FIXTURE_DIR, 'manifest.json')
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+DEFAULT_BENCHMARK = {
+    'threshold': 0.25,    # Fail when a page parses this much slower than its baseline
+    'min_time': 0.5,      # Seconds spent timing each fixture ...
+    'min_runs': 15        # ... and at least this many parses, whichever takes longer
+}
+
+# --- Corpus ---
+
+def load_manifest(path=MANIFEST_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def find_site(name):
+    """Returns (module, config) for a SUPPORTED_SITES entry name."""
+    for sites in SUPPORTED_SITES.values():
+        if name in sites:
+            return site_module(sites[name]['scraper']), sites[name]['config']
+    raise KeyError(f"Unknown site '{name}' in the benchmark manifest")
+
+def golden_path(fixture):
+    return os.path.join(GOLDEN_DIR, os.path.splitext(fixture)[0] + '.json')
+
+def parse_output(rows, follow_ups):
+    """parse_task output in its JSON form, as stored in the golden files."""
+    return json.loads(json.dumps({'rows': [row.to_tuple() for row in rows], 'follow_ups': list(follow_ups)}))
+
+def write_golden(path, output):
+    """One row per line, so a parser change shows up as a readable diff."""
+    rows = ',\n'.join('    ' + json.dumps(row, ensure_ascii=False) for row in output['rows'])
+    rows = f"[\n{rows}\n  ]" if rows else "[]"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{{\n  "follow_ups": {json.dumps(output["follow_ups"])},\n  "rows": {rows}\n}}\n')
+
+def first_difference(expected, actual):
+    """Short description of where two parse outputs first differ."""
+    if expected['follow_ups'] != actual['follow_ups']:
+        return f"follow-ups {expected['follow_ups']} != {actual['follow_ups']}"
+    for i, (want, got) in enumerate(zip(expected['rows'], actual['rows'])):
+        if want != got:
+            return f"row {i}: expected {want}, got {got}"
+    return f"expected {len(expected['rows'])} rows, got {len(actual['rows'])}"
+
+class FixtureResponse:
+    """A saved page served the way stream_task reads a streamed response."""
+
+    status_code = 200
+
+    def __init__(self, url, content):
+        self.url = url
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+class FixtureFetcher:
+    """Answers every request with the fixture, so stream_task runs without a network."""
+
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, **kwargs):
+        return FixtureResponse(url, self.content)
+
+def streamed_variant(module, config):
+    """Whether the crawl streams this site's pages (see crawl.streams)."""
+    return config.get('streaming', False) and STREAMING_AVAILABLE and hasattr(module, 'stream_task')
+
+def benchmark_cases(only=None):
+    """(name, fixture, parse) for every fixture, plus a streamed variant where the site streams."""
+    cases = []
+    for entry in load_manifest():
+        fixture = entry['fixture']
+        if only and only.lower() not in fixture.lower() and only.lower() not in entry['site'].lower():
+            continue
+        module, config = find_site(entry['site'])
+        with open(os.path.join(FIXTURE_DIR, fixture), 'rb') as f:
+            content = f.read()
+        category, page = entry['category'], entry['page']
+
+        def parse(module=module, config=config, content=content, category=category, page=page):
+            return module.parse_task(config, content, category, page)
+
+        cases.append((fixture, fixture, parse))
+        if streamed_variant(module, config):
+            def stream(module=module, config=config, fetcher=FixtureFetcher(content), category=category, page=page):
+                return module.stream_task(config, fetcher, category, page)
+
+            cases.append((f"{fixture} [streamed]", fixture, stream))
+    return cases
+
+# --- Measurement ---
+
+class Calibration(HTMLParser):
+    def handle_starttag(self, tag, attrs):
+        self.count += len(attrs)
+
+def calibration_time(rounds=10):
+    """Best-of-`rounds` seconds for a fixed tokenize-and-scan workload, as a machine speed reference."""
+    cards = ''.join(f'<div class="card c{i}"><a href="/p/{i}" title="Item {i}">Item {i}</a>'
+                    f'<span class="price">Rs. {i * 37:,}.00</span></div>' for i in range(600))
+    document = f'<html><body>{cards}</body></html>'
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        parser = Calibration()
+        parser.count = 0
+        parser.feed(document)
+        parser.close()
+        sorted(document.split('"'))
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+def relative_speed(parse, settings):
+    """(best seconds per parse, the same relative to the calibration workload timed around it)."""
+    before = calibration_time()
+    seconds = time_parse(parse, settings)
+    calibration = min(before, calibration_time())
+    return seconds, seconds / calibration
+
+def time_parse(parse, settings):
+    """Best seconds per call, repeating until both min_time and min_runs are reached."""
+    parse()  # Warm up: compiles selectors and fills per-process caches
+    gc.collect()
+    samples = []
+    deadline = time.perf_counter() + settings['min_time']
+    while len(samples) < settings['min_runs'] or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        parse()
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+def measure_memory(parse):
+    """(peak KiB, allocated blocks still held by the result) for one call."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = parse()
+        _, peak = tracemalloc.get_traced_memory()
+        # Parse trees are reference cycles: collect them so only the output is counted
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    return peak / 1024, blocks
+
+# --- Runner ---
+
+def run_benchmarks(settings, only=None, update_golden=False, update_baseline=False):
+    """Benchmarks every fixture (or those whose path or site contains `only`). Returns True if all passed."""
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            baselines = json.load(f).get('parsers', {})
+    baseline = baselines.get(PARSER, {})
+
+    print(f"Parser benchmarks ({PARSER}, Python {platform.python_version()})")
+    if not baseline and not update_baseline:
+        print(f"  ℹ️ No baseline recorded with {PARSER} yet; timings are shown but not checked "
+              "(run with --update-baseline).")
+
+    print(f"  {'Fixture':<47} {'ms/page':>8} {'vs base':>8} {'peak KiB':>9} {'blocks':>7} {'rows':>5}")
+    results, failures = {}, []
+    for name, fixture, parse in benchmark_cases(only):
+        output = parse_output(*parse())
+        path = golden_path(fixture)
+        if name == fixture and (update_golden or not os.path.exists(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_golden(path, output)
+            status = 'golden written'
+        else:
+            # A streamed variant must match what the buffered parser wrote
+            with open(path, 'r', encoding='utf-8') as f:
+                expected = json.load(f)
+            status = None if expected == output else f"output changed: {first_difference(expected, output)}"
+
+        if update_baseline:
+            # One lucky run would set the bar too low for every later check: record a typical one
+            seconds, relative = sorted((relative_speed(parse, settings) for _ in range(3)), key=lambda m: m[1])[1]
+        else:
+            seconds, relative = relative_speed(parse, settings)
+        change = ''
+        base = baseline.get('fixtures', {}).get(name)
+        if base:
+            ratio = relative / base['relative']
+            if ratio > 1 + settings['threshold'] and not update_baseline:
+                # Confirm before failing: load spikes slow some runs, a regression slows all of them
+                seconds, relative = min((seconds, relative), relative_speed(parse, settings), key=lambda m: m[1])
+                ratio = relative / base['relative']
+            change = f"{(ratio - 1) * 100:+.1f}%"
+            if ratio > 1 + settings['threshold'] and not update_baseline:
+                status = status or f"{change} slower than baseline (limit +{settings['threshold']:.0%})"
+
+        peak_kib, blocks = measure_memory(parse)
+        results[name] = {'ms': round(seconds * 1000, 4), 'relative': round(relative, 4),
+                         'peak_kib': round(peak_kib, 1), 'blocks': blocks}
+
+        failed = status is not None and status != 'golden written'
+        if failed:
+            failures.append((name, status))
+        mark = '❌' if failed else '✅'
+        print(f"  {name:<47} {seconds * 1000:>8.3f} {change:>8} {peak_kib:>9.1f} {blocks:>7} "
+              f"{len(output['rows']):>5} {mark}{' ' + status if status else ''}")
+
+    if update_baseline:
+        recorded = baseline.get('fixtures', {})
+        recorded.update(results)
+        baselines[PARSER] = {
+            'python': platform.python_version(),
+            'recorded_at': time.strftime('%Y-%m-%d'),
+            'fixtures': recorded
+        }
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'parsers': baselines}, f, indent=1)
+            f.write('\n')
+        print(f"✅ {PARSER} baseline saved to {os.path.relpath(BASELINE_FILE)}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} of {len(results)} fixture(s) failed:")
+        for name, status in failures:
+            print(f"  {name}: {status}")
+        return False
+    print(f"\n✅ {len(results)} fixture(s) passed.")
+    return True
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Times and checks every scraper\'s page parser against the saved fixture corpus.'
+    )
+    parser.add_argument('--site', help="Only fixtures whose path or site name contains this (e.g. 'tokyopc')")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_BENCHMARK['threshold'],
+                        help='Allowed slowdown before a fixture fails, as a fraction (default: %(default)s)')
+    parser.add_argument('--min-time', type=float, default=DEFAULT_BENCHMARK['min_time'],
+                        help='Seconds to spend timing each fixture (default: %(default)s)')
+    parser.add_argument('--update-golden', action='store_true',
+                        help='Rewrite the golden rows from the current parsers (after an intended change)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Record the current timings as the new baseline')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    settings = dict(DEFAULT_BENCHMARK, threshold=args.threshold, min_time=args.min_time)
+    passed = run_benchmarks(settings, args.site, args.update_golden, args.update_baseline)
+    sys.exit(0 if passed else 1)
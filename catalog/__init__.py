@@ -0,0 +1,3 @@
+# Full-text search index over the latest products of every site
+
+from .index import DEFAULT_CATALOG_FILE, CatalogIndex
@@ -0,0 +1,149 @@
+import re
+import sqlite3
+import time
+
+from history.store import product_key
+
+# --- Catalog Search Index ---
+#
+# A SQLite file holding the latest listing of every product from every
+# site, with an FTS5 full-text index over model, brand and category. Each
+# saved run upserts its site's products and deletes the ones that have
+# disappeared; triggers keep the FTS index in step, and only fire when a
+# searchable column actually changes, so a typical re-run (mostly price
+# changes) rewrites very little of the index.
+
+DEFAULT_CATALOG_FILE = 'catalog_index.db'
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY,
+        product_key INTEGER NOT NULL,
+        store TEXT NOT NULL,
+        brand TEXT,
+        model TEXT,
+        category TEXT,
+        price REAL,
+        currency TEXT,
+        product_url TEXT,
+        seen_run INTEGER,
+        updated_at REAL,
+        UNIQUE (store, product_key)
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        model, brand, category,
+        content='products', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3 4'
+    );
+    CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, model, brand, category) VALUES (new.id, new.model, new.brand, new.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, model, brand, category)
+        VALUES ('delete', old.id, old.model, old.brand, old.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE OF model, brand, category ON products
+    WHEN old.model IS NOT new.model OR old.brand IS NOT new.brand OR old.category IS NOT new.category BEGIN
+        INSERT INTO products_fts (products_fts, rowid, model, brand, category)
+        VALUES ('delete', old.id, old.model, old.brand, old.category);
+        INSERT INTO products_fts (rowid, model, brand, category) VALUES (new.id, new.model, new.brand, new.category);
+    END;
+"""
+
+RESULT_COLUMNS = ('store', 'brand', 'model', 'category', 'price', 'currency', 'product_url')
+
+def fts_query(text):
+    """
+    Turns free text into a safe FTS5 query: every word must match, and the
+    last one may be a prefix ('vivo' finds 'Vivobook'). Quoting each word
+    keeps FTS syntax characters in user input from being interpreted.
+    """
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class CatalogIndex:
+    """Latest products of every site, searchable by model/brand/category."""
+
+    def __init__(self, path=DEFAULT_CATALOG_FILE):
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self._db.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            self._db.close()
+            raise RuntimeError(f"This Python's SQLite has no FTS5 support ({e}).")
+
+    def update(self, batch):
+        """
+        Upserts a site's ProductBatch and drops its products missing from this
+        run (unless the run was cut short). Returns counts.
+        """
+        store = batch.constants['store']
+        currency = batch.constants.get('currency')
+        run = time.time_ns()
+        now = time.time()
+
+        rows = []
+        for product in batch:
+            if product.price is None:
+                continue
+            rows.append((
+                product_key(store, product.model), store, product.brand, product.model,
+                str(product.category), product.price, currency, product.product_url, run, now
+            ))
+
+        with self._db:
+            self._db.executemany("""
+                INSERT INTO products (product_key, store, brand, model, category, price, currency,
+                                      product_url, seen_run, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (store, product_key) DO UPDATE SET
+                    brand = excluded.brand, model = excluded.model, category = excluded.category,
+                    price = excluded.price, currency = excluded.currency,
+                    product_url = excluded.product_url, seen_run = excluded.seen_run,
+                    updated_at = excluded.updated_at
+            """, rows)
+            removed = 0 if batch.partial else self._db.execute(
+                "DELETE FROM products WHERE store = ? AND seen_run != ?", (store, run)
+            ).rowcount
+        return {'upserted': len(rows), 'removed': removed}
+
+    def search(self, text, store=None, max_price=None, limit=20):
+        """Best matches for `text` (BM25 rank, then price) as a list of dicts."""
+        query = fts_query(text)
+        if query is None:
+            return []
+        sql = f"""
+            SELECT {', '.join('p.' + column for column in RESULT_COLUMNS)}
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+        """
+        params = [query]
+        if store:
+            sql += " AND lower(p.store) = lower(?)"
+            params.append(store)
+        if max_price is not None:
+            sql += " AND p.price <= ?"
+            params.append(max_price)
+        sql += " ORDER BY bm25(products_fts, 10.0, 3.0, 1.0), p.price LIMIT ?"
+        params.append(limit)
+        return [dict(zip(RESULT_COLUMNS, row)) for row in self._db.execute(sql, params)]
+
+    def stats(self):
+        return dict(self._db.execute("SELECT store, COUNT(*) FROM products GROUP BY store ORDER BY store"))
+
+    def optimize(self):
+        """Merges the FTS index segments; worth running after many incremental updates."""
+        with self._db:
+            self._db.execute("INSERT INTO products_fts (products_fts) VALUES ('optimize')")
+
+    def close(self):
+        self._db.close()
@@ -1,5 +1,5 @@
-from scrapers.srilanka import buyabans, laptoplk, singersl, unitysystems, abansit, nanotek
-from scrapers.japan import tokyopc
+from scrapers.common.engine import scrape_platform
+from scrapers.srilanka import buyabans, singersl, abansit
 
 SUPPORTED_SITES = {
     "Sri Lanka": {
@@ -13,20 +13,34 @@ SUPPORTED_SITES = {
                 ],
                 "output_filename": "BuyAbans_All_Products.xlsx",
                 "country": "Sri Lanka",
+                "currency": "LKR",
                 "year": 2025,
                 "min_price": 1000,
                 "max_price": 99999999
             }
         },
         "Laptop.lk (All Products)": {
-            "scraper": laptoplk.scrape_laptop_lk,
+            "scraper": scrape_platform,
             "config": {
                 "base_url": "https://www.laptop.lk/index.php/shop/",
                 "output_filename": "Laptop_lk_All_Products.xlsx",
                 "country": "Sri Lanka",
+                "currency": "LKR",
                 "year": 2025,
                 "min_price": 1000,
-                "max_price": 99999999
+                "max_price": 99999999,
+                "discovery": "sitemap",
+                "streaming": True,
+                "source": "api",
+                "platform": "woocommerce",
+                "brands": [
+                    'HP', 'Lenovo', 'Asus', 'Acer', 'Dell', 'MSI', 'Apple',
+                    'Samsung', 'LG', 'JVC', 'Haier', 'Toshiba', 'Electrolux',
+                    'Whirlpool', 'Oppo', 'Xiaomi', 'JBL', 'Titan', 'Miniso'
+                ],
+                "extraction": {
+                    "price": "whole"
+                }
             }
         },
         "Singer.lk (All Products)": {
@@ -35,20 +49,59 @@ SUPPORTED_SITES = {
                 "base_url": "https://www.singersl.com/filter",
                 "output_filename": "SingerSL_All_Products.xlsx",
                 "country": "Sri Lanka",
+                "currency": "LKR",
                 "year": 2025,
                 "min_price": 1000,
-                "max_price": 99999999
+                "max_price": 99999999,
+                "plan_cache": {},
+                "hedging": {}
             }
         },
         "UnitySystems.lk (All Products)": {
-            "scraper": unitysystems.scrape_unitysystems,
+            "scraper": scrape_platform,
             "config": {
                 "base_url": "https://www.unitysystems.lk/shop/",
                 "output_filename": "UnitySystems_All_Products.xlsx",
                 "country": "Sri Lanka",
+                "currency": "LKR",
                 "year": 2025,
                 "min_price": 1000,
-                "max_price": 99999999
+                "max_price": 99999999,
+                "discovery": "sitemap",
+                "streaming": True,
+                "source": "api",
+                "platform": "woocommerce",
+                "headers": {
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                    'Accept-Language': 'en-US,en;q=0.5',
+                    'Connection': 'keep-alive',
+                    'Upgrade-Insecure-Requests': '1'
+                },
+                "brands": [
+                    'HP', 'Lenovo', 'Asus', 'Acer', 'Dell', 'MSI', 'Apple',
+                    'Samsung', 'LG', 'JVC', 'Haier', 'Toshiba', 'Electrolux',
+                    'Whirlpool', 'Oppo', 'Xiaomi', 'JBL', 'Titan', 'Miniso',
+                    'Logitech', 'Fantech', 'Razer', 'Corsair', 'HyperX', 'SteelSeries',
+                    'Gigabyte', 'Zotac', 'Palit', 'Galax', 'PNY', 'Intel', 'AMD',
+                    'Kingston', 'Transcend', 'Adata', 'Western Digital', 'Seagate',
+                    'Hikvision', 'Dahua', 'Ezviz', 'Imou', 'Tp-Link', 'D-Link',
+                    'Ubiquiti', 'Mikrotik', 'Cisco', 'Epson', 'Canon', 'Brother',
+                    'Pantum', 'Ricoh', 'Kyocera', 'Konica Minolta', 'Sharp'
+                ],
+                "extraction": {
+                    "product": "div.product-grid-item",
+                    "fields": {
+                        "name": "h3.wd-entities-title a",
+                        "url": ("h3.wd-entities-title a", "href"),
+                        "price": [
+                            "span.price span.woocommerce-Price-amount bdi",
+                            "span.price ins span.woocommerce-Price-amount bdi"
+                        ],
+                        "image": ("div.product-element-top a.product-image-link img", ("data-src", "src"))
+                    }
+                },
+                "enrichment": {},
+                "images": {}
             }
         },
         "AbansIT.lk (All Products)": {
@@ -57,6 +110,7 @@ SUPPORTED_SITES = {
                 "base_url": "https://abansit.lk/welcome/productsPagination/",
                 "output_filename": "AbansIT_All_Products.xlsx",
                 "country": "Sri Lanka",
+                "currency": "LKR",
                 "year": 2025,
                 "min_price": 1000,
                 "max_price": 99999999,
@@ -64,31 +118,104 @@ SUPPORTED_SITES = {
                     "laptops", "desktops", "monitors", "accessories", 
                     "gaming", "tablets", "printers", "all-in-one",
                     "education", "professional", "smartboards", "signages"
-                ]
+                ],
+                "plan_cache": {},
+                "proxies": {"sticky": True},
+                "enrichment": {
+                    "fields": {
+                        "sku": [".product-code", ".sku"],
+                        "stock": [".stock-status", ".availability"]
+                    },
+                    "specs": {
+                        "row": ".specifications tr",
+                        "label": ["th", "td:first-child"],
+                        "value": "td:last-child"
+                    }
+                },
+                "images": {}
             }
         },
         "Nanotek.lk (All Products)": {
-            "scraper": nanotek.scrape_nanotek,
+            "scraper": scrape_platform,
             "config": {
                 "base_url": "https://www.nanotek.lk",
                 "output_filename": "Nanotek_All_Products.xlsx",
                 "country": "Sri Lanka",
+                "currency": "LKR",
                 "year": 2025,
                 "min_price": 1000,
-                "max_price": 99999999
+                "max_price": 99999999,
+                "discovery": "sitemap",
+                "streaming": True,
+                "source": "ajax",
+                "budget": {
+                    "priority": ["laptop", "graphic", "processor"]
+                },
+                "plan_cache": {},
+                "hedging": {},
+                "platform": "cscart",
+                "extraction": {
+                    "categories": {
+                        "link": "ul.ty-cat-list li.ty-catListItem a",
+                        "name": ".ty-catTitle span"
+                    },
+                    "product": "li.ty-catPage-productListItem",
+                    "fields": {
+                        "name": ".ty-productBlock-title",
+                        "url": ("a[href]", "href"),
+                        "price": ".ty-productBlock-price-retail",
+                        "image": (".ty-productBlock-imgHolder img", "src")
+                    },
+                    "pagination": {
+                        "next": ".js-more-results"
+                    }
+                },
+                "enrichment": {},
+                "images": {}
             }
         }
     },
     "Japan": {
         "TokyoPC.jp (All Products)": {
-            "scraper": tokyopc.scrape_tokyopc,
+            "scraper": scrape_platform,
             "config": {
                 "base_url": "https://www.tokyopc.jp/",
                 "output_filename": "TokyoPC_All_Products.xlsx",
                 "country": "Japan",
+                "currency": "JPY",
                 "year": 2025,
                 "min_price": 1000,
-                "max_price": 99999999
+                "max_price": 99999999,
+                "discovery": "sitemap",
+                "streaming": True,
+                "source": "ajax",
+                "plan_cache": {},
+                "hedging": {},
+                "platform": "cscart",
+                "store": "TokyoPC",
+                "brands": [
+                    'Apple', 'Samsung', 'Sony', 'Microsoft', 'Dell', 'HP', 'Lenovo', 'Asus', 'Acer', 'MSI',
+                    'Huawei', 'Oppo', 'Xiaomi', 'Google', 'Motorola', 'Sharp', 'Toshiba', 'Fujitsu', 'Panasonic'
+                ],
+                "extraction": {
+                    "categories": {
+                        "name": "span.v-center",
+                        "name_own_text": True
+                    },
+                    "price": "whole",
+                    "pagination": {
+                        "bare_first_page": False,
+                        "widget": "div.ty-pagination"
+                    },
+                    "columns": [
+                        ("Brand", "brand"),
+                        ("Model", "model"),
+                        ("Price (JPY)", "price"),
+                        ("Category", "category"),
+                        ("Store", "store"),
+                        ("URL", "product_url")
+                    ]
+                }
             }
         }
     }
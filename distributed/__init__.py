@@ -0,0 +1,5 @@
+# Coordinator/worker mode: page tasks shared through a SQLite or Redis queue
+
+from .queues import open_queue, SQLiteQueue, RedisQueue
+from .coordinator import run_coordinator
+from .worker import run_worker
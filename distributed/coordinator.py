@@ -0,0 +1,117 @@
+import multiprocessing
+import time
+
+from scrapers.common import Fetcher
+from scrapers.common.budget import run_deadline
+from scrapers.common.crawl import category_name, output_columns, site_module, unique_rows
+from scrapers.common.events import worker_queue
+from scrapers.common.records import ProductBatch
+from .queues import DEFAULT_MAX_ATTEMPTS, open_queue
+from .worker import DEFAULT_LEASE_SECONDS, find_site, run_worker
+
+# --- Coordinator ---
+
+PROGRESS_INTERVAL = 5.0
+
+def enqueue_sites(queue, site_names):
+    """Runs each site's discovery step and enqueues its initial page tasks."""
+    selected = []
+    for name in site_names:
+        site_name, entry = find_site(name)
+        module = site_module(entry['scraper'])
+        fetcher = Fetcher(module.setup_session(), entry['config'])
+        try:
+            tasks = module.discover_tasks(entry['config'], fetcher)
+        finally:
+            fetcher.close()
+        queue.put_tasks(site_name, tasks)
+        print(f"  Enqueued {len(tasks)} initial tasks for {site_name}.")
+        selected.append((site_name, entry, module, tasks))
+    return selected
+
+def run_coordinator(queue_url, site_names, local_workers=0, lease_seconds=DEFAULT_LEASE_SECONDS,
+                    max_attempts=DEFAULT_MAX_ATTEMPTS, resume=False):
+    """
+    Seeds the queue with (site, category, page) tasks, optionally starts local
+    worker processes, waits until every task is done or failed, then merges
+    the uploaded batches. Returns {site_name: (config, ProductBatch)}.
+    When the run budget (--budget) runs out first, local workers are
+    stopped and the batches uploaded so far are merged.
+    """
+    queue = open_queue(queue_url, max_attempts)
+    if not resume:
+        queue.reset()
+
+    print(f"\n--- Coordinator: seeding {queue_url} ---")
+    selected = enqueue_sites(queue, site_names)
+
+    workers = []
+    for i in range(local_workers):
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(queue_url, f"local-{i + 1}", lease_seconds, True, worker_queue(), max_attempts),
+            daemon=True
+        )
+        process.start()
+        workers.append(process)
+    if local_workers:
+        print(f"  Started {local_workers} local worker processes.")
+
+    # Expired leases are only reclaimed inside lease(), so keep an eye on
+    # progress and let the workers do the reclaiming.
+    deadline = run_deadline()
+    partial = False
+    workers_lost = False
+    last_finished, last_progress = None, time.monotonic()
+    while not queue.finished():
+        counts = queue.counts()
+        print(
+            f"  [progress] pending={counts['pending']} leased={counts['leased']} "
+            f"done={counts['done']} failed={counts['failed']}"
+        )
+        if deadline.expired:
+            print(f"  ⚠️ Time budget reached with {counts['pending'] + counts['leased']} tasks left. "
+                  "Merging what has been collected.")
+            for process in workers:
+                process.terminate()
+            partial = True
+            break
+        finished_tasks = counts['done'] + counts['failed']
+        if finished_tasks != last_finished:
+            last_finished, last_progress = finished_tasks, time.monotonic()
+        # Local workers only exit on their own once the queue is finished, so this means they crashed.
+        # Workers on other machines may still be busy: give up only when nothing finishes for a lease.
+        if workers and not any(process.is_alive() for process in workers) and not queue.finished():
+            if not workers_lost:
+                print("  ⚠️ Every local worker has exited. Waiting for other workers...")
+                workers_lost = True
+            if time.monotonic() - last_progress > lease_seconds:
+                print(f"  ⚠️ No task finished for {lease_seconds}s with {counts['pending'] + counts['leased']} "
+                      "left. Merging what has been collected.")
+                partial = True
+                break
+        remaining = deadline.remaining()
+        time.sleep(PROGRESS_INTERVAL if remaining is None else min(PROGRESS_INTERVAL, remaining))
+
+    for process in workers:
+        process.join()
+
+    print("\n--- Coordinator: merging results ---")
+    merged = {}
+    for site_name, entry, module, tasks in selected:
+        config = entry['config']
+        # Which categories the workers finished isn't known here, so a cut-short run treats none as finished
+        unfinished = [category for category, _ in tasks] if partial else ()
+        rows = unique_rows(config, module, list(queue.iter_results(site_name)), unfinished)
+        batch = ProductBatch(config, rows, output_columns(config, module), partial=partial)
+        print(f"  {site_name}: {len(batch)} products.")
+        merged[site_name] = (config, batch)
+
+    failed = queue.failed_tasks()
+    if failed:
+        print(f"\n  ⚠️ {len(failed)} page tasks failed permanently:")
+        for task in failed:
+            print(f"    - {task['site']} / {category_name(task['category'])} page {task['page']}: {task['error']}")
+
+    queue.close()
+    return merged
@@ -0,0 +1,370 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from scrapers.common.records import Product
+
+# --- Shared Task Queues ---
+#
+# A task is one listing page: (site, category, page). Workers lease a task
+# for a fixed time; a lease that isn't completed or failed before it expires
+# goes back to the queue, so a crashed worker only delays its pages. Every
+# failure (including an expired lease) counts as an attempt, and a task that
+# runs out of attempts is parked as 'failed' for the run report.
+#
+# Both backends expose the same methods:
+#   reset(), put_tasks(site, tasks), lease(worker_id, lease_seconds),
+#   complete(task, worker_id, rows, follow_up_pages), fail(task, worker_id, error),
+#   counts(), finished(), failed_tasks(), iter_results(site) -> Products, close()
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+def task_key(site, category, page):
+    """Stable identity of a page task, used to avoid enqueuing the same page twice."""
+    return f"{site}|{json.dumps(category, sort_keys=True)}|{page}"
+
+def open_queue(url, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Opens a queue from a URL:
+      sqlite:///path/to/crawl.db   (local or shared filesystem)
+      redis://host:6379/0          (requires the 'redis' package)
+    """
+    if url.startswith('sqlite:///'):
+        return SQLiteQueue(url[len('sqlite:///'):], max_attempts)
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisQueue(url, max_attempts)
+    raise ValueError(f"Unsupported queue URL '{url}'. Use sqlite:///<path> or redis://<host>.")
+
+# --- SQLite Backend ---
+
+class SQLiteQueue:
+    """Task queue in a single SQLite file; safe for several worker processes on one host."""
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE,
+                site TEXT,
+                category TEXT,
+                page INTEGER,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                owner TEXT,
+                lease_expires REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY,
+                site TEXT,
+                task_id INTEGER,
+                rows TEXT
+            );
+            CREATE INDEX IF NOT EXISTS results_site ON results (site);
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front so two workers can't lease the same row
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def reset(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM tasks")
+            db.execute("DELETE FROM results")
+
+    def _insert_tasks(self, db, site, category, pages):
+        db.executemany(
+            "INSERT OR IGNORE INTO tasks (key, site, category, page) VALUES (?, ?, ?, ?)",
+            [(task_key(site, category, page), site, json.dumps(category), page) for page in pages]
+        )
+
+    def put_tasks(self, site, tasks):
+        with self._transaction() as db:
+            for category, page in tasks:
+                self._insert_tasks(db, site, category, [page])
+
+    def _expire_leases(self, db, now):
+        expired = db.execute(
+            "SELECT id, attempts FROM tasks WHERE status = 'leased' AND lease_expires < ?", (now,)
+        ).fetchall()
+        for task_id, attempts in expired:
+            self._retry_or_fail(db, task_id, attempts, 'lease expired')
+
+    def _retry_or_fail(self, db, task_id, attempts, error):
+        status = 'failed' if attempts + 1 >= self.max_attempts else 'pending'
+        db.execute(
+            "UPDATE tasks SET status = ?, attempts = ?, owner = NULL, lease_expires = NULL, error = ? WHERE id = ?",
+            (status, attempts + 1, error, task_id)
+        )
+
+    def lease(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._transaction() as db:
+            self._expire_leases(db, now)
+            row = db.execute(
+                "SELECT id, site, category, page, attempts FROM tasks WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, row[0])
+            )
+        return {'id': row[0], 'site': row[1], 'category': json.loads(row[2]), 'page': row[3], 'attempts': row[4]}
+
+    def complete(self, task, worker_id, rows, follow_up_pages):
+        """Stores the task's rows and follow-ups. Returns False if the lease was lost."""
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE tasks SET status = 'done', lease_expires = NULL WHERE id = ? AND owner = ? AND status = 'leased'",
+                (task['id'], worker_id)
+            ).rowcount
+            if not updated:
+                return False
+            if rows:
+                db.execute(
+                    "INSERT INTO results (site, task_id, rows) VALUES (?, ?, ?)",
+                    (task['site'], task['id'], json.dumps([row.to_tuple() for row in rows]))
+                )
+            self._insert_tasks(db, task['site'], task['category'], follow_up_pages)
+        return True
+
+    def fail(self, task, worker_id, error):
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND owner = ? AND status = 'leased'",
+                (task['id'], worker_id)
+            ).fetchone()
+            if row is not None:
+                self._retry_or_fail(db, task['id'], row[0], error)
+
+    def counts(self):
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for status, count in self._db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def finished(self):
+        counts = self.counts()
+        return counts['pending'] == 0 and counts['leased'] == 0
+
+    def failed_tasks(self):
+        rows = self._db.execute(
+            "SELECT site, category, page, attempts, error FROM tasks WHERE status = 'failed' ORDER BY id"
+        ).fetchall()
+        return [
+            {'site': site, 'category': json.loads(category), 'page': page, 'attempts': attempts, 'error': error}
+            for site, category, page, attempts, error in rows
+        ]
+
+    def iter_results(self, site):
+        cursor = self._db.execute("SELECT rows FROM results WHERE site = ? ORDER BY task_id", (site,))
+        for (rows,) in cursor:
+            for values in json.loads(rows):
+                yield Product.from_tuple(values)
+
+    def close(self):
+        self._db.close()
+
+# --- Redis Backend ---
+
+# Every state change runs as one Lua script, so no other client ever sees a
+# task half-moved (e.g. out of 'leased' but not yet back in 'pending', which
+# would let finished() report an empty queue). All scripts get the same KEYS:
+#   1 pending (list)  2 leased (zset by expiry)  3 failed (set)  4 task keys (set)
+#   5 id sequence     6 done counter             7 results list of the site
+# and build each task's hash key as '<prefix>:task:<id>' from ARGV[1].
+_REDIS_FUNCTIONS = """
+local prefix = ARGV[1]
+
+local function insert_tasks(site, first)
+    for i = first, #ARGV, 3 do
+        if redis.call('SADD', KEYS[4], ARGV[i]) == 1 then
+            local id = redis.call('INCR', KEYS[5])
+            redis.call('HSET', prefix .. ':task:' .. id, 'site', site, 'category', ARGV[i + 1],
+                       'page', ARGV[i + 2], 'attempts', 0, 'status', 'pending', 'owner', '')
+            redis.call('LPUSH', KEYS[1], id)
+        end
+    end
+end
+
+local function retry_or_fail(id, err, max_attempts)
+    local task = prefix .. ':task:' .. id
+    local attempts = redis.call('HINCRBY', task, 'attempts', 1)
+    if attempts >= max_attempts then
+        redis.call('HSET', task, 'status', 'failed', 'owner', '', 'error', err)
+        redis.call('SADD', KEYS[3], id)
+    else
+        redis.call('HSET', task, 'status', 'pending', 'owner', '', 'error', err)
+        redis.call('LPUSH', KEYS[1], id)
+    end
+end
+
+local function owns(id, worker_id)
+    return redis.call('HGET', prefix .. ':task:' .. id, 'owner') == worker_id
+        and redis.call('ZSCORE', KEYS[2], id)
+end
+"""
+
+# ARGV: prefix, site, then (task key, category, page) per task
+_REDIS_PUT = _REDIS_FUNCTIONS + """
+insert_tasks(ARGV[2], 3)
+"""
+
+# ARGV: prefix, now, lease expiry, worker id, max attempts
+_REDIS_LEASE = _REDIS_FUNCTIONS + """
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[2])) do
+    redis.call('ZREM', KEYS[2], id)
+    retry_or_fail(id, 'lease expired', tonumber(ARGV[5]))
+end
+local id = redis.call('RPOP', KEYS[1])
+if not id then
+    return false
+end
+local task = prefix .. ':task:' .. id
+redis.call('HSET', task, 'status', 'leased', 'owner', ARGV[4])
+redis.call('ZADD', KEYS[2], ARGV[3], id)
+return {id, redis.call('HGETALL', task)}
+"""
+
+# ARGV: prefix, task id, worker id, rows JSON ('' for none), site, then follow-up tasks
+_REDIS_COMPLETE = _REDIS_FUNCTIONS + """
+if not owns(ARGV[2], ARGV[3]) then
+    return 0
+end
+-- Follow-ups go in before the task leaves 'leased'
+insert_tasks(ARGV[5], 6)
+if ARGV[4] ~= '' then
+    redis.call('RPUSH', KEYS[7], ARGV[4])
+end
+redis.call('HSET', prefix .. ':task:' .. ARGV[2], 'status', 'done')
+redis.call('INCR', KEYS[6])
+redis.call('ZREM', KEYS[2], ARGV[2])
+return 1
+"""
+
+# ARGV: prefix, task id, worker id, error, max attempts
+_REDIS_FAIL = _REDIS_FUNCTIONS + """
+if not owns(ARGV[2], ARGV[3]) then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+retry_or_fail(ARGV[2], ARGV[4], tonumber(ARGV[5]))
+return 1
+"""
+
+class RedisQueue:
+    """Task queue in Redis for workers spread over several machines."""
+
+    def __init__(self, url, max_attempts=DEFAULT_MAX_ATTEMPTS, prefix='webscraper'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The Redis queue needs the 'redis' package: pip install redis")
+        self.max_attempts = max_attempts
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self._put = self._r.register_script(_REDIS_PUT)
+        self._lease = self._r.register_script(_REDIS_LEASE)
+        self._complete = self._r.register_script(_REDIS_COMPLETE)
+        self._fail = self._r.register_script(_REDIS_FAIL)
+
+    def _key(self, *parts):
+        return ":".join((self._prefix,) + parts)
+
+    def _keys(self, site=''):
+        return [self._key(name) for name in ('pending', 'leased', 'failed', 'keys', 'seq', 'done')] + \
+            [self._key('results', site)]
+
+    def reset(self):
+        for key in self._r.scan_iter(self._key('*')):
+            self._r.delete(key)
+
+    def _task_args(self, site, category, pages):
+        return [value for page in pages
+                for value in (task_key(site, category, page), json.dumps(category), page)]
+
+    def put_tasks(self, site, tasks):
+        args = [value for category, page in tasks for value in self._task_args(site, category, [page])]
+        self._put(keys=self._keys(site), args=[self._prefix, site] + args)
+
+    def lease(self, worker_id, lease_seconds):
+        now = time.time()
+        leased = self._lease(keys=self._keys(),
+                             args=[self._prefix, now, now + lease_seconds, worker_id, self.max_attempts])
+        if not leased:
+            return None
+        task_id, fields = leased
+        data = dict(zip(fields[::2], fields[1::2]))
+        return {
+            'id': task_id,
+            'site': data['site'],
+            'category': json.loads(data['category']),
+            'page': int(data['page']),
+            'attempts': int(data['attempts'])
+        }
+
+    def complete(self, task, worker_id, rows, follow_up_pages):
+        rows = json.dumps([row.to_tuple() for row in rows]) if rows else ''
+        follow_ups = self._task_args(task['site'], task['category'], follow_up_pages)
+        return bool(self._complete(keys=self._keys(task['site']),
+                                   args=[self._prefix, task['id'], worker_id, rows, task['site']] + follow_ups))
+
+    def fail(self, task, worker_id, error):
+        self._fail(keys=self._keys(task['site']),
+                   args=[self._prefix, task['id'], worker_id, error, self.max_attempts])
+
+    def counts(self):
+        return {
+            'pending': self._r.llen(self._key('pending')),
+            'leased': self._r.zcard(self._key('leased')),
+            'done': int(self._r.get(self._key('done')) or 0),
+            'failed': self._r.scard(self._key('failed'))
+        }
+
+    def finished(self):
+        counts = self.counts()
+        return counts['pending'] == 0 and counts['leased'] == 0
+
+    def failed_tasks(self):
+        tasks = []
+        for task_id in sorted(self._r.smembers(self._key('failed')), key=int):
+            data = self._r.hgetall(self._key('task', task_id))
+            tasks.append({
+                'site': data['site'],
+                'category': json.loads(data['category']),
+                'page': int(data['page']),
+                'attempts': int(data['attempts']),
+                'error': data.get('error')
+            })
+        return tasks
+
+    def iter_results(self, site):
+        key = self._key('results', site)
+        start, batch = 0, 100
+        while True:
+            chunk = self._r.lrange(key, start, start + batch - 1)
+            if not chunk:
+                return
+            for rows in chunk:
+                for values in json.loads(rows):
+                    yield Product.from_tuple(values)
+            start += batch
+
+    def close(self):
+        self._r.close()
@@ -0,0 +1,85 @@
+import os
+import socket
+import time
+
+from config.sites import SUPPORTED_SITES
+from scrapers.common import Fetcher
+from scrapers.common.crawl import category_name, run_page_task, site_module
+from scrapers.common.events import WARNING, emit, init_worker
+from .queues import DEFAULT_MAX_ATTEMPTS, open_queue
+
+# --- Worker ---
+
+DEFAULT_LEASE_SECONDS = 180   # Longer than a page fetch with all its retries
+POLL_INTERVAL = 1.0
+
+def find_site(name):
+    """Looks up a SUPPORTED_SITES entry by exact name, or by case-insensitive prefix."""
+    matches = []
+    for sites in SUPPORTED_SITES.values():
+        for site_name, entry in sites.items():
+            if site_name == name:
+                return site_name, entry
+            if site_name.lower().startswith(name.lower()):
+                matches.append((site_name, entry))
+    if len(matches) == 1:
+        return matches[0]
+    raise KeyError(f"Unknown or ambiguous site '{name}'.")
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_worker(queue_url, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, exit_when_idle=True,
+               events=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Leases page tasks until the queue is drained: fetch, parse, then upload
+    the page's rows and any follow-up pages in one call. Each site gets its
+    own session and AIMD limiter in this process. `events` forwards this
+    process's events to a coordinator's listeners (see events.worker_queue).
+    Workers decide when a failed or expired task is given up, so
+    `max_attempts` must match the coordinator's.
+    """
+    init_worker(events)
+    worker_id = worker_id or default_worker_id()
+    queue = open_queue(queue_url, max_attempts)
+    sites = {}
+    processed = 0
+
+    print(f"[worker {worker_id}] Connected to {queue_url}")
+    try:
+        while True:
+            task = queue.lease(worker_id, lease_seconds)
+            if task is None:
+                if exit_when_idle and queue.finished():
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            if task['site'] not in sites:
+                _, entry = find_site(task['site'])
+                module = site_module(entry['scraper'])
+                sites[task['site']] = (module, entry['config'], Fetcher(module.setup_session(), entry['config']))
+            module, config, fetcher = sites[task['site']]
+
+            try:
+                rows, follow_ups = run_page_task(module, config, fetcher, task['category'], task['page'])
+            except Exception as e:
+                emit('page_failed', WARNING, store=task['site'], category=category_name(task['category']),
+                     page=task['page'], worker=worker_id, error=str(e))
+                queue.fail(task, worker_id, str(e))
+                continue
+
+            if not queue.complete(task, worker_id, rows, follow_ups):
+                emit('lease_lost', WARNING, store=task['site'], page=task['page'], worker=worker_id)
+            else:
+                emit('page_parsed', store=task['site'], category=category_name(task['category']),
+                     page=task['page'], products=len(rows), follow_ups=len(follow_ups), worker=worker_id)
+            processed += 1
+    finally:
+        for _, _, fetcher in sites.values():
+            fetcher.report()
+            fetcher.close()
+        queue.close()
+
+    print(f"[worker {worker_id}] Queue drained. Processed {processed} tasks.")
+    return processed
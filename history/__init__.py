@@ -0,0 +1,3 @@
+# Append-only price history of saved runs, with trend queries
+
+from .store import DEFAULT_HISTORY_DIR, PriceHistory, product_key
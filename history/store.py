@@ -0,0 +1,427 @@
+import hashlib
+import os
+import re
+from datetime import date, datetime, timedelta
+
+# --- Price History Store ---
+#
+# Every saved run is appended as one Parquet file per site under
+#
+#   price_history/month=YYYY-MM/<from>_<to>__<store>[__<run stamp>].parquet
+#
+# so a query for the last N days only opens the month folders and files
+# whose date range overlaps it, and only the columns it needs. Rows in each
+# file are sorted by product_key, letting Parquet row-group statistics skip
+# most of a file when looking up individual products. A small products
+# index (product_key -> store/brand/model, first/last seen) answers model
+# searches without touching the history files, and a per-run brand rollup
+# answers the brand-median query exactly without rescanning every price.
+# Once a month is over its daily files are merged into one file per store
+# (compact), which keeps a year of history to a few dozen files, and each
+# product's low/latest price for that month is summarised so long-range
+# lowest-price queries only scan raw rows for partial months.
+#
+# Needs the optional 'pyarrow' package.
+
+DEFAULT_HISTORY_DIR = 'price_history'
+INDEX_FILE = 'products.parquet'
+BRAND_ROLLUP_FILE = 'brand_daily.parquet'
+MONTHLY_SUMMARY_FILE = 'monthly_lows.parquet'
+HISTORY_FIELDS = ('store', 'country', 'currency', 'category', 'brand', 'model', 'price', 'product_url')
+ROW_GROUP_SIZE = 64 * 1024
+
+def require_pyarrow():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("The price history needs the 'pyarrow' package: pip install pyarrow")
+
+def normalise_model(model):
+    return re.sub(r'\s+', ' ', str(model)).strip().lower()
+
+def product_key(store, model):
+    """Stable signed 64-bit key for a product: one store's listing of one model."""
+    digest = hashlib.blake2b(f"{store}|{normalise_model(model)}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def store_slug(store):
+    return re.sub(r'[^A-Za-z0-9]+', '-', store).strip('-').lower() or 'store'
+
+def parse_file_name(name):
+    """'2025-01-31_2025-01-31__nanotek__20250131T101500000000.parquet' -> (date_from, date_to, slug, compacted)."""
+    parts = name[:-len('.parquet')].split('__')
+    date_from, date_to = (date.fromisoformat(value) for value in parts[0].split('_'))
+    return date_from, date_to, parts[1], len(parts) == 2
+
+def summarise(rows):
+    """
+    Per product in a table of history rows: lowest price, the last day it
+    was seen at that price, and the price in the most recent run.
+    Aggregates in Arrow; pandas group-bys over months of rows are several
+    times slower.
+    """
+    per_product = rows.group_by('product_key').aggregate([('price', 'min'), ('run', 'max')])
+    latest = rows.join(
+        per_product.select(['product_key', 'run_max']).rename_columns(['product_key', 'run']),
+        ['product_key', 'run'], join_type='inner'
+    ).select(['product_key', 'price']).rename_columns(['product_key', 'latest_price'])
+    lowest_on = rows.join(
+        per_product.select(['product_key', 'price_min']).rename_columns(['product_key', 'price']),
+        ['product_key', 'price'], join_type='inner'
+    ).group_by('product_key').aggregate([('date', 'max')])
+    return per_product.join(latest, 'product_key').join(lowest_on, 'product_key').rename_columns(
+        {'price_min': 'lowest_price', 'run_max': 'last_run', 'date_max': 'lowest_on'}
+    )
+
+
+class PriceHistory:
+    """Append-only, date-partitioned Parquet history of every saved run."""
+
+    def __init__(self, root=DEFAULT_HISTORY_DIR):
+        require_pyarrow()
+        self.root = root
+
+    # --- Writing ---
+
+    def append(self, batch, run_time=None):
+        """Appends a ProductBatch as one new file. Returns its path, or None for an empty batch."""
+        import pandas as pd
+        import pyarrow as pa
+
+        if not len(batch):
+            return None
+        run_time = run_time or datetime.now()
+        frame = batch.to_canonical_frame()[list(HISTORY_FIELDS)]
+        frame = frame[frame['price'].notna()]
+        store = batch.constants['store']
+
+        frame.insert(0, 'product_key', [product_key(store, model) for model in frame['model']])
+        frame.insert(0, 'run', pd.Timestamp(run_time))
+        frame.insert(0, 'date', run_time.date())
+        frame = frame.drop_duplicates('product_key', keep='first')
+
+        table = pa.Table.from_pandas(frame, preserve_index=False).sort_by('product_key')
+        day = run_time.date().isoformat()
+        folder = os.path.join(self.root, f"month={day[:7]}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{day}_{day}__{store_slug(store)}__{run_time:%Y%m%dT%H%M%S%f}.parquet")
+        self._write(table, path)
+        self._update_index(frame, run_time.date())
+        self._update_brand_rollup(frame)
+        for month in self.uncompacted_months():
+            if month != day[:7]:
+                self.compact(month)
+        return path
+
+    def _write(self, table, path):
+        import pyarrow.parquet as pq
+
+        temp_path = f"{path}.tmp"
+        pq.write_table(table, temp_path, compression='zstd', row_group_size=ROW_GROUP_SIZE)
+        os.replace(temp_path, path)
+
+    def _update_index(self, frame, day):
+        import pandas as pd
+        import pyarrow as pa
+
+        seen = frame[['product_key', 'store', 'brand', 'model', 'currency']].astype(
+            {'store': str, 'brand': str, 'currency': str}
+        )
+        seen = seen.assign(first_seen=day, last_seen=day)
+        index = self.products()
+        if index is not None:
+            first_seen = dict(zip(index['product_key'], index['first_seen']))
+            seen['first_seen'] = [first_seen.get(key, day) for key in seen['product_key']]
+            index = pd.concat([index[~index['product_key'].isin(seen['product_key'])], seen], ignore_index=True)
+        else:
+            index = seen
+        self._write(pa.Table.from_pandas(index, preserve_index=False), os.path.join(self.root, INDEX_FILE))
+
+    def _update_brand_rollup(self, frame):
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        summary = frame.groupby(['date', 'run', 'store', 'currency', 'brand'], observed=True)['price'].agg(
+            median_price='median', products='count'
+        ).reset_index().astype({'store': str, 'currency': str, 'brand': str})
+        path = os.path.join(self.root, BRAND_ROLLUP_FILE)
+        if os.path.exists(path):
+            summary = pd.concat([pq.read_table(path).to_pandas(), summary], ignore_index=True)
+        self._write(pa.Table.from_pandas(summary, preserve_index=False), path)
+
+    def uncompacted_months(self):
+        """Months still holding per-run files."""
+        months = []
+        for folder in sorted(os.listdir(self.root)):
+            if folder.startswith('month=') and any(
+                name.endswith('.parquet') and not parse_file_name(name)[3]
+                for name in os.listdir(os.path.join(self.root, folder))
+            ):
+                months.append(folder[len('month='):])
+        return months
+
+    def compact(self, month):
+        """
+        Merges a month's files into one file per store (sorted by product,
+        then date) and records each product's monthly summary.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        folder = os.path.join(self.root, f"month={month}")
+        by_store = {}
+        for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+            if name.endswith('.parquet'):
+                by_store.setdefault(parse_file_name(name)[2], []).append(name)
+
+        merged = 0
+        summaries = []
+        for slug, names in by_store.items():
+            if len(names) == 1 and parse_file_name(names[0])[3]:
+                continue
+            table = pa.concat_tables(
+                [pq.read_table(os.path.join(folder, name)) for name in names], promote_options='permissive'
+            ).sort_by([('product_key', 'ascending'), ('date', 'ascending')])
+            dates = [parse_file_name(name)[:2] for name in names]
+            first, last = min(d[0] for d in dates), max(d[1] for d in dates)
+            compacted = f"{first.isoformat()}_{last.isoformat()}__{slug}.parquet"
+            self._write(table, os.path.join(folder, compacted))
+            for name in names:
+                if name != compacted:
+                    os.remove(os.path.join(folder, name))
+            merged += len(names)
+            summaries.append((slug, summarise(table.select(['date', 'run', 'product_key', 'price']))))
+
+        if summaries:
+            self._update_monthly_summary(month, summaries)
+        return merged
+
+    def _update_monthly_summary(self, month, summaries):
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        fresh = pd.concat(
+            [table.to_pandas().assign(month=month, slug=slug) for slug, table in summaries], ignore_index=True
+        )
+        path = os.path.join(self.root, MONTHLY_SUMMARY_FILE)
+        if os.path.exists(path):
+            existing = pq.read_table(path).to_pandas()
+            replaced = existing['month'].eq(month) & existing['slug'].isin(fresh['slug'].unique())
+            fresh = pd.concat([existing[~replaced], fresh], ignore_index=True)
+        self._write(pa.Table.from_pandas(fresh, preserve_index=False), path)
+
+    def monthly_summaries(self, since, store=None):
+        """Summaries of compacted months lying entirely on or after `since`, or None."""
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.root, MONTHLY_SUMMARY_FILE)
+        if not os.path.exists(path):
+            return None
+        summaries = pq.read_table(path).to_pandas()
+        first_full_month = since.isoformat()[:7] if since.day == 1 else \
+            (since.replace(day=28) + timedelta(days=4)).isoformat()[:7]
+        summaries = summaries[summaries['month'] >= first_full_month]
+        if store:
+            summaries = summaries[summaries['slug'] == store_slug(store)]
+        return summaries
+
+    # --- Reading ---
+
+    def products(self):
+        """The products index as a DataFrame, or None before the first run."""
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.root, INDEX_FILE)
+        return pq.read_table(path).to_pandas() if os.path.exists(path) else None
+
+    def files(self, since=None, store=None, skip=()):
+        """
+        History files overlapping [since, today], optionally for one store,
+        oldest first. `skip` holds (month, slug) pairs already answered from
+        the monthly summaries.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        slug = store_slug(store) if store else None
+        selected = []
+        for folder in sorted(os.listdir(self.root)):
+            if not folder.startswith('month='):
+                continue
+            if since and folder[len('month='):] < since.isoformat()[:7]:
+                continue
+            for name in sorted(os.listdir(os.path.join(self.root, folder))):
+                if not name.endswith('.parquet'):
+                    continue
+                date_from, date_to, file_slug, _ = parse_file_name(name)
+                if since and date_to < since:
+                    continue
+                if (slug and file_slug != slug) or (folder[len('month='):], file_slug) in skip:
+                    continue
+                selected.append((date_from, date_to, os.path.join(self.root, folder, name)))
+        return [path for _, _, path in sorted(selected)]
+
+    def read(self, columns, since=None, store=None, keys=None, skip=()):
+        """Reads only `columns` from the matching files as a pyarrow Table (None if there are none)."""
+        import pyarrow.dataset as ds
+
+        paths = self.files(since, store, skip)
+        if not paths:
+            return None
+        condition = None
+        if since and any(parse_file_name(os.path.basename(path))[0] < since for path in paths):
+            condition = ds.field('date') >= since
+        if keys is not None:
+            key_filter = ds.field('product_key').isin(list(keys))
+            condition = key_filter if condition is None else condition & key_filter
+        return ds.dataset(paths, format='parquet').to_table(columns=list(columns), filter=condition)
+
+    def find_products(self, model=None, store=None, brand=None):
+        """Index rows whose model/brand contain the given text (case-insensitive)."""
+        index = self.products()
+        if index is None:
+            return None
+        if store:
+            index = index[index['store'].str.lower() == store.lower()]
+        if brand:
+            index = index[index['brand'].str.lower() == brand.lower()]
+        if model:
+            index = index[index['model'].str.contains(model, case=False, regex=False)]
+        return index
+
+    # --- Queries ---
+
+    def series(self, model, store=None, days=None):
+        """Daily price series for every product whose model contains `model`."""
+        matches = self.find_products(model, store)
+        if matches is None or matches.empty:
+            return None
+        since = date.today() - timedelta(days=days) if days else None
+        rows = self.read(['date', 'run', 'product_key', 'price'], since, store, keys=matches['product_key'])
+        if rows is None:
+            return None
+        rows = rows.to_pandas().merge(matches[['product_key', 'store', 'model', 'currency']], on='product_key')
+        return rows.sort_values(['store', 'model', 'run'])[['date', 'store', 'model', 'price', 'currency']]
+
+    def lowest_prices(self, days, store=None, model=None):
+        """Per product: lowest price (and when) over the last `days` days, next to the latest price."""
+        import pandas as pd
+
+        since = date.today() - timedelta(days=days)
+        keys = None
+        if model:
+            matches = self.find_products(model, store)
+            if matches is None or matches.empty:
+                return None
+            keys = matches['product_key']
+
+        # Whole months come from their summaries; only the rest is read row by row
+        parts = []
+        skip = set()
+        summaries = self.monthly_summaries(since, store)
+        if summaries is not None and not summaries.empty:
+            covered = summaries[['month', 'slug']].drop_duplicates()
+            skip = set(zip(covered['month'], covered['slug']))
+            parts.append(summaries if keys is None else summaries[summaries['product_key'].isin(keys)])
+        rows = self.read(['date', 'run', 'product_key', 'price'], since, store, keys, skip)
+        if rows is not None and rows.num_rows:
+            parts.append(summarise(rows).to_pandas())
+        if not parts:
+            return None
+
+        combined = pd.concat(parts, ignore_index=True)
+        lowest = combined.sort_values(['lowest_price', 'lowest_on'], ascending=[True, False]) \
+            .drop_duplicates('product_key')[['product_key', 'lowest_price', 'lowest_on']]
+        latest = combined.sort_values('last_run').drop_duplicates('product_key', keep='last')[
+            ['product_key', 'latest_price']
+        ]
+        result = lowest.merge(latest, on='product_key').merge(
+            self.products()[['product_key', 'store', 'brand', 'model', 'currency']], on='product_key'
+        )
+        if result.empty:
+            return None
+        return result.sort_values(['store', 'model'])[
+            ['store', 'brand', 'model', 'lowest_price', 'lowest_on', 'latest_price', 'currency']
+        ]
+
+    def last_runs(self, store_file_paths, count=2):
+        """The `count` most recent run timestamps among the given files (newest last)."""
+        import pyarrow.parquet as pq
+
+        runs = set()
+        for path in reversed(store_file_paths):
+            runs.update(pq.read_table(path, columns=['run']).column('run').unique().to_pylist())
+            if len(runs) >= count:
+                break
+        return sorted(runs)[-count:]
+
+    def latest_products(self):
+        """Every store's products from its most recent run, one canonical-style frame."""
+        import pandas as pd
+
+        slugs = sorted({parse_file_name(os.path.basename(path))[2] for path in self.files()})
+        frames = []
+        for slug in slugs:
+            runs = self.last_runs(self.files(store=slug), count=1)
+            if not runs:
+                continue
+            rows = self.read(['run', 'store', 'brand', 'model', 'price', 'currency', 'product_url'],
+                             runs[0].date(), slug).to_pandas()
+            frames.append(rows[rows['run'] == runs[0]].drop(columns='run'))
+        if not frames:
+            return None
+        return pd.concat([frame.astype({'store': str, 'brand': str, 'currency': str}) for frame in frames],
+                         ignore_index=True)
+
+    def price_changes(self, store=None):
+        """Products whose price changed, appeared or disappeared between each store's last two runs."""
+        import pandas as pd
+
+        index = self.products()
+        if index is None:
+            return None
+        stores = [store] if store else sorted(index['store'].unique())
+        changes = []
+        for name in stores:
+            paths = self.files(store=name)
+            runs = self.last_runs(paths)
+            if len(runs) < 2:
+                continue
+            rows = self.read(['run', 'product_key', 'price'], runs[0].date(), name).to_pandas()
+            previous = rows[rows['run'] == runs[0]].drop(columns='run')
+            current = rows[rows['run'] == runs[1]].drop(columns='run')
+            merged = previous.merge(current, on='product_key', how='outer', suffixes=('_before', '_now'))
+            merged = merged[merged['price_before'].ne(merged['price_now'])]
+            merged['status'] = 'changed'
+            merged.loc[merged['price_before'].isna(), 'status'] = 'new'
+            merged.loc[merged['price_now'].isna(), 'status'] = 'removed'
+            changes.append(merged)
+
+        if not changes:
+            return None
+        result = pd.concat(changes, ignore_index=True)
+        result['change'] = result['price_now'] - result['price_before']
+        result['change_pct'] = (result['change'] / result['price_before'] * 100).round(1)
+        result = result.merge(index[['product_key', 'store', 'brand', 'model', 'currency']], on='product_key')
+        return result.sort_values(['store', 'status', 'change'])[
+            ['store', 'brand', 'model', 'status', 'price_before', 'price_now', 'change', 'change_pct', 'currency']
+        ]
+
+    def brand_median_by_day(self, days, store=None, brand=None):
+        """Median price per brand per day and store, from the per-run rollup (last run of each day)."""
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.root, BRAND_ROLLUP_FILE)
+        if not os.path.exists(path):
+            return None
+        rollup = pq.read_table(path).to_pandas()
+        rollup = rollup[rollup['date'] >= date.today() - timedelta(days=days)]
+        if store:
+            rollup = rollup[rollup['store'].str.lower() == store.lower()]
+        if brand:
+            rollup = rollup[rollup['brand'].str.lower() == brand.lower()]
+        rollup = rollup.sort_values('run').drop_duplicates(['date', 'store', 'brand'], keep='last')
+        return rollup.sort_values(['date', 'store', 'brand'])[
+            ['date', 'store', 'brand', 'median_price', 'products', 'currency']
+        ]
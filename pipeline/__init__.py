@@ -0,0 +1,6 @@
+# Optional post-scrape pipeline stages
+
+from .enrichment import enrich_products
+from .images import download_images
+from .currency import convert_prices, load_rates
+from .matching import match_products
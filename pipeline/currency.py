@@ -0,0 +1,45 @@
+import json
+
+# --- Currency Conversion ---
+#
+# Converts the canonical `price` column into one target currency so stores
+# in different countries can be compared. Rates come from a local JSON file
+# (no network lookups during a run):
+#
+#   {"base": "USD", "date": "2025-01-31", "rates": {"USD": 1, "LKR": 296.5, "JPY": 154.2}}
+#
+# where each rate is units of that currency per one unit of `base`.
+
+DEFAULT_RATES_FILE = 'config/fx_rates.json'
+
+def load_rates(path=DEFAULT_RATES_FILE):
+    """Reads a rates file. Returns (base, {currency: units per base})."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    base = data['base'].upper()
+    rates = {currency.upper(): float(rate) for currency, rate in data['rates'].items()}
+    rates.setdefault(base, 1.0)
+    return base, rates
+
+def convert_prices(frame, rates, target):
+    """
+    Adds a `price_<target>` column to a canonical frame, converting each row
+    from its own `currency`. The conversion is one vectorised multiply: a
+    factor is computed per currency (not per row) and mapped onto the
+    categorical `currency` column. Rows in currencies missing from the rates
+    file get NaN and are reported.
+    """
+    target = target.upper()
+    if target not in rates:
+        raise ValueError(f"No exchange rate for target currency '{target}'.")
+
+    currencies = frame['currency'].astype('category')
+    factors = {currency: rates[target] / rates[currency]
+               for currency in currencies.cat.categories if currency in rates}
+    missing = sorted(set(currencies.cat.categories) - set(factors))
+    if missing:
+        print(f"  ⚠️ No exchange rate for {', '.join(missing)}; those prices are left empty.")
+
+    factor = currencies.map(factors).astype('float64')
+    frame[f'price_{target.lower()}'] = (frame['price'] * factor).round(2)
+    return frame
@@ -0,0 +1,275 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urljoin
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+from scrapers.common import Fetcher
+from scrapers.common.engine import PARSER, compile_field, read_field, setup_session
+from scrapers.common.events import WARNING, emit
+from scrapers.common.records import store_name
+
+# --- Product-Detail Enrichment Stage ---
+#
+# Listing pages only give us name/price/image. This stage visits each
+# record's product URL, extracts detail-only fields (SKU, stock, specs) and
+# merges them into the record. Records flow through two bounded queues and
+# are put back in input order at the end, and the feeder never runs more
+# than 2 x `queue_size` + `workers` records ahead of the oldest unfinished
+# one, so that many records are held at most, however many products the
+# site has.
+
+DEFAULT_ENRICHMENT = {
+    'workers': 8,                 # Detail pages fetched concurrently (still gated by the AIMD limiter)
+    'queue_size': 200,            # Bound on each of the input/output queues (backpressure)
+    'cache_file': '.cache/detail_cache.sqlite',
+    'cache_ttl_hours': 72,        # Re-fetch details older than this
+    'memory_cache_size': 5000     # Hot in-process cache in front of the SQLite one
+}
+
+# Detail page selectors per platform. A site's 'enrichment' config may
+# override any field or the specs table selectors.
+DETAIL_SPECS = {
+    'cscart': {
+        'fields': {
+            'sku': '[id^="product_code_"]',
+            'stock': ['.ty-qty-in-stock', '.ty-qty-out-of-stock']
+        },
+        'specs': {
+            'row': '.ty-product-feature',
+            'label': '.ty-product-feature__label',
+            'value': '.ty-product-feature__value'
+        }
+    },
+    'woocommerce': {
+        'fields': {
+            'sku': '.sku',
+            'stock': ['p.stock', '.stock']
+        },
+        'specs': {
+            'row': 'table.woocommerce-product-attributes tr',
+            'label': 'th',
+            'value': 'td'
+        }
+    }
+}
+
+# Output column for each extracted field
+DETAIL_COLUMNS = {
+    'sku': 'SKU',
+    'stock': 'Stock',
+    'specs': 'Specs'
+}
+
+_DONE = object()
+
+# --- Detail Cache ---
+
+class DetailCache:
+    """URL -> extracted fields, kept in a small LRU in memory and in SQLite across runs."""
+
+    def __init__(self, path, ttl_hours, memory_size):
+        self.ttl = ttl_hours * 3600
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._pending = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS details (url TEXT PRIMARY KEY, fields TEXT, fetched_at REAL)"
+            )
+            self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            if url in self._memory:
+                self._memory.move_to_end(url)
+                return self._memory[url]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT fields, fetched_at FROM details WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        fields = json.loads(row[0])
+        self._remember(url, fields)
+        return fields
+
+    def put(self, url, fields):
+        self._remember(url, fields)
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO details (url, fields, fetched_at) VALUES (?, ?, ?)",
+                (url, json.dumps(fields), time.time())
+            )
+            self._pending += 1
+            if self._pending >= 100:
+                self._db.commit()
+                self._pending = 0
+
+    def _remember(self, url, fields):
+        with self._lock:
+            self._memory[url] = fields
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.commit()
+                self._db.close()
+
+# --- Extraction ---
+
+class DetailSpec:
+    """Compiled detail-page selectors for one site."""
+
+    def __init__(self, config):
+        settings = config.get('enrichment', {})
+        base = DETAIL_SPECS.get(config.get('platform'), {'fields': {}, 'specs': None})
+
+        fields = dict(base['fields'])
+        fields.update(settings.get('fields', {}))
+        self.fields = {name: compile_field(field) for name, field in fields.items()}
+
+        specs = settings.get('specs', base.get('specs'))
+        self.specs = None
+        if specs:
+            self.specs = {
+                'row': soupsieve.compile(specs['row']),
+                'label': compile_field(specs['label']),
+                'value': compile_field(specs['value'])
+            }
+
+def extract_details(content, spec):
+    """Parses a product detail page into a dict of extracted fields."""
+    soup = BeautifulSoup(content, PARSER)
+    details = {name: read_field(soup, candidates) for name, candidates in spec.fields.items()}
+
+    if spec.specs:
+        pairs = []
+        for row in spec.specs['row'].select(soup):
+            label = read_field(row, spec.specs['label'])
+            value = read_field(row, spec.specs['value'])
+            if label and value:
+                pairs.append(f"{label.rstrip(':')}: {value}")
+        details['specs'] = "; ".join(pairs) or None
+
+    return details
+
+# --- Stage ---
+
+def enrich_products(products, config):
+    """
+    Generator that yields each Product with detail-page fields merged into its extras.
+    Records without a usable URL pass through unchanged. Records come out in
+    input order (category, then page), so saved sheets are stable between runs.
+    """
+    settings = dict(DEFAULT_ENRICHMENT)
+    settings.update(config.get('enrichment', {}))
+
+    spec = DetailSpec(config)
+    fetcher = Fetcher(setup_session(), config)
+    cache = DetailCache(settings['cache_file'], settings['cache_ttl_hours'], settings['memory_cache_size'])
+    stats = {'fetched': 0, 'cached': 0, 'failed': 0, 'skipped': 0}
+    store = store_name(config)
+    stats_lock = threading.Lock()
+
+    inbox = queue.Queue(maxsize=settings['queue_size'])
+    outbox = queue.Queue(maxsize=settings['queue_size'])
+    workers = settings['workers']
+    # Details finish out of order; records wait here until the ones before them are done.
+    # The window caps how far the feeder may run ahead of the oldest unfinished record.
+    window = threading.Semaphore(2 * settings['queue_size'] + workers)
+
+    def count(key):
+        with stats_lock:
+            stats[key] += 1
+
+    def feed():
+        # Blocks whenever the workers fall behind: this is the backpressure
+        try:
+            for index, record in enumerate(products):
+                window.acquire()
+                inbox.put((index, record))
+        finally:
+            for _ in range(workers):
+                inbox.put(_DONE)
+
+    def enrich(record):
+        url = record.product_url
+        if not url or url == 'N/A':
+            count('skipped')
+            return
+        url = urljoin(config['base_url'], url)
+
+        details = cache.get(url)
+        if details is not None:
+            count('cached')
+        else:
+            response = fetcher.get(url)
+            response.raise_for_status()
+            details = extract_details(response.content, spec)
+            cache.put(url, details)
+            count('fetched')
+
+        for name, value in details.items():
+            record.set_extra(DETAIL_COLUMNS.get(name, name), value)
+
+    def work():
+        # _DONE is always posted, or the consumer below would wait for this worker forever
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    return
+                _, record = item
+                try:
+                    enrich(record)
+                except Exception as e:
+                    emit('product_error', WARNING, store=store, url=record.product_url, error=str(e))
+                    count('failed')
+                outbox.put(item)
+        finally:
+            outbox.put(_DONE)
+
+    print(f"\n--- Enriching products from detail pages ({workers} workers) ---")
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads += [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    held, next_index = {}, 0
+    try:
+        while finished < workers:
+            item = outbox.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            held[item[0]] = item[1]
+            while next_index in held:
+                window.release()
+                yield held.pop(next_index)
+                next_index += 1
+    finally:
+        cache.close()
+        fetcher.report()
+        fetcher.close()
+        print(
+            f"  Enrichment done: {stats['fetched']} fetched, {stats['cached']} from cache, "
+            f"{stats['failed']} failed, {stats['skipped']} without URL."
+        )
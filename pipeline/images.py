@@ -0,0 +1,231 @@
+import hashlib
+import mimetypes
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from scrapers.common import Fetcher
+from scrapers.common.engine import setup_session
+from scrapers.common.events import WARNING, emit
+from scrapers.common.records import store_name
+
+# --- Image Stage ---
+#
+# Downloads each record's image URL into a content-addressed store
+# (images/<aa>/<sha256>.<ext>), so an image shared by several products or
+# unchanged between runs is stored exactly once. An index remembers each
+# URL's ETag/Last-Modified and hash, letting the next run send conditional
+# requests and skip the download on 304. Thumbnails are generated in a
+# process pool (requires Pillow; skipped with a notice if it isn't installed).
+
+DEFAULT_IMAGES = {
+    'directory': 'images',
+    'chunk_size': 200,             # Records downloaded/thumbnailed per batch
+    'thumbnail_size': (256, 256),
+    'thumbnail_processes': None    # None = one per CPU
+}
+
+# --- Index of previously downloaded URLs ---
+
+class ImageIndex:
+    """URL -> (sha256, stored path, ETag, Last-Modified), persisted in SQLite."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            "url TEXT PRIMARY KEY, sha256 TEXT, path TEXT, etag TEXT, last_modified TEXT)"
+        )
+        self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, path, etag, last_modified FROM images WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'sha256': row[0], 'path': row[1], 'etag': row[2], 'last_modified': row[3]}
+
+    def put(self, url, entry):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO images (url, sha256, path, etag, last_modified) VALUES (?, ?, ?, ?, ?)",
+                (url, entry['sha256'], entry['path'], entry['etag'], entry['last_modified'])
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+# --- Content-Addressed Store ---
+
+def guess_extension(response, url):
+    """Picks a file extension from the Content-Type, falling back to the URL path."""
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+    extension = mimetypes.guess_extension(content_type) if content_type else None
+    if not extension:
+        extension = os.path.splitext(urlsplit(url).path)[1][:5]
+    return extension or '.img'
+
+def store_blob(directory, content, extension):
+    """Writes content under its SHA-256 unless already present. Returns (sha256, path)."""
+    digest = hashlib.sha256(content).hexdigest()
+    folder = os.path.join(directory, digest[:2])
+    path = os.path.join(folder, digest + extension)
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    return digest, path
+
+# --- Thumbnails (runs in worker processes) ---
+
+def make_thumbnail(job):
+    """Creates a JPEG thumbnail for (source, destination, size). Returns destination or None."""
+    source, destination, size = job
+    if os.path.exists(destination):
+        return destination
+    try:
+        from PIL import Image
+        with Image.open(source) as image:
+            image.thumbnail(size)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            temp_path = f"{destination}.{os.getpid()}.tmp"
+            image.save(temp_path, 'JPEG', quality=85)
+            os.replace(temp_path, destination)
+        return destination
+    except Exception:
+        return None
+
+def pillow_available():
+    try:
+        import PIL  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+# --- Stage ---
+
+def download_images(products, config):
+    """
+    Generator that yields each Product with an 'Image Path' extra (and
+    'Thumbnail Path' when Pillow is installed) pointing at local files.
+    Records are processed in chunks so only one chunk is in memory at a time.
+    """
+    settings = dict(DEFAULT_IMAGES)
+    settings.update(config.get('images', {}))
+    directory = settings['directory']
+    os.makedirs(directory, exist_ok=True)
+
+    fetcher = Fetcher(setup_session(), config)
+    index = ImageIndex(os.path.join(directory, 'index.sqlite'))
+    stats = {'downloaded': 0, 'not_modified': 0, 'reused': 0, 'failed': 0}
+    store = store_name(config)
+    stats_lock = threading.Lock()
+    resolved = {}  # URL -> stored path for this run (products often share images)
+
+    thumbnails = pillow_available()
+    pool = ProcessPoolExecutor(max_workers=settings['thumbnail_processes']) if thumbnails else None
+    if not thumbnails:
+        print("  ℹ️ Pillow is not installed; skipping thumbnails (pip install Pillow).")
+
+    def count(key):
+        with stats_lock:
+            stats[key] += 1
+
+    def fetch_image(url):
+        if url in resolved:
+            count('reused')
+            return resolved[url]
+
+        known = index.get(url)
+        headers = {}
+        if known and os.path.exists(known['path']):
+            if known['etag']:
+                headers['If-None-Match'] = known['etag']
+            if known['last_modified']:
+                headers['If-Modified-Since'] = known['last_modified']
+
+        try:
+            response = fetcher.get(url, headers=headers)
+            if response.status_code == 304 and headers:
+                count('not_modified')
+                path = known['path']
+            else:
+                response.raise_for_status()
+                digest, path = store_blob(directory, response.content, guess_extension(response, url))
+                index.put(url, {
+                    'sha256': digest,
+                    'path': path,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                })
+                count('downloaded')
+        except Exception as e:
+            emit('image_failed', WARNING, store=store, url=url, error=str(e))
+            count('failed')
+            return None
+
+        resolved[url] = path
+        return path
+
+    def process_chunk(chunk):
+        urls = []
+        for record in chunk:
+            url = record.image_url
+            if url and url != 'N/A' and not url.startswith('data:'):
+                urls.append(urljoin(config['base_url'], url))
+            else:
+                urls.append(None)
+
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        with stats_lock:
+            stats['reused'] += sum(1 for url in urls if url) - len(unique_urls)
+        paths = dict(zip(unique_urls, fetcher.map(fetch_image, unique_urls)))
+
+        thumbs = {}
+        if pool is not None:
+            stored = sorted({path for path in paths.values() if path})
+            jobs = []
+            for path in stored:
+                name = os.path.splitext(os.path.basename(path))[0] + '.jpg'
+                jobs.append((path, os.path.join(directory, 'thumbs', name[:2], name), tuple(settings['thumbnail_size'])))
+            thumbs = dict(zip(stored, pool.map(make_thumbnail, jobs, chunksize=16)))
+
+        for record, url in zip(chunk, urls):
+            path = paths.get(url) if url else None
+            record.set_extra('Image Path', path)
+            if pool is not None:
+                record.set_extra('Thumbnail Path', thumbs.get(path))
+
+    print(f"\n--- Downloading product images to {directory}/ ---")
+    try:
+        chunk = []
+        for record in products:
+            chunk.append(record)
+            if len(chunk) >= settings['chunk_size']:
+                process_chunk(chunk)
+                yield from chunk
+                chunk = []
+        if chunk:
+            process_chunk(chunk)
+            yield from chunk
+    finally:
+        index.close()
+        if pool is not None:
+            pool.shutdown()
+        fetcher.report()
+        fetcher.close()
+        print(
+            f"  Images: {stats['downloaded']} downloaded, {stats['not_modified']} unchanged (304), "
+            f"{stats['reused']} shared, {stats['failed']} failed."
+        )
@@ -0,0 +1,213 @@
+import re
+import unicodedata
+from itertools import chain
+
+import numpy as np
+
+from scrapers.common.engine import compile_brands
+
+# --- Cross-Store Product Matching ---
+#
+# Links listings of the same product in different stores. Comparing every
+# title with every other one is O(n^2), so candidates are found by
+# blocking instead: each product is put in a block per model-code token it
+# contains (e.g. '15sfq5111tu'), and only products sharing a block in
+# different stores with the same brand (or no recognisable brand) are
+# compared. Blocks larger than `max_block_size` are dropped as too generic.
+# Candidate pairs are scored in one vectorised pass with an IDF-weighted
+# cosine over title tokens; each product keeps its best match per other
+# store only if that choice is mutual, and the surviving pairs are joined
+# into match groups.
+
+MATCH_COLUMNS = ['match_id', 'store', 'brand', 'model', 'price', 'currency', 'product_url', 'score']
+
+DEFAULT_MATCHING = {
+    'min_score': 0.6,         # Cosine similarity a pair needs to count as the same product
+    'max_block_size': 200,    # Blocks with more products than this are skipped
+    'min_code_length': 4      # Shortest token treated as a model code
+}
+
+STOPWORDS = {
+    'and', 'with', 'for', 'the', 'new', 'laptop', 'notebook', 'pc', 'computer',
+    'inch', 'in', 'gen', 'generation', 'black', 'silver', 'grey', 'gray', 'white', 'blue'
+}
+
+# Capacities, clock speeds, sizes, ordinals: look like codes but are shared by many products
+SPEC_TOKEN = re.compile(r'^\d+(?:gb|tb|mb|mhz|ghz|hz|w|mah|mm|cm|kg|th|nd|rd|st|inch|in|k|p|fps|ms)$')
+WORD = re.compile(r'[a-z0-9]+')
+COMPOUND = re.compile(r'[a-z0-9]+(?:[-./][a-z0-9]+)+')
+DROP_SEPARATORS = str.maketrans('', '', '-./')
+
+# What stores write when a listing has no recognisable brand ('Other', BuyAbans' 'Unknown Brand', ...)
+NO_BRAND = {'', 'other', 'unknown', 'unknown brand', 'n/a', 'none', 'nan'}
+
+def normalise_title(title):
+    """Lowercases and ASCII-folds a title (full-width characters, accents, ...)."""
+    title = str(title)
+    if title.isascii():
+        return title.lower()
+    title = unicodedata.normalize('NFKC', title).lower()
+    return unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+
+def title_tokens(title):
+    """
+    Title tokens for scoring. Joined codes are kept whole and split, so
+    '15s-fq5111tu' yields '15sfq5111tu', '15s' and 'fq5111tu' and matches a
+    store that writes '15S FQ5111TU'.
+    """
+    title = normalise_title(title)
+    tokens = set(WORD.findall(title))
+    tokens.update(compound.translate(DROP_SEPARATORS) for compound in COMPOUND.findall(title))
+    return tokens - STOPWORDS
+
+def is_model_code(token, min_length):
+    return (
+        len(token) >= min_length
+        and any(c.isdigit() for c in token)
+        and (any(c.isalpha() for c in token) or len(token) >= 5)
+        and not SPEC_TOKEN.match(token)
+    )
+
+# --- Vectorised helpers ---
+
+def _pair_scores(pairs_a, pairs_b, token_offsets, token_ids, keys, token_weights, norms, token_count):
+    """
+    Cosine similarity for each (a, b) pair. Token lists are stored CSR-style
+    (token_ids[token_offsets[p]:token_offsets[p + 1]] are p's tokens) and
+    `keys` holds the sorted (product * token_count + token) values, so every
+    token of `a` is looked up in b's tokens by one searchsorted call rather
+    than a Python loop per pair.
+    """
+    lengths = token_offsets[pairs_a + 1] - token_offsets[pairs_a]
+    pair_index = np.repeat(np.arange(len(pairs_a)), lengths)
+    positions = np.repeat(token_offsets[pairs_a] - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+
+    wanted = np.repeat(pairs_b, lengths) * token_count + token_ids[positions]
+    found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    shared = keys[found] == wanted
+
+    weights = token_weights[token_ids[positions]]
+    dot = np.bincount(pair_index, weights=np.where(shared, weights * weights, 0.0), minlength=len(pairs_a))
+    return dot / (norms[pairs_a] * norms[pairs_b])
+
+def _components(pairs_a, pairs_b, count):
+    """
+    Connected components of the matched pairs by min-label propagation with
+    pointer jumping. Returns each product's group label (its smallest member).
+    """
+    labels = np.arange(count)
+    while True:
+        low = np.minimum(labels[pairs_a], labels[pairs_b])
+        updated = labels.copy()
+        np.minimum.at(updated, pairs_a, low)
+        np.minimum.at(updated, pairs_b, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+# --- Stage ---
+
+def match_products(frame, known_brands=None, settings=None):
+    """
+    Matches products across stores in a canonical frame (store, brand,
+    model, price, currency, product_url). Returns a match table with one
+    row per matched product: match_id, store, brand, model, price,
+    currency, product_url and score (its best pair similarity). Products
+    without a counterpart in another store are left out.
+    """
+    import pandas as pd
+
+    options = dict(DEFAULT_MATCHING)
+    options.update(settings or {})
+
+    products = frame.reset_index(drop=True)
+    count = len(products)
+    if count == 0 or products['store'].nunique() < 2:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+    # Stores recognise different brand lists; re-derive 'Other' from the shared list
+    brands = products['brand'].astype(object).fillna('Other').astype(str)
+    brands[brands.str.strip().str.lower().isin(NO_BRAND)] = 'Other'
+    if known_brands:
+        extract_brand = compile_brands(known_brands)
+        unknown = brands.eq('Other')
+        brands[unknown] = [extract_brand(model) for model in products.loc[unknown, 'model'].astype(str)]
+    brands = brands.str.lower()
+
+    # Token table in CSR form, tokens numbered
+    token_lists = [title_tokens(model) for model in products['model'].tolist()]
+    token_ids, vocabulary = pd.factorize(np.fromiter(chain.from_iterable(token_lists), dtype=object))
+    token_ids = token_ids.astype(np.int64)
+    token_offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum([len(tokens) for tokens in token_lists], out=token_offsets[1:])
+    # Sort ids within each product so (product, token) keys are globally sorted
+    product_of_token = np.repeat(np.arange(count), np.diff(token_offsets))
+    token_ids = token_ids[np.lexsort((token_ids, product_of_token))]
+    keys = product_of_token * len(vocabulary) + token_ids
+
+    document_frequency = np.bincount(token_ids, minlength=len(vocabulary))
+    token_weights = np.log((count + 1) / (document_frequency + 1)) + 1.0
+    norms = np.sqrt(np.bincount(product_of_token, weights=token_weights[token_ids] ** 2, minlength=count))
+    norms[norms == 0] = 1.0
+
+    # Blocks: model code -> products, split by brand below
+    is_code = np.fromiter(
+        (is_model_code(token, options['min_code_length']) for token in vocabulary), dtype=bool, count=len(vocabulary)
+    )
+    code_rows = is_code[token_ids]
+    blocks = pd.DataFrame({'product': product_of_token[code_rows], 'token': token_ids[code_rows]})
+    blocks['brand'] = brands.to_numpy()[blocks['product'].to_numpy()]
+    blocks['store'] = products['store'].astype(str).to_numpy()[blocks['product'].to_numpy()]
+    sizes = blocks.groupby('token')['product'].transform('size')
+    stores_per_block = blocks.groupby('token')['store'].transform('nunique')
+    blocks = blocks[(sizes <= options['max_block_size']) & (stores_per_block > 1)]
+
+    # Same code, different stores, compatible brands ('other' = title without a known brand)
+    candidates = blocks.merge(blocks, on='token')
+    candidates = candidates[
+        (candidates['product_x'] < candidates['product_y'])
+        & (candidates['store_x'] != candidates['store_y'])
+        & ((candidates['brand_x'] == candidates['brand_y'])
+           | (candidates['brand_x'] == 'other') | (candidates['brand_y'] == 'other'))
+    ]
+    pairs = candidates[['product_x', 'product_y', 'store_x', 'store_y']].drop_duplicates(['product_x', 'product_y'])
+    if pairs.empty:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+    a = pairs['product_x'].to_numpy()
+    b = pairs['product_y'].to_numpy()
+    scores = _pair_scores(a, b, token_offsets, token_ids, keys, token_weights, norms, len(vocabulary))
+    pairs = pairs.assign(score=scores)
+    pairs = pairs[pairs['score'] >= options['min_score']]
+
+    # Keep a pair only if each side is the other's best match in that store
+    both_ways = pd.concat([
+        pairs.rename(columns={'product_x': 'product', 'product_y': 'other', 'store_y': 'other_store'}),
+        pairs.rename(columns={'product_y': 'product', 'product_x': 'other', 'store_x': 'other_store'})
+    ], ignore_index=True)[['product', 'other', 'other_store', 'score']]
+    best = both_ways.sort_values('score', ascending=False).drop_duplicates(['product', 'other_store'])
+    best = best[['product', 'other']]
+    mutual = pairs.merge(best, left_on=['product_x', 'product_y'], right_on=['product', 'other']) \
+        .drop(columns=['product', 'other']) \
+        .merge(best, left_on=['product_y', 'product_x'], right_on=['product', 'other'])
+
+    best_score = pd.concat([
+        mutual[['product_x', 'score']].rename(columns={'product_x': 'product'}),
+        mutual[['product_y', 'score']].rename(columns={'product_y': 'product'})
+    ]).groupby('product')['score'].max()
+    matched = best_score.index.to_numpy()
+    labels = _components(mutual['product_x'].to_numpy(), mutual['product_y'].to_numpy(), count)
+
+    table = products.loc[matched, ['store', 'brand', 'model', 'price', 'currency', 'product_url']].copy()
+    table.insert(0, 'match_id', pd.factorize(labels[matched], sort=True)[0] + 1)
+    table['score'] = best_score.round(3).to_numpy()
+    return table.sort_values(['match_id', 'store']).reset_index(drop=True)
+
+def match_summary(table):
+    """One line describing a match table."""
+    if table.empty:
+        return "No products matched across stores."
+    groups = table['match_id'].nunique()
+    return (f"{len(table)} listings matched into {groups} products across "
+            f"{table['store'].nunique()} stores (avg {len(table) / groups:.1f} stores per product).")
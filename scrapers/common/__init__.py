@@ -0,0 +1,4 @@
+# Shared helpers used by the site scrapers
+
+from .concurrency import AIMDLimiter, DEFAULT_CONCURRENCY
+from .fetch import Fetcher
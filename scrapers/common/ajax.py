@@ -0,0 +1,75 @@
+import json
+
+import requests
+
+# --- CS-Cart AJAX Listing Fragments ---
+#
+# A CS-Cart category page is mostly storefront chrome: header, menus,
+# filters, footer, inline scripts. Asked the way its own "load more" and
+# pagination links ask (is_ajax=1, result_ids=<container id>), the store
+# answers with JSON holding only the re-rendered product grid, and
+# items_per_page lets one request cover several default-sized pages. With
+# "source": "ajax" in a site config, discovery probes this once on the
+# first category; if the answer isn't a usable fragment, the site keeps
+# requesting full pages.
+#
+# The mode travels on each category dict ('ajax': True), so page tasks run
+# by distributed workers build the same URLs.
+
+AJAX_HEADERS = {
+    'X-Requested-With': 'XMLHttpRequest',
+    'Accept': 'application/json, text/javascript, */*; q=0.01'
+}
+
+# Page 1 bodies read by the discovery probe, handed to fetch_task in the same process
+_FIRST_PAGES = {}
+
+def ajax_params(settings):
+    return {
+        'items_per_page': settings['items_per_page'],
+        'is_ajax': 1,
+        'result_ids': settings['result_ids']
+    }
+
+def fragment_from(response, settings):
+    """The product grid HTML from an AJAX listing response, or None if it isn't one."""
+    if response.status_code != 200:
+        return None
+    try:
+        data = json.loads(response.content)
+    except ValueError:
+        return None
+    fragment = data.get('html', {}).get(settings['result_ids']) if isinstance(data, dict) else None
+    return fragment.encode('utf-8') if isinstance(fragment, str) else None
+
+def probe_fragments(fetcher, url, settings, has_products):
+    """
+    Requests `url` (page 1 of a category) as an AJAX fragment. Returns True
+    and keeps the fragment for fetch_task when the store answers with one
+    that `has_products`.
+    """
+    try:
+        response = fetcher.get(url, params=ajax_params(settings), headers=AJAX_HEADERS)
+    except requests.exceptions.RequestException as e:
+        print(f"  AJAX listing probe failed ({e}). Using full pages.")
+        return False
+    fragment = fragment_from(response, settings)
+    if fragment is None or not has_products(fragment):
+        print("  Store doesn't serve AJAX listing fragments. Using full pages.")
+        return False
+    _FIRST_PAGES[url] = fragment
+    print(f"  Using AJAX listing fragments, {settings['items_per_page']} products per request "
+          f"({len(fragment) // 1024} KiB for page 1 of the first category).")
+    return True
+
+def fetch_fragment(fetcher, url, settings):
+    """
+    One listing page as a fragment. Returns (fragment bytes, response); the
+    fragment is None when the response isn't one (the caller checks the
+    response for the usual end-of-category signs).
+    """
+    cached = _FIRST_PAGES.pop(url, None)
+    if cached is not None:
+        return cached, None
+    response = fetcher.get(url, params=ajax_params(settings), headers=AJAX_HEADERS)
+    return fragment_from(response, settings), response
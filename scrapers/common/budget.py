@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import requests
+
+from .records import store_name
+
+# --- Time Budgets ---
+#
+# A scrape has a fixed window. A run budget (--budget on the CLI) and an
+# optional per-site budget ("budget": {"seconds": ...} in a site config)
+# become one Deadline per crawl, held by the site's Fetcher: every request
+# gets at most the time that is left as its timeout, and none starts once
+# the deadline has passed. The crawl loop then stops scheduling pages,
+# cancels the ones not yet started and saves what it has.
+#
+# Within a budget, categories are crawled most valuable first: those named
+# in "priority" (name or URL fragments, most important first), then those
+# whose products changed most often in previous runs, then the rest in
+# discovery order.
+
+DEFAULT_BUDGET = {
+    'seconds': None,              # Per-site limit; None leaves only the run budget
+    'priority': [],               # Category name/URL fragments to crawl first
+    'history': True,              # Then prefer categories that changed often before
+    'state_dir': '.cache/budgets'
+}
+
+CHANGE_RATE_WEIGHT = 0.3          # Weight of the latest run in a category's change rate
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of starting a request after the crawl's deadline."""
+
+
+class Deadline:
+    """A point in (monotonic) time, or no limit at all when `at` is None."""
+
+    def __init__(self, at=None):
+        self.at = at
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(None if seconds is None else time.monotonic() + seconds)
+
+    def remaining(self):
+        """Seconds left (never negative), or None without a limit."""
+        return None if self.at is None else max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.at is not None and time.monotonic() >= self.at
+
+    def earliest(self, other):
+        if self.at is None or (other.at is not None and other.at < self.at):
+            return other
+        return self
+
+    def timeout(self, timeout):
+        """A request timeout that ends by the deadline. Raises DeadlineExceeded once it has passed."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded("time budget exhausted")
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+_RUN_DEADLINE = Deadline()
+
+def start_run_budget(seconds):
+    """Starts the run-level budget shared by every crawl in this process."""
+    global _RUN_DEADLINE
+    _RUN_DEADLINE = Deadline.after(seconds)
+
+def run_deadline():
+    return _RUN_DEADLINE
+
+def budget_settings(config):
+    settings = dict(DEFAULT_BUDGET)
+    settings.update(config.get('budget', {}))
+    return settings
+
+def site_deadline(config):
+    """The run deadline, or the site's own budget from now if that ends first."""
+    return run_deadline().earliest(Deadline.after(budget_settings(config)['seconds']))
+
+# --- Category Priority ---
+
+def state_path(config, settings):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', store_name(config)).strip('_')
+    return os.path.join(settings['state_dir'], f"{slug}.json")
+
+def load_change_rates(config, settings):
+    try:
+        with open(state_path(config, settings), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class CategoryPriority:
+    """
+    Ranks a site's categories for scheduling: lower ranks are crawled first.
+    Categories are identified by their readable name (crawl.category_name).
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.settings = budget_settings(config)
+        self.patterns = [pattern.lower() for pattern in self.settings['priority']]
+        self.history = load_change_rates(config, self.settings) if self.settings['history'] else {}
+
+    def rank(self, name, url=None):
+        text = f"{name} {url or ''}".lower()
+        listed = next((i for i, pattern in enumerate(self.patterns) if pattern in text), len(self.patterns))
+        return listed, -self.history.get(name, {}).get('rate', 0.0)
+
+    def record(self, rows_by_category):
+        """
+        Updates each category's change rate from this run's rows
+        ({name: [Product, ...]} for the categories crawled to the end).
+        """
+        if not self.settings['history'] or not rows_by_category:
+            return
+        for name, rows in rows_by_category.items():
+            digest = hashlib.sha1(repr(sorted((row.product_url or '', str(row.price)) for row in rows))
+                                  .encode('utf-8')).hexdigest()
+            entry = self.history.get(name)
+            if entry is None:
+                self.history[name] = {'digest': digest, 'rate': 0.0}
+                continue
+            changed = 1.0 if entry['digest'] != digest else 0.0
+            entry['rate'] = round((1 - CHANGE_RATE_WEIGHT) * entry['rate'] + CHANGE_RATE_WEIGHT * changed, 4)
+            entry['digest'] = digest
+
+        path = state_path(self.config, self.settings)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.history, f)
+        os.replace(temporary, path)
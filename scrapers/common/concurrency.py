@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import deque
+
+# --- Adaptive Concurrency (AIMD) ---
+
+# Defaults every site starts from. A site config may override any of these
+# under a 'concurrency' key, but none of the shipped sites need to.
+DEFAULT_CONCURRENCY = {
+    'initial_limit': 2,        # In-flight requests allowed before any feedback
+    'min_limit': 1,
+    'max_limit': 32,
+    'target_p95': 2.5,         # Seconds; grow only while p95 latency stays below this
+    'max_error_rate': 0.05,    # Grow only while the recent error rate stays below this
+    'spike_factor': 3.0,       # A single response slower than target_p95 * spike_factor is a spike
+    'backoff': 0.5,            # Multiplicative decrease applied on 429/5xx/spikes
+    'window': 50               # Number of recent responses used for p95 / error rate
+}
+
+
+def percentile(samples, fraction):
+    """Returns the given percentile (0-1) of a list of numbers, or 0.0 if empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class AIMDLimiter:
+    """
+    Per-host concurrency limit that behaves like TCP congestion control:
+    the limit grows by roughly one request per round of responses while
+    latency and errors are within target, and is cut multiplicatively on
+    429/5xx responses, network errors or latency spikes.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = dict(DEFAULT_CONCURRENCY)
+        if settings:
+            self.settings.update(settings)
+
+        self.limit = float(self.settings['initial_limit'])
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.decreases = 0
+
+        self._cond = threading.Condition()
+        self._latencies = deque(maxlen=self.settings['window'])
+        self._outcomes = deque(maxlen=self.settings['window'])
+        self._last_decrease = 0.0
+
+    def acquire(self):
+        """Blocks until a slot is free under the current limit. Returns the start time."""
+        with self._cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def acquire_now(self):
+        """Takes a slot without waiting, even past the limit; later acquire() calls wait for it."""
+        with self._cond:
+            self.in_flight += 1
+
+    def cancel(self):
+        """Gives back a slot taken by acquire() for a request that was never sent."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def release(self, started, error=False, throttled=False):
+        """Records the outcome of a request started at `started` and adjusts the limit."""
+        now = time.monotonic()
+        latency = now - started
+        s = self.settings
+
+        with self._cond:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += 1 if error else 0
+            self.throttled += 1 if throttled else 0
+            self._latencies.append(latency)
+            self._outcomes.append(error or throttled)
+
+            spike = latency > s['target_p95'] * s['spike_factor']
+
+            if error or throttled or spike:
+                # Only cut once per round trip: responses to requests that were
+                # already in flight when we last backed off carry stale news.
+                if started >= self._last_decrease:
+                    self.limit = max(s['min_limit'], self.limit * s['backoff'])
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif (percentile(self._latencies, 0.95) <= s['target_p95']
+                    and self.error_rate() <= s['max_error_rate']):
+                # Additive increase: +1 per `limit` successful responses
+                self.limit = min(s['max_limit'], self.limit + 1.0 / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+
+            self._cond.notify_all()
+
+    def error_rate(self):
+        """Fraction of failed/throttled responses in the recent window."""
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for failed in self._outcomes if failed) / len(self._outcomes)
+
+    def snapshot(self):
+        """Returns a dict of the limiter's current state for metrics/reporting."""
+        with self._cond:
+            latencies = list(self._latencies)
+            return {
+                'limit': int(self.limit),
+                'peak_limit': int(self.peak_limit),
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'errors': self.errors,
+                'throttled': self.throttled,
+                'decreases': self.decreases,
+                'error_rate': round(self.error_rate(), 3),
+                'p50': round(percentile(latencies, 0.50), 3),
+                'p95': round(percentile(latencies, 0.95), 3)
+            }
@@ -0,0 +1,359 @@
+import heapq
+import itertools
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .budget import CategoryPriority, site_deadline
+from .events import WARNING, emit
+from .fetch import Fetcher
+from .parsepool import ParsePool
+from .plancache import CrawlPlan, category_key
+from .records import ProductBatch, store_name
+from .stream import STREAMING_AVAILABLE
+from .urls import SeenSet, first_by_url
+
+# --- Page Task Protocol ---
+#
+# Every scraper module exposes the same four functions, so the same page
+# logic can run in-process (crawl below) or on distributed workers:
+#
+#   setup_session()                                  -> requests.Session
+#   discover_tasks(config, fetcher)                  -> [(category, page), ...]
+#   fetch_task(config, fetcher, category, page)      -> raw body bytes, or None past the end
+#   parse_task(config, content, category, page)      -> ([Product, ...], follow_up_pages)
+#   plan_pages(config, fetcher, category, content)   -> (optional) pages 2..last from page 1, or None
+#   finish_crawl(config, rows, unfinished)           -> (optional) final rows, e.g. plus carried-forward ones;
+#                                                       `unfinished` lists categories a deadline or a
+#                                                       permanently failed page cut short
+#   stream_task(config, fetcher, category, page)     -> (optional) fetch + parse in one pass, parsing the
+#                                                       body as it downloads; (rows, follow_ups) or None
+#   COLUMNS (optional)                               -> output layout, see records.DEFAULT_COLUMNS
+#
+# `category` is whatever the site needs to build a page URL (a category id,
+# a {'name', 'url'} dict, or None) and must be JSON-serialisable.
+
+# Failed page tasks go to a dead-letter queue and are tried again after the
+# crawl, with a fresh session, after `delay` seconds ("retry_pass" in a site config)
+DEFAULT_RETRY_PASS = {
+    'passes': 1,
+    'delay': 5.0
+}
+
+def site_module(scraper):
+    """Returns the module implementing the task protocol for a SUPPORTED_SITES scraper function."""
+    return sys.modules[scraper.__module__]
+
+def output_columns(config, site):
+    """The site's output layout: engine 'columns' setting, module COLUMNS, or the default."""
+    return config.get('extraction', {}).get('columns') or getattr(site, 'COLUMNS', None)
+
+def fetch_page(site, config, fetcher, category, page):
+    """
+    Fetches one page task. Returns (content, planned_pages): for page 1 of
+    a site with a pagination planner, planned_pages is the rest of the
+    category, known before the page is even parsed.
+    """
+    content = site.fetch_task(config, fetcher, category, page)
+    if content is None or page != 1 or not hasattr(site, 'plan_pages'):
+        return content, []
+    try:
+        planned = site.plan_pages(config, fetcher, category, content)
+    except Exception as e:
+        # Planning is an optimisation; the category can still be walked page by page
+        emit('plan_failed', WARNING, store=store_name(config), category=category_name(category), error=str(e))
+        planned = None
+    return content, planned or []
+
+def streams(site, config, page):
+    """
+    Whether a page task is parsed while it downloads: the site sets
+    "streaming": True, implements stream_task and lxml is installed. Page 1
+    of a site with a pagination planner is still read whole for the planner.
+    """
+    return (config.get('streaming', False) and STREAMING_AVAILABLE and hasattr(site, 'stream_task')
+            and (page != 1 or not hasattr(site, 'plan_pages')))
+
+def run_page_task(site, config, fetcher, category, page):
+    """Fetches and parses one page task. Returns (rows, follow_up_pages)."""
+    if streams(site, config, page):
+        result = site.stream_task(config, fetcher, category, page)
+        return result if result is not None else ([], [])
+    content, planned = fetch_page(site, config, fetcher, category, page)
+    if content is None:
+        return [], []
+    rows, follow_ups = site.parse_task(config, content, category, page)
+    return rows, planned + [next_page for next_page in follow_ups if next_page not in planned]
+
+def crawl(config, site):
+    """
+    Runs a site's page tasks in-process. Discovery happens first; after that
+    every known page task is in flight at once (subject to the per-host AIMD
+    limit) and follow-up pages are scheduled as soon as the page revealing
+    them has been parsed, or, for sites with a pagination planner, as soon as
+    page 1 has been fetched. Returns a ProductBatch in category/page order.
+
+    Fetching happens on I/O threads and parsing on a pool of worker
+    processes ('parse_processes' in the site config; 0 parses inline on the
+    fetch threads). Streamed pages ("streaming": True) are parsed on the
+    fetch threads while they download.
+
+    Pages wait in a queue ordered by category priority (see budget.py), and
+    only enough of them to keep the fetch threads busy are in flight. When
+    the run or site deadline passes, queued and unstarted pages are dropped
+    and the products found so far are returned.
+
+    With "plan_cache", pages up to each category's last known page are
+    scheduled along with page 1 (see plancache.py).
+
+    A page that fails goes to a dead-letter queue and the crawl moves on
+    (to the next page too, when pages are numbered). Dead-lettered pages get
+    a retry pass at the end on fresh connections; those that fail again are
+    listed in the report.
+    """
+    deadline = site_deadline(config)
+    fetcher = Fetcher(site.setup_session(), config, deadline)
+    label = store_name(config)
+    print(f"\n[{label}] Starting scrape for {config['country']}...")
+    emit('crawl_started', store=label, country=config['country'])
+
+    try:
+        tasks = site.discover_tasks(config, fetcher)
+    except Exception as e:
+        if not deadline.expired:
+            raise
+        emit('deadline_reached', WARNING, store=label, during='discovery', error=str(e))
+        tasks = []
+    if not tasks:
+        # An incremental run may have nothing to fetch but still carries its products forward
+        rows = unique_rows(config, site, [])
+        if not rows:
+            print("No categories found. Exiting.")
+        fetcher.close()
+        return ProductBatch(config, rows, output_columns(config, site))
+
+    processes = config.get('parse_processes')
+    parse_pool = ParsePool(processes) if processes != 0 else None
+
+    category_order = {}
+    for category, _ in tasks:
+        category_order.setdefault(repr(category), len(category_order))
+
+    priority = CategoryPriority(config)
+    category_rank = {}
+    for category, _ in tasks:
+        url = category.get('url') if isinstance(category, dict) else None
+        category_rank.setdefault(repr(category), priority.rank(category_name(category), url))
+
+    rows_by_page = {}
+    fetching = {}
+    parsing = {}
+    on_fetch_pool = set()
+    scheduled = set()
+    queued = []
+    sequence = itertools.count()
+    # Enough to keep every fetch thread busy while finished pages are handled
+    max_in_flight = fetcher.settings['max_limit'] * 2
+    unfinished = {}
+    dead_letters = {}
+    skipped_to = set()
+    stopped = False
+
+    def fetch_only(category, page):
+        parse_pool.reserve()
+        try:
+            content, planned = fetch_page(site, config, fetcher, category, page)
+        except Exception:
+            parse_pool.release()
+            raise
+        if content is None:
+            parse_pool.release()
+        return content, planned
+
+    def schedule(category, page):
+        # Planned ranges and next-page links name the same pages; fetch each once
+        key = (repr(category), page)
+        if key in scheduled:
+            return
+        scheduled.add(key)
+        if stopped:
+            unfinished.setdefault(repr(category), category)
+            return
+        # Most valuable category first; within one, pages in the order they were found
+        rank = category_rank.get(repr(category), (0, 0.0))
+        heapq.heappush(queued, (rank, next(sequence), category, page))
+
+    def submit_queued():
+        while queued and len(on_fetch_pool) < max_in_flight:
+            _, _, category, page = heapq.heappop(queued)
+            if parse_pool is None or streams(site, config, page):
+                future = fetcher.submit(run_page_task, site, config, fetcher, category, page)
+                parsing[future] = (category, page)
+            else:
+                future = fetcher.submit(fetch_only, category, page)
+                fetching[future] = (category, page)
+            on_fetch_pool.add(future)
+
+    def stop_at_deadline():
+        # Queued pages are dropped; pages not yet started are cancelled, the rest end by the deadline
+        nonlocal stopped
+        stopped = True
+        emit('deadline_reached', WARNING, store=label, queued=len(queued),
+             in_flight=len(on_fetch_pool))
+        for _, _, category, _ in queued:
+            unfinished.setdefault(repr(category), category)
+        queued.clear()
+        for future in list(on_fetch_pool):
+            if future.cancel():
+                category, _ = fetching.pop(future, None) or parsing.pop(future)
+                on_fetch_pool.discard(future)
+                unfinished.setdefault(repr(category), category)
+
+    def page_failed(category, page, error):
+        emit('page_failed', WARNING, store=label, category=category_name(category), page=page, error=str(error))
+        dead_letters[(repr(category), page)] = (category, page, str(error))
+        if deadline.expired:
+            unfinished.setdefault(repr(category), category)
+        elif isinstance(page, int) and (repr(category), page) not in skipped_to:
+            # The failed page can't name its follow-ups; walk on past it, but
+            # not past a page that was itself a guess
+            skipped_to.add((repr(category), page + 1))
+            schedule(category, page + 1)
+
+    def drain():
+        while fetching or parsing:
+            handle(wait(list(fetching) + list(parsing), timeout=None if stopped else deadline.remaining(),
+                        return_when=FIRST_COMPLETED)[0])
+            submit_queued()
+
+    def handle(done):
+        if not stopped and deadline.expired:
+            stop_at_deadline()
+        for future in done:
+            on_fetch_pool.discard(future)
+            if future in fetching:
+                category, page = fetching.pop(future)
+                try:
+                    content, planned = future.result()
+                except Exception as e:
+                    page_failed(category, page, e)
+                    continue
+                for next_page in planned:
+                    schedule(category, next_page)
+                if content is None:
+                    # Past the end (404, redirect): recorded as an empty page, as run_page_task does
+                    page_done(category, page, [], [])
+                else:
+                    parsing[parse_pool.submit(site, config, content, category, page)] = (category, page)
+                continue
+
+            category, page = parsing.pop(future)
+            try:
+                rows, follow_ups = future.result()
+            except Exception as e:
+                page_failed(category, page, e)
+                continue
+            page_done(category, page, rows, follow_ups)
+
+    def page_done(category, page, rows, follow_ups):
+        rows_by_page[(category_order[repr(category)], page)] = rows
+        emit('page_parsed', store=label, category=category_name(category), page=page,
+             products=len(rows), follow_ups=len(follow_ups))
+        for next_page in follow_ups:
+            schedule(category, next_page)
+
+    plan = CrawlPlan(config)
+    cached_pages = 0
+    for category, page in tasks:
+        schedule(category, page)
+        if page == 1:
+            known = plan.known_pages(category)
+            cached_pages += len(known)
+            for next_page in known:
+                schedule(category, next_page)
+    if cached_pages:
+        emit('pages_planned', store=label, pages=cached_pages, source='plan cache')
+    submit_queued()
+    drain()
+
+    fetchers = [fetcher]
+    retry = dict(DEFAULT_RETRY_PASS)
+    retry.update(config.get('retry_pass', {}))
+    for _ in range(retry['passes']):
+        if not dead_letters or stopped or deadline.expired:
+            break
+        failed, dead_letters = list(dead_letters.values()), {}
+        emit('retry_pass', store=label, pages=len(failed))
+        remaining = deadline.remaining()
+        time.sleep(retry['delay'] if remaining is None else min(retry['delay'], remaining))
+        # Closures pick up the new fetcher, so follow-ups of recovered pages use it too
+        fetcher = Fetcher(site.setup_session(), config, deadline)
+        fetchers.append(fetcher)
+        for category, page, _ in failed:
+            scheduled.discard((repr(category), page))
+            schedule(category, page)
+        submit_queued()
+        drain()
+
+    # WARNING events print above the progress line instead of garbling it
+    for category, page, error in dead_letters.values():
+        emit('page_dead_lettered', WARNING, store=label, category=category_name(category), page=page, error=error)
+        unfinished.setdefault(repr(category), category)
+
+    rows = [row for key in sorted(rows_by_page) for row in rows_by_page[key]]
+    emit('crawl_done', store=label, pages=len(rows_by_page), products=len(rows))
+    priority.record(complete_categories(tasks, category_order, rows_by_page, set(unfinished)))
+    drifted = plan.record(category_pages(tasks, category_order, rows_by_page, set(unfinished)))
+    if drifted:
+        print(f"  Crawl-plan cache: page counts of {drifted} categories changed and were updated.")
+    all_products_data = ProductBatch(config, unique_rows(config, site, rows, list(unfinished.values())),
+                                     output_columns(config, site), partial=stopped or bool(unfinished))
+
+    if parse_pool is not None:
+        parse_pool.close()
+    for used in fetchers:
+        used.report()
+        used.close()
+
+    print(f"\n[{label}] Scraping finished. Found {len(all_products_data)} products.")
+    return all_products_data
+
+def complete_categories(tasks, category_order, rows_by_page, incomplete):
+    """{category name: rows} for the categories crawled without failed or skipped pages."""
+    names = {category_order[repr(category)]: category_name(category)
+             for category, _ in tasks if repr(category) not in incomplete}
+    complete = {name: [] for name in names.values()}
+    for (index, _), page_rows in rows_by_page.items():
+        if index in names:
+            complete[names[index]].extend(page_rows)
+    return complete
+
+def category_pages(tasks, category_order, rows_by_page, incomplete):
+    """{category key: (category, {page: rows})} for the categories crawled to the end."""
+    categories = {category_order[repr(category)]: category
+                  for category, _ in tasks if repr(category) not in incomplete}
+    pages = {category_key(category): (category, {}) for category in categories.values()}
+    for (index, page), page_rows in rows_by_page.items():
+        if index in categories:
+            pages[category_key(categories[index])][1][page] = page_rows
+    return pages
+
+def unique_rows(config, site, rows, unfinished=()):
+    """
+    Applies the site's finish_crawl step, then keeps a product listed under
+    several categories once, in its first category. `unfinished` lists the
+    categories a deadline or a permanently failed page cut short.
+    """
+    if hasattr(site, 'finish_crawl'):
+        rows = site.finish_crawl(config, rows, unfinished)
+    seen = SeenSet(config.get('seen'), config['base_url'])
+    unique = list(first_by_url(rows, seen))
+    if len(rows) > len(unique):
+        print(f"  Dropped {len(rows) - len(unique)} repeated listings of the same product URL.")
+    return unique
+
+def category_name(category):
+    """Human-readable name for a task's category value."""
+    if isinstance(category, dict):
+        return category.get('name', category.get('url'))
+    return 'all products' if category is None else f"category {category}"
@@ -0,0 +1,603 @@
+import re
+import sys
+
+import requests
+import soupsieve
+from bs4 import BeautifulSoup, NavigableString
+from bs4.element import Script, Stylesheet
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+from .ajax import fetch_fragment, probe_fragments
+from .concurrency import DEFAULT_CONCURRENCY
+from .crawl import crawl
+from .events import DEBUG, WARNING, emit
+from .pagination import keep_probed, max_linked_page, page_link_pattern, probe_last_page, take_probed
+from .plancache import CrawlPlan
+from .records import Product, store_name
+from .sitemap import discover_changed, merge_unchanged
+from .storeapi import discover_api_pages, fetch_api_page, is_api_category, parse_api_page
+from .stream import STREAM_CHUNK_BYTES, STREAMING_AVAILABLE, ListingStream, compile_matcher
+from .urls import SeenSet
+
+# --- Declarative Extraction Engine ---
+#
+# CS-Cart and WooCommerce storefronts share their markup across shops, so the
+# listing loop for each platform lives here once. A site entry in
+# config/sites.py only names its platform and overrides the selectors that
+# differ from the platform defaults (usually because of a custom theme).
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+DEFAULT_BRANDS = [
+    'HP', 'Lenovo', 'Asus', 'Acer', 'Dell', 'MSI', 'Apple',
+    'Samsung', 'LG', 'JVC', 'Haier', 'Toshiba', 'Electrolux',
+    'Whirlpool', 'Oppo', 'Xiaomi', 'JBL', 'Titan', 'Miniso',
+    'Logitech', 'Fantech', 'Razer', 'Corsair', 'HyperX', 'SteelSeries',
+    'Gigabyte', 'Zotac', 'Palit', 'Galax', 'PNY', 'Intel', 'AMD',
+    'Kingston', 'Transcend', 'Adata', 'Western Digital', 'Seagate',
+    'Hikvision', 'Dahua', 'Ezviz', 'Imou', 'Tp-Link', 'D-Link',
+    'Ubiquiti', 'Mikrotik', 'Cisco', 'Epson', 'Canon', 'Brother',
+    'Pantum', 'Ricoh', 'Kyocera', 'Konica Minolta', 'Sharp',
+    'Huawei', 'Sony', 'Microsoft', 'Google', 'OnePlus', 'Nokia'
+]
+
+# A field is a selector (text), a (selector, attribute) pair, a
+# (selector, (attribute, fallback_attribute, ...)) pair, or a list of any of
+# these tried in order until one matches.
+#
+# pagination['plan'] picks how the last page is found up front (see
+# pagination.py): 'widget', 'probe', or None to walk `next` links only.
+# 'sitemap' is used when a site sets "discovery": "sitemap" (see sitemap.py):
+# where the sitemaps are, which child sitemaps to follow, regexes telling
+# category and product URLs apart, and whether categories come from the
+# sitemap or the usual menu.
+# 'api' is used when a site sets "source": "api" (see storeapi.py): the
+# JSON endpoints to try in order and how many products to ask for per page.
+# 'ajax' is used when a site sets "source": "ajax" (see ajax.py): the page
+# size to ask for and the id of the element holding the product grid.
+PLATFORMS = {
+    'cscart': {
+        'categories': {
+            'link': 'a.ty-menu__submenu-link',
+            'name': None,
+            'name_own_text': False
+        },
+        'product': 'div.ut2-gl__content',
+        'fields': {
+            'name': 'a.product-title',
+            'url': ('a.product-title', 'href'),
+            'price': 'span.ty-price',
+            'image': ('img', ('data-src', 'src'))
+        },
+        'price': 'decimal',
+        'pagination': {
+            'style': 'query',
+            'param': 'page',
+            'bare_first_page': True,
+            'widget': None,
+            'next': 'a[class*="next"]',
+            'blind_max_pages': 50,
+            'plan': None
+        },
+        'sitemap': {
+            'url': 'sitemap.xml',
+            'follow': None,
+            'category': r'/$',
+            'product': r'\.html$',
+            'categories': 'menu'
+        },
+        'api': None,
+        'ajax': {
+            'items_per_page': 96,
+            'result_ids': 'pagination_contents'
+        }
+    },
+    'woocommerce': {
+        'categories': None,
+        'product': 'li.product',
+        'fields': {
+            'name': '.woocommerce-loop-product__title',
+            'url': ('a.woocommerce-LoopProduct-link', 'href'),
+            'price': ['span.price ins', 'span.price'],
+            'image': ('img', ('data-src', 'src'))
+        },
+        'price': 'decimal',
+        'pagination': {
+            'style': 'path',
+            'bare_first_page': True,
+            'widget': None,
+            'next': 'a.next.page-numbers',
+            'blind_max_pages': 50,
+            'plan': 'widget'
+        },
+        'sitemap': {
+            'url': ['sitemap_index.xml', 'wp-sitemap.xml'],
+            'follow': r'product',
+            'category': r'/product-category/',
+            'product': r'/product/',
+            'categories': 'sitemap'
+        },
+        'api': {
+            'url': ['/wp-json/wc/store/v1/products', '/wp-json/wc/store/products',
+                    '/?rest_route=/wc/store/v1/products'],
+            'per_page': 100
+        },
+        'ajax': None
+    }
+}
+
+# --- Compilation (once per run) ---
+
+def compile_field(field):
+    """Turns a field spec into a list of (compiled selector, attributes) candidates."""
+    candidates = field if isinstance(field, list) else [field]
+    compiled = []
+    for candidate in candidates:
+        if isinstance(candidate, tuple):
+            selector, attrs = candidate
+            if isinstance(attrs, str):
+                attrs = (attrs,)
+        else:
+            selector, attrs = candidate, None
+        compiled.append((soupsieve.compile(selector), attrs))
+    return compiled
+
+def compile_brands(brands):
+    """Pre-lowercases the brand list once so the per-product match is a plain scan."""
+    lowered = [(brand.lower(), brand) for brand in brands]
+
+    def extract_brand(product_name):
+        name_lower = product_name.lower()
+        for needle, brand in lowered:
+            if needle in name_lower:
+                return brand
+        return 'Other'
+
+    return extract_brand
+
+def merge_spec(config):
+    """Merges the site's 'extraction' overrides onto its platform defaults."""
+    platform = config.get('platform')
+    if platform not in PLATFORMS:
+        raise ValueError(f"Unknown platform '{platform}'. Expected one of: {', '.join(PLATFORMS)}")
+
+    spec = {key: (dict(value) if isinstance(value, dict) else value)
+            for key, value in PLATFORMS[platform].items()}
+    for key, value in config.get('extraction', {}).items():
+        if isinstance(value, dict) and isinstance(spec.get(key), dict):
+            spec[key].update(value)
+        else:
+            spec[key] = value
+    return spec
+
+class CompiledSpec:
+    """A site's extraction spec with every selector compiled ahead of the page loop."""
+
+    def __init__(self, config, extract_brand=None):
+        spec = merge_spec(config)
+        self.platform = config['platform']
+        self.store = store_name(config)
+        self.product = soupsieve.compile(spec['product'])
+        self.fields = {name: compile_field(field) for name, field in spec['fields'].items()}
+        self.whole_price = spec['price'] == 'whole'
+
+        pagination = spec['pagination']
+        self.pagination = pagination
+        self.next = soupsieve.compile(pagination['next']) if pagination.get('next') else None
+        self.widget = soupsieve.compile(pagination['widget']) if pagination.get('widget') else None
+        self.sitemap = spec['sitemap']
+        self.api = spec.get('api')
+        self.ajax = spec.get('ajax')
+        self.stream = stream_matchers(spec) if STREAMING_AVAILABLE else None
+
+        categories = spec.get('categories')
+        self.categories = None
+        if categories:
+            self.categories = {
+                'link': soupsieve.compile(categories['link']),
+                'name': soupsieve.compile(categories['name']) if categories.get('name') else None,
+                'name_own_text': categories.get('name_own_text', False)
+            }
+
+        self.extract_brand = extract_brand or compile_brands(config.get('brands', DEFAULT_BRANDS))
+        self.min_price = config['min_price']
+        self.max_price = config['max_price']
+
+# --- Hot Path ---
+
+DECIMAL_RE = re.compile(r'[^\d.]')
+DIGITS_RE = re.compile(r'[^\d]')
+
+def clean_price(text, whole):
+    """'Rs. 12,500.00' -> 12500.0 (decimal) or 12500 (whole). None if unparseable."""
+    if text is None:
+        return None
+    try:
+        if whole:
+            return int(DIGITS_RE.sub('', text.split('.')[0]))
+        # Strip dots left over from currency prefixes such as 'Rs.'
+        return float(DECIMAL_RE.sub('', text).strip('.'))
+    except ValueError:
+        return None
+
+def read_field(element, candidates):
+    """Returns the first matching candidate's attribute or whitespace-collapsed text."""
+    for selector, attrs in candidates:
+        match = selector.select_one(element)
+        if match is None:
+            continue
+        if attrs is None:
+            return " ".join(match.get_text().split())
+        for attr in attrs:
+            value = match.get(attr)
+            if value:
+                return value
+    return None
+
+def extract_product(container, spec, category_name):
+    """Builds the Product for one container, or None when it has no name or an out-of-range price."""
+    fields = spec.fields
+    try:
+        name = read_field(container, fields['name'])
+        if not name:
+            return None
+
+        price = clean_price(read_field(container, fields['price']), spec.whole_price)
+        if price is None or not (spec.min_price <= price <= spec.max_price):
+            return None
+
+        url_field = fields.get('url')
+        image_field = fields.get('image')
+        return Product(
+            category_name,
+            spec.extract_brand(name),
+            name,
+            price,
+            read_field(container, url_field) if url_field else None,
+            (read_field(container, image_field) if image_field else None) or 'N/A'
+        )
+    except Exception as e:
+        emit('product_error', WARNING, store=spec.store, category=category_name, error=str(e))
+        return None
+
+def extract_products(soup, spec, category_name):
+    """Extracts Products from a parsed listing page. Returns (rows, containers_found)."""
+    rows = []
+    containers = spec.product.select(soup)
+    for container in containers:
+        product = extract_product(container, spec, category_name)
+        if product is not None:
+            rows.append(product)
+    return rows, len(containers)
+
+def has_next_page(soup, spec, page):
+    """Applies the platform's pagination rule to a parsed listing page."""
+    scope = soup
+    if spec.widget is not None:
+        scope = spec.widget.select_one(soup)
+        if scope is None:
+            # No pagination widget at all: keep walking blindly up to a cap
+            return page < spec.pagination['blind_max_pages']
+    return spec.next is not None and spec.next.select_one(scope) is not None
+
+def parse_listing(content, spec, category_name, page):
+    """Parses one listing page. Returns (rows, containers_found, has_next)."""
+    soup = BeautifulSoup(content, PARSER)
+    rows, found = extract_products(soup, spec, category_name)
+    return rows, found, found > 0 and has_next_page(soup, spec, page)
+
+# --- Streaming Hot Path ---
+
+def stream_matchers(spec):
+    """(container, next, widget) tag matchers for streaming, or None if a selector can't be streamed."""
+    pagination = spec['pagination']
+    container = compile_matcher(spec['product'])
+    next_link = compile_matcher(pagination.get('next'))
+    widget = compile_matcher(pagination.get('widget'))
+    if container is None or (pagination.get('next') and next_link is None) \
+            or (pagination.get('widget') and widget is None):
+        return None
+    return container, next_link, widget
+
+def response_encoding(response):
+    """The charset named in the Content-Type header, or None to go by the page itself."""
+    content_type = response.headers.get('content-type', '')
+    match = re.search(r'charset=["\']?([\w.:-]+)', content_type, re.I)
+    return match.group(1) if match else None
+
+SPECIAL_STRINGS = {'script': Script, 'style': Stylesheet}
+
+def soup_element(element, soup):
+    """
+    Copies an lxml element into a BeautifulSoup Tag created by `soup`, so the
+    spec's soupsieve selectors run on it unchanged. (Re-serialising it for
+    BeautifulSoup instead would percent-encode non-ASCII URLs.)
+    """
+    tag = soup.new_tag(element.tag, attrs=dict(element.attrib))
+    if element.text:
+        # Script and style text stays out of get_text(), as in a parsed soup
+        tag.append(SPECIAL_STRINGS.get(element.tag, NavigableString)(element.text))
+    for child in element:
+        if isinstance(child.tag, str):
+            tag.append(soup_element(child, soup))
+        if child.tail:
+            tag.append(NavigableString(child.tail))
+    return tag
+
+def stream_listing(response, spec, category_name, page):
+    """
+    Parses a listing page while its body downloads. Returns the same
+    (rows, containers_found, has_next) as parse_listing.
+    """
+    rows = []
+    soup = BeautifulSoup('', PARSER)
+
+    def on_container(element):
+        # Only product containers become soup, never the whole page
+        product = extract_product(soup_element(element, soup), spec, category_name)
+        if product is not None:
+            rows.append(product)
+
+    container, next_link, widget = spec.stream
+    listing = ListingStream(container, on_container, next_link, widget, response_encoding(response))
+    for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+        listing.feed(chunk)
+    listing.close()
+
+    if widget is not None and not listing.widget_seen:
+        # No pagination widget at all: keep walking blindly up to a cap
+        has_next = page < spec.pagination['blind_max_pages']
+    else:
+        has_next = listing.next_seen
+    return rows, listing.found, listing.found > 0 and has_next
+
+def page_url(spec, cat_url, page):
+    """Builds the listing URL for a page number using the platform's pagination style."""
+    pagination = spec.pagination
+    if page == 1 and pagination['bare_first_page']:
+        return cat_url
+    if pagination['style'] == 'path':
+        return f"{cat_url.rstrip('/')}/page/{page}/"
+    separator = '&' if '?' in cat_url else '?'
+    return f"{cat_url}{separator}{pagination['param']}={page}"
+
+# --- Session and Category Helpers ---
+
+def setup_session(headers=None):
+    """Configures a session with retry logic for connection/timeout errors."""
+    retry_strategy = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504, 524],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=DEFAULT_CONCURRENCY['max_limit'])
+    http = requests.Session()
+    http.mount("https://", adapter)
+    http.headers.update(headers or DEFAULT_HEADERS)
+    return http
+
+def get_categories(fetcher, spec, base_url):
+    """Fetches the home page and extracts category links using the spec's selectors."""
+    if spec.categories is None:
+        return [{'name': 'All Products', 'url': base_url}]
+
+    print(f"Fetching categories from {base_url}...")
+    try:
+        response = fetcher.get(base_url)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.content, PARSER)
+
+        categories = []
+        # Overlapping submenus and query-string variants link the same listing
+        seen = SeenSet()
+        for link in spec.categories['link'].select(soup):
+            href = link.get('href')
+            if not href or not href.startswith('http') or href in seen:
+                continue
+
+            name_elem = spec.categories['name'].select_one(link) if spec.categories['name'] else link
+            if name_elem is None:
+                name = link.get_text(strip=True) or "Unknown Category"
+            elif spec.categories['name_own_text']:
+                name = "".join(t for t in name_elem.contents if isinstance(t, str)).strip()
+                name = name or name_elem.get_text(strip=True)
+            else:
+                name = name_elem.get_text(strip=True)
+
+            seen.add(href)
+            categories.append({'name': name, 'url': href})
+
+        print(f"Found {len(categories)} categories.")
+        return categories
+    except Exception as e:
+        print(f"Error fetching categories: {e}")
+        return []
+
+def menu_categories(config, fetcher, spec):
+    """get_categories, answered from the crawl-plan cache while it is fresh."""
+    if spec.categories is None:
+        return get_categories(fetcher, spec, config['base_url'])
+    plan = CrawlPlan(config)
+    categories = plan.categories()
+    if categories is not None:
+        print(f"Using {len(categories)} categories from the crawl-plan cache.")
+        return categories
+    categories = get_categories(fetcher, spec, config['base_url'])
+    plan.save_categories(categories)
+    return categories
+
+# --- Page Tasks ---
+
+_SPECS = {}
+
+def compiled_spec(config, extract_brand=None):
+    """Returns the site's CompiledSpec, compiling it on first use in this process."""
+    key = (config['base_url'], extract_brand)
+    spec = _SPECS.get(key)
+    if spec is None:
+        spec = _SPECS[key] = CompiledSpec(config, extract_brand)
+    return spec
+
+def discover_tasks(config, fetcher, extract_brand=None):
+    """
+    Page 1 of every category (the home page menu for CS-Cart, the shop root
+    for WooCommerce), or only the changed ones with "discovery": "sitemap".
+    With "source": "api", every page of the platform's JSON API when the
+    shop has one; with "source": "ajax", categories are listed through
+    large AJAX fragments when the store serves them.
+    """
+    spec = compiled_spec(config, extract_brand)
+    if config.get('source') == 'api' and spec.api:
+        tasks = discover_api_pages(config, fetcher, spec.api)
+        if tasks:
+            return tasks
+
+    categories = None
+    if config.get('discovery') == 'sitemap':
+        categories = discover_changed(config, fetcher, spec.sitemap,
+                                      lambda: menu_categories(config, fetcher, spec))
+    if categories is None:
+        categories = menu_categories(config, fetcher, spec)
+
+    if config.get('source') == 'ajax' and spec.ajax and categories:
+        def has_products(fragment):
+            return spec.product.select_one(BeautifulSoup(fragment, PARSER)) is not None
+
+        if probe_fragments(fetcher, page_url(spec, categories[0]['url'], 1), spec.ajax, has_products):
+            categories = [dict(category, ajax=True) for category in categories]
+    return [(category, 1) for category in categories]
+
+def fetch_task(config, fetcher, category, page, extract_brand=None):
+    """Fetches one listing page. Returns None when the page is past the end of the category."""
+    spec = compiled_spec(config, extract_brand)
+    if is_api_category(category):
+        emit('page_fetch', DEBUG, store=spec.store, category=category['name'], page=page, url=category['url'])
+        return fetch_api_page(fetcher, category, page, spec.api['per_page'])
+
+    url = page_url(spec, category['url'], page)
+    probed = take_probed(url)
+    if probed is not None:
+        return probed
+    emit('page_fetch', DEBUG, store=spec.store, category=category['name'], page=page, url=url)
+
+    if category.get('ajax'):
+        fragment, response = fetch_fragment(fetcher, url, spec.ajax)
+        if fragment is not None:
+            return fragment
+        # Not a fragment after all: judge (and parse) it as a full page
+    else:
+        response = fetcher.get(url)
+    if not listing_exists(spec, category, page, response):
+        return None
+    return response.content
+
+def listing_exists(spec, category, page, response):
+    """False when the response is past the end of the category; raises on HTTP errors."""
+    if response.status_code == 404:
+        emit('category_end', store=spec.store, category=category['name'], page=page, reason='not found')
+        return False
+    response.raise_for_status()
+
+    # Some shops redirect past-the-end pages back to the first page
+    if page > 1 and response.url.rstrip('/') == category['url'].rstrip('/'):
+        emit('category_end', store=spec.store, category=category['name'], page=page, reason='redirected to page 1')
+        return False
+    return True
+
+def plan_pages(config, fetcher, category, content, extract_brand=None):
+    """Pages 2..last of a category, planned from its page 1. None when the site walks `next` links."""
+    spec = compiled_spec(config, extract_brand)
+    mode = spec.pagination.get('plan')
+    if not mode or is_api_category(category):
+        # API pages are all known from discovery
+        return None
+
+    pattern = page_link_pattern(spec.pagination['style'], category['url'], spec.pagination.get('param', 'page'))
+    last = max_linked_page(content, pattern)
+    if mode == 'probe':
+        def page_exists(page):
+            url = page_url(spec, category['url'], page)
+            content, response = fetch_fragment(fetcher, url, spec.ajax) if category.get('ajax') \
+                else (None, fetcher.get(url))
+            if content is None:
+                if response.status_code != 200 or response.url.rstrip('/') == category['url'].rstrip('/'):
+                    return False
+                content = response.content
+            if spec.product.select_one(BeautifulSoup(content, PARSER)) is None:
+                return False
+            keep_probed(url, content)
+            return True
+
+        last = probe_last_page(page_exists, last, spec.pagination['blind_max_pages'])
+
+    emit('pages_planned', store=spec.store, category=category['name'], pages=last)
+    return list(range(2, last + 1))
+
+def finish_crawl(config, rows, unfinished=()):
+    """
+    Adds the products of categories an incremental sitemap run didn't need
+    to fetch, or didn't finish (`unfinished`: deadline or failed pages).
+    """
+    return merge_unchanged(config, rows, unfinished)
+
+def parse_task(config, content, category, page, extract_brand=None):
+    """Parses one listing page. Returns (rows, follow_up_pages)."""
+    spec = compiled_spec(config, extract_brand)
+    if is_api_category(category):
+        return parse_api_page(content, spec), []
+
+    rows, found, has_next = parse_listing(content, spec, category['name'], page)
+    if not found:
+        emit('category_end', store=spec.store, category=category['name'], page=page, reason='no products')
+        return [], []
+    return rows, ([page + 1] if has_next else [])
+
+def stream_task(config, fetcher, category, page, extract_brand=None):
+    """
+    fetch_task and parse_task in one pass, parsing the body as it arrives.
+    Returns (rows, follow_up_pages), or None past the end of the category.
+    Sites whose selectors can't be streamed, JSON API pages and AJAX
+    fragments are read whole.
+    """
+    spec = compiled_spec(config, extract_brand)
+    if spec.stream is None or is_api_category(category) or category.get('ajax'):
+        content = fetch_task(config, fetcher, category, page, extract_brand)
+        return None if content is None else parse_task(config, content, category, page, extract_brand)
+
+    url = page_url(spec, category['url'], page)
+    probed = take_probed(url)
+    if probed is not None:
+        # Already downloaded by the pagination probe
+        return parse_task(config, probed, category, page, extract_brand)
+    emit('page_fetch', DEBUG, store=spec.store, category=category['name'], page=page, url=url, streamed=True)
+    response = fetcher.get(url, stream=True)
+    try:
+        if not listing_exists(spec, category, page, response):
+            return None
+        rows, found, has_next = stream_listing(response, spec, category['name'], page)
+    finally:
+        response.close()
+
+    if not found:
+        emit('category_end', store=spec.store, category=category['name'], page=page, reason='no products')
+        return [], []
+    return rows, ([page + 1] if has_next else [])
+
+# --- Main Scraper Function ---
+
+def scrape_platform(config):
+    """
+    Scrapes any CS-Cart or WooCommerce shop described by its config entry
+    ('platform' plus optional 'extraction' overrides).
+    """
+    return crawl(config, sys.modules[__name__])
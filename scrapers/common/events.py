@@ -0,0 +1,227 @@
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from logging import DEBUG, ERROR, INFO, WARNING, getLevelName
+
+# --- Structured Run Events ---
+#
+# Scrapers report what happens in their page loops as named events with
+# fields instead of printing:
+#
+#   emit('page_parsed', store='TokyoPC', category='Laptops', page=3, products=48)
+#
+# emit() only puts a tuple on an in-memory queue (a multiprocessing queue in
+# parse worker processes), so fetch threads and parsers never wait on a slow
+# terminal or log driver and never format anything. A listener thread per
+# queue writes the events as JSON lines to a buffered file and feeds the
+# console, which shows either one live progress line per store or, with
+# verbose output, one line per event.
+#
+# Until configure_events() is called (e.g. when a scraper is used as a
+# library) only warnings and errors are printed, to stderr.
+
+LEVELS = {
+    'debug': DEBUG,       # Everything, including every page request
+    'info': INFO,         # Pages parsed, planned, end of category
+    'warning': WARNING,   # Failed pages and products
+    'error': ERROR
+}
+
+DEFAULT_LOG_DIR = 'logs'
+PROGRESS_INTERVAL = 0.2           # Seconds between progress line redraws on a terminal
+PIPE_PROGRESS_INTERVAL = 10.0     # ... and between progress lines when output is not a terminal
+FILE_BUFFER_BYTES = 1 << 16
+
+_STOP = None
+
+_state = {
+    'sink': None,          # Queue events go to in this process; None prints warnings directly
+    'level': WARNING,
+    'pid': os.getpid(),
+    'worker_queue': None,  # Queue handed to child processes
+    'listeners': [],
+    'handlers': []
+}
+
+def emit(event, level=INFO, **fields):
+    """Records one event. Costs one comparison when the level is filtered out."""
+    if level < _state['level']:
+        return
+    sink = _state['sink']
+    if sink is None:
+        sys.stderr.write(f"  {describe(event, fields)}\n")
+        return
+    sink.put((time.time(), level, event, _state['pid'], fields))
+
+def describe(event, fields):
+    """Human form of an event: 'page_failed: store=TokyoPC page=3 error=timeout'."""
+    details = ' '.join(f"{name}={value}" for name, value in fields.items())
+    return f"{event}: {details}" if details else event
+
+# --- Handlers (run on the listener threads) ---
+
+class JsonLinesHandler:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8', buffering=FILE_BUFFER_BYTES)
+
+    def handle(self, ts, level, event, pid, fields):
+        record = {'ts': round(ts, 3), 'level': getLevelName(level).lower(), 'event': event, 'pid': pid}
+        record.update(fields)
+        self._file.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+class EventLinesHandler:
+    """One human-readable line per event (verbose console output)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def handle(self, ts, level, event, pid, fields):
+        self.stream.write(f"  {describe(event, fields)}\n")
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+class ProgressHandler:
+    """
+    Keeps one status line per store up to date from the event stream:
+    '[TokyoPC] 34 pages, 1,204 products, 1 error'. Warnings and errors are
+    printed above it as they happen.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.interactive = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.interval = PROGRESS_INTERVAL if self.interactive else PIPE_PROGRESS_INTERVAL
+        self.store = None
+        self.counts = {}
+        self.last_draw = 0.0
+        self.line_open = False
+
+    def _line(self):
+        c = self.counts[self.store]
+        errors = f"{c['errors']} error{'s' if c['errors'] != 1 else ''}"
+        return f"[{self.store}] {c['pages']:,} pages, {c['products']:,} products, {errors}"
+
+    def _draw(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_draw < self.interval:
+            return
+        self.last_draw = now
+        if self.interactive:
+            self.stream.write(f"\r\x1b[K{self._line()}")
+            self.line_open = True
+        else:
+            self.stream.write(f"{self._line()}\n")
+        self.stream.flush()
+
+    def _end_line(self):
+        if self.line_open:
+            self.stream.write("\n")
+            self.line_open = False
+
+    def handle(self, ts, level, event, pid, fields):
+        store = fields.get('store')
+        if store is not None and store != self.store:
+            self._end_line()
+            self.store = store
+        if store is not None and (store not in self.counts or event == 'crawl_started'):
+            self.counts[store] = {'pages': 0, 'products': 0, 'errors': 0}
+
+        counts = self.counts.get(self.store)
+        if event == 'page_parsed':
+            counts['pages'] += 1
+            counts['products'] += fields.get('products', 0)
+        if level >= WARNING:
+            if counts is not None:
+                counts['errors'] += 1
+            self._end_line()
+            self.stream.write(f"  ⚠️ {describe(event, fields)}\n")
+
+        if event == 'crawl_done':
+            self._draw(force=True)
+            self._end_line()
+        elif self.store is not None:
+            self._draw()
+
+    def close(self):
+        self._end_line()
+        self.stream.flush()
+
+def _listen(source, handlers, lock):
+    while True:
+        item = source.get()
+        if item is _STOP:
+            return
+        with lock:
+            for handler in handlers:
+                try:
+                    handler.handle(*item)
+                except Exception as e:
+                    sys.stderr.write(f"  Event handler failed: {e}\n")
+
+# --- Setup ---
+
+def default_log_file():
+    return os.path.join(DEFAULT_LOG_DIR, time.strftime('run_%Y%m%d_%H%M%S.jsonl'))
+
+def configure_events(log_file=None, level='info', console='progress'):
+    """
+    Routes events through background listeners. `log_file` receives every
+    event at `level` or above as JSON lines (None: no file); `console` is
+    'progress' (one live line per store), 'events' (one line per event) or
+    'quiet'. Returns the log file path.
+    """
+    shutdown_events()
+
+    handlers = []
+    if log_file:
+        handlers.append(JsonLinesHandler(log_file))
+    if console == 'progress':
+        handlers.append(ProgressHandler())
+    elif console == 'events':
+        handlers.append(EventLinesHandler())
+
+    # Both listeners share the handlers, so a lock keeps their writes whole
+    lock = threading.Lock()
+    local_queue = queue.SimpleQueue()
+    worker_source = multiprocessing.Queue()
+    for source in (local_queue, worker_source):
+        listener = threading.Thread(target=_listen, args=(source, handlers, lock), daemon=True)
+        listener.start()
+        _state['listeners'].append((source, listener))
+
+    _state.update(sink=local_queue, level=LEVELS[level], worker_queue=worker_source, handlers=handlers)
+    return log_file
+
+def worker_queue():
+    """(queue, level) for child processes to forward their events to, or None if not configured."""
+    if _state['worker_queue'] is None:
+        return None
+    return _state['worker_queue'], _state['level']
+
+def init_worker(forward):
+    """Process pool initializer: sends this process's events to the parent's listeners."""
+    _state['pid'] = os.getpid()
+    if forward is not None:
+        _state['sink'], _state['level'] = forward
+
+def shutdown_events():
+    """Drains the queues and flushes the log file. Safe to call more than once."""
+    # Each listener handles everything queued before its stop marker
+    for source, listener in _state['listeners']:
+        source.put(_STOP)
+        listener.join()
+    for handler in _state['handlers']:
+        handler.close()
+    if _state['worker_queue'] is not None:
+        _state['worker_queue'].close()
+    _state.update(sink=None, level=WARNING, worker_queue=None, listeners=[], handlers=[])
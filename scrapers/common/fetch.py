@@ -0,0 +1,183 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+
+from .budget import DeadlineExceeded, run_deadline
+from .concurrency import AIMDLimiter, DEFAULT_CONCURRENCY
+from .hedging import hedger
+from .proxies import EGRESS_ERROR_STATUSES, proxy_pool
+
+# --- Shared Fetch Layer ---
+
+DEFAULT_TIMEOUT = 20
+THROTTLE_STATUSES = (429,)
+# Errors while reading a streamed body (requests wraps urllib3's only inside iter_content)
+BODY_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+
+class Fetcher:
+    """
+    Wraps a scraper's requests.Session so every GET goes through a per-host
+    AIMD limiter. Scrapers hand independent requests to `map` and the limiter
+    decides how many of them are actually in flight for each host.
+
+    Every request also ends by `deadline` (the run budget by default): its
+    timeout is cut to the time left, and none starts after it.
+
+    With egress proxies configured (see proxies.py), each request goes out
+    through a path picked by the pool, and limits are kept per host per path.
+    With "hedging", slow responses get a second attempt (see hedging.py).
+    Headers under "headers" in the site config go on every request.
+    """
+
+    def __init__(self, session, config=None, deadline=None):
+        config = config or {}
+        self.session = session
+        if config.get('headers'):
+            session.headers.update(config['headers'])
+        self.deadline = deadline or run_deadline()
+        self.settings = dict(DEFAULT_CONCURRENCY)
+        self.settings.update(config.get('concurrency', {}))
+        self.proxies = proxy_pool(config)
+
+        self._limiters = {}
+        # Every egress path can carry up to max_limit requests per host
+        paths = len(self.proxies) if self.proxies else 1
+        self._pool = ThreadPoolExecutor(max_workers=self.settings['max_limit'] * paths)
+        self.hedger = hedger(config, self.settings['max_limit'] * paths)
+
+    def limiter_for(self, url, egress=None):
+        """Returns (creating if needed) the limiter for the URL's host (through `egress`)."""
+        host = urlsplit(url).netloc
+        key = host if egress is None else f"{host} via {egress.label}"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters.setdefault(key, AIMDLimiter(self.settings))
+        return limiter
+
+    def get(self, url, **kwargs):
+        """session.get() gated by the host's adaptive concurrency limit."""
+        return self._send(url, kwargs)
+
+    def _send(self, url, kwargs):
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        egress = self.proxies.acquire() if self.proxies else None
+        limiter = self.limiter_for(url, egress)
+        started = limiter.acquire()
+        try:
+            # Checked after acquire(): waiting for a slot may have used up the budget
+            kwargs['timeout'] = self.deadline.timeout(kwargs['timeout'])
+        except requests.exceptions.RequestException:
+            limiter.cancel()
+            if egress is not None:
+                self.proxies.cancel(egress)
+            raise
+        if egress is not None and egress.proxies is not None:
+            kwargs.setdefault('proxies', egress.proxies)
+        try:
+            if self.hedger is None:
+                response = self.session.get(url, **kwargs)
+            else:
+                # Hedged inside the slot: a hedge takes a second slot of the same limiter
+                response = self.hedger.get(lambda: self.session.get(url, **kwargs), url, limiter)
+        except requests.exceptions.RequestException:
+            self._release(limiter, egress, started, None)
+            raise
+
+        if kwargs.get('stream'):
+            return self._hold_until_closed(response, limiter, egress, started)
+        self._release(limiter, egress, started, response.status_code)
+        return response
+
+    def _release(self, limiter, egress, started, status):
+        """Reports a finished request to its limiter and egress path; `status` None means it failed."""
+        limiter.release(
+            started,
+            error=status is None or status >= 500,
+            throttled=status in THROTTLE_STATUSES
+        )
+        if egress is not None:
+            error = status is None or status in EGRESS_ERROR_STATUSES
+            self.proxies.release(egress, time.monotonic() - started, error=error)
+
+    def _hold_until_closed(self, response, limiter, egress, started):
+        """
+        A streamed body downloads after get() returns, so the request keeps
+        its host (and egress) slot until the response is closed, and its
+        latency covers the whole body. Reads of the body past the deadline
+        raise DeadlineExceeded: the per-read timeout alone doesn't cap a
+        slow body.
+        """
+        raw = response.raw
+        if self.deadline.at is not None:
+            deadline, read, stream = self.deadline, raw.read, raw.stream
+
+            def checked_read(*args, **kwargs):
+                deadline.timeout(None)
+                return read(*args, **kwargs)
+
+            def checked_stream(*args, **kwargs):
+                # Chunked bodies are read without going through read()
+                for chunk in stream(*args, **kwargs):
+                    deadline.timeout(None)
+                    yield chunk
+
+            raw.read, raw.stream = checked_read, checked_stream
+
+        close = response.close
+        released = []
+
+        def closing():
+            if not released:
+                released.append(True)
+                # Closed while a body read is failing (timeout, reset): count it as a failed request.
+                # Running out of budget says nothing about the host.
+                exception = sys.exc_info()[1]
+                failed = isinstance(exception, BODY_ERRORS) and not isinstance(exception, DeadlineExceeded)
+                self._release(limiter, egress, started, None if failed else response.status_code)
+            close()
+
+        response.close = closing
+        return response
+
+    def submit(self, func, *args):
+        """Schedules func(*args) on the fetch pool and returns its Future."""
+        return self._pool.submit(func, *args)
+
+    def map(self, func, items):
+        """Runs func over items on the fetch pool. Results keep the input order."""
+        return list(self._pool.map(func, items))
+
+    def metrics(self):
+        """Per-host limiter snapshots, including the current concurrency limit."""
+        return {host: limiter.snapshot() for host, limiter in self._limiters.items()}
+
+    def report(self):
+        """Prints a one-line summary per host (and per egress path)."""
+        for host, m in self.metrics().items():
+            print(
+                f"  [metrics] {host}: limit={m['limit']} (peak {m['peak_limit']}), "
+                f"requests={m['requests']}, errors={m['errors']}, 429s={m['throttled']}, "
+                f"p50={m['p50']}s, p95={m['p95']}s"
+            )
+        if self.proxies:
+            for label, m in self.proxies.metrics().items():
+                print(
+                    f"  [egress] {label}: requests={m['requests']}, errors={m['errors']}, "
+                    f"p50={m['p50']}s, evictions={m['evictions']}{' (evicted)' if m['evicted'] else ''}"
+                )
+        if self.hedger:
+            for host, m in self.hedger.metrics().items():
+                print(
+                    f"  [hedging] {host}: hedged={m['hedged']} (won {m['won']}), "
+                    f"p99={m['p99']}s (first attempts alone: {m['p99_unhedged']}s)"
+                )
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        if self.hedger:
+            self.hedger.close()
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+
+from .concurrency import percentile
+
+# --- Hedged Requests ---
+#
+# Most pages answer quickly, but a few take 10-20s, and those outliers set
+# how long a crawl takes. With "hedging": {} in a site config, a GET that
+# hasn't answered by the host's usual worst case (p95 of recent responses)
+# is sent a second time on another connection, and whichever answers first
+# is used. Hedges are capped at `max_fraction` of requests, and each holds a
+# slot of the host's AIMD limiter, so the extra load on the store stays
+# small. Latencies are timed from when the request got its slot, so waiting
+# for the limiter never looks like a slow host.
+#
+# The metrics compare each host's p99 as observed (the first answer) with
+# the p99 the first attempts alone would have had, so the gain is visible.
+
+DEFAULT_HEDGING = {
+    'percentile': 0.95,       # Hedge a request still unanswered after this latency percentile
+    'max_fraction': 0.05,     # At most this share of requests gets a hedge
+    'min_samples': 20,        # Responses needed from a host before hedging against it
+    'min_delay': 0.05,        # Never hedge sooner than this (seconds)
+    'window': 500             # Recent responses used for percentiles
+}
+
+def hedger(config, threads):
+    """A Hedger for the site, or None when it doesn't hedge."""
+    if 'hedging' not in (config or {}):
+        return None
+    settings = dict(DEFAULT_HEDGING)
+    settings.update(config['hedging'] or {})
+    return Hedger(settings, threads)
+
+class Hedger:
+    """
+    Runs GETs through `send()` with a hedge for slow ones. First attempts
+    run on this object's threads so the caller can stop waiting.
+    """
+
+    def __init__(self, settings, threads):
+        self.settings = settings
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+        # Per host: first-answer latencies, first-attempt latencies, hedges that won
+        self._hosts = {}
+        self._pool = ThreadPoolExecutor(max_workers=threads * 2)
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                window = self.settings['window']
+                stats = self._hosts[host] = {
+                    'observed': deque(maxlen=window),
+                    'first': deque(maxlen=window),
+                    'hedged': 0,
+                    'won': 0
+                }
+            return stats
+
+    def _delay(self, stats):
+        samples = list(stats['first'])
+        if len(samples) < self.settings['min_samples']:
+            return None
+        return max(self.settings['min_delay'], percentile(samples, self.settings['percentile']))
+
+    def _take_hedge(self, stats, limiter):
+        with self._lock:
+            if self.hedges + 1 > self.settings['max_fraction'] * self.requests:
+                return False
+            self.hedges += 1
+            stats['hedged'] += 1
+        # The hedge's own slot: other requests to the host wait for it instead of the hedge waiting
+        limiter.acquire_now()
+        return True
+
+    def get(self, send, url, limiter):
+        """
+        Returns send()'s response. Called once the request holds a slot of
+        `limiter`, so only send() itself is timed. A hedge takes a second
+        slot, held until the losing attempt is done; the winner keeps the
+        caller's slot.
+        """
+        stats = self._host(url)
+        with self._lock:
+            self.requests += 1
+        delay = self._delay(stats)
+        started = time.monotonic()
+        if delay is None:
+            # Too few samples to know what slow means for this host yet
+            response = send()
+            elapsed = time.monotonic() - started
+            stats['first'].append(elapsed)
+            stats['observed'].append(elapsed)
+            return response
+
+        def record_first(future):
+            stats['first'].append(time.monotonic() - started)
+
+        first = self._pool.submit(send)
+        first.add_done_callback(record_first)
+        try:
+            response = first.result(timeout=delay)
+        except FutureTimeout:
+            response = None
+        if response is not None or not self._take_hedge(stats, limiter):
+            response = response if response is not None else first.result()
+            stats['observed'].append(time.monotonic() - started)
+            return response
+
+        hedge = self._pool.submit(send)
+        pending = {first, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is None and pending:
+                # One attempt failed: the other may still answer
+                continue
+            stats['observed'].append(time.monotonic() - started)
+            if winner is None:
+                limiter.cancel()
+                first.result()
+            if winner is hedge:
+                stats['won'] += 1
+            loser = first if winner is hedge else hedge
+            loser.add_done_callback(lambda future: _close_loser(future, limiter))
+            return winner.result()
+
+    def metrics(self):
+        """Per host: hedges sent and won, and p99 with hedging vs first attempts alone."""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: {
+            'hedged': s['hedged'],
+            'won': s['won'],
+            'p99': round(percentile(list(s['observed']), 0.99), 3),
+            'p99_unhedged': round(percentile(list(s['first']), 0.99), 3)
+        } for host, s in hosts.items()}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+def _close_loser(future, limiter):
+    """Releases the connection and the spare slot of the attempt that lost the race."""
+    try:
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+    finally:
+        limiter.cancel()
@@ -0,0 +1,69 @@
+import re
+
+# --- Pagination Planner ---
+#
+# Walking `next` links makes a category strictly sequential: page N+1 is
+# only known once page N has been parsed. The planner finds the last page
+# from page 1 instead, so every page of the category can be fetched at once:
+#
+#   'widget'  trust the highest page number linked from page 1 (WooCommerce
+#             always links the last page in its `page-numbers` list)
+#   'probe'   take the highest linked page as a lower bound, then find the
+#             real end by exponential + binary search (for windowed widgets
+#             that only link a few pages ahead)
+#
+# Page numbers are read from the raw HTML with one regex, so planning does
+# not add a second parse of page 1 to the fetch thread. The bodies of pages
+# a probe found are kept for fetch_task, so the crawl doesn't download them
+# a second time (a HEAD request can't tell a past-the-end page from a real
+# one: both answer 200, only the body shows there are no products).
+
+# Probed page bodies by URL, handed to fetch_task in the same process
+_PROBED_PAGES = {}
+
+def page_link_pattern(style, cat_url, param='page'):
+    """Regex matching links to other pages of this category; group 1 is the page number."""
+    if style == 'path':
+        return re.compile(re.escape(cat_url.rstrip('/')).encode() + rb'/page/(\d+)')
+    return re.compile(rb'[?&;]' + re.escape(param).encode() + rb'=(\d+)')
+
+def max_linked_page(content, pattern):
+    """Highest page number linked from a listing page (1 when there are no page links)."""
+    return max((int(number) for number in pattern.findall(content)), default=1)
+
+def keep_probed(url, content):
+    """Keeps the body of a page the probe found, for take_probed()."""
+    _PROBED_PAGES[url] = content
+
+def take_probed(url):
+    """The body a probe already downloaded for `url` (once), or None."""
+    return _PROBED_PAGES.pop(url, None)
+
+def probe_last_page(page_exists, known=1, limit=None):
+    """
+    Finds the last page with as few requests as possible, given that page
+    `known` exists: double the page number until a page is missing, then
+    binary-search the gap. Costs about 2*log2(last / known) probes. Every
+    page `page_exists` confirms is at most the returned last page, so bodies
+    it keeps are all fetched by the crawl.
+    """
+    low, high = known, None
+    while high is None:
+        candidate = low * 2
+        if limit is not None and candidate > limit:
+            # Capped: the end is either the cap itself or somewhere before it
+            if low >= limit or page_exists(limit):
+                return max(low, limit)
+            high = limit
+        elif page_exists(candidate):
+            low = candidate
+        else:
+            high = candidate
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        if page_exists(middle):
+            low = middle
+        else:
+            high = middle
+    return low
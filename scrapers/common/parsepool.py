@@ -0,0 +1,50 @@
+import importlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .events import init_worker, worker_queue
+
+# --- Parse Worker Pool ---
+#
+# BeautifulSoup parsing is CPU-bound and holds the GIL, so parsing on the
+# fetch threads caps a crawl at one core. The crawl loop hands raw response
+# bytes to this pool instead; each worker process imports the site module
+# once and runs its parse_task, sending the page's rows back as one batch.
+
+def default_parse_processes():
+    return max(1, (os.cpu_count() or 1))
+
+def _parse_in_worker(module_name, config, content, category, page):
+    module = importlib.import_module(module_name)
+    return module.parse_task(config, content, category, page)
+
+class ParsePool:
+    """
+    Process pool for parse_task calls. `max_unparsed` bounds how many fetched
+    bodies may wait for a parse worker; fetch threads block in reserve() when
+    the parsers fall behind, so memory stays flat on large sites.
+    """
+
+    def __init__(self, processes=None, max_unparsed=None):
+        self.processes = processes or default_parse_processes()
+        # Workers forward their events to this process's listeners
+        self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=init_worker,
+                                         initargs=(worker_queue(),))
+        self._slots = threading.BoundedSemaphore(max_unparsed or self.processes * 4)
+
+    def reserve(self):
+        """Called by a fetch thread before fetching a page destined for this pool."""
+        self._slots.acquire()
+
+    def release(self):
+        self._slots.release()
+
+    def submit(self, site, config, content, category, page):
+        """Queues a parse; the Future resolves to (rows, follow_up_pages)."""
+        future = self._pool.submit(_parse_in_worker, site.__name__, config, content, category, page)
+        future.add_done_callback(lambda _: self.release())
+        return future
+
+    def close(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,128 @@
+import json
+import os
+import re
+import time
+
+from .records import store_name
+from .urls import canonical_url
+
+# --- Crawl-Plan Cache ---
+#
+# Every run used to rebuild its plan from scratch: the category menu from
+# the home page, and each category's page count by walking `next` links
+# (or probing) one page at a time. With "plan_cache": {} in a site config,
+# both are kept between runs in .cache/plans/:
+#
+#   - the discovered category list, reused until it is `ttl_hours` old
+#   - each category's last page, so the next run schedules pages 1..last
+#     together from the start instead of discovering them in order
+#
+# Page counts are checked against what the crawl actually finds: pages
+# past the real end simply come back empty, pages beyond the cached count
+# are still found through the usual follow-ups, and the new count replaces
+# the old one. A cached category whose first page is gone (404, redirect)
+# means the menu has changed, so the category list is fetched again.
+
+DEFAULT_PLAN_CACHE = {
+    'state_dir': '.cache/plans',
+    'ttl_hours': 24,
+    'max_pages': 200              # Never schedule more cached pages than this per category
+}
+
+def category_key(category):
+    """Stable cache key for a task's category value (ids, dicts, None)."""
+    return json.dumps(category, sort_keys=True)
+
+class CrawlPlan:
+    """The cached plan of one site. Every method is a no-op without "plan_cache" in its config."""
+
+    def __init__(self, config):
+        self.enabled = 'plan_cache' in config
+        self.base_url = config['base_url']
+        self.settings = dict(DEFAULT_PLAN_CACHE)
+        self.settings.update(config.get('plan_cache') or {})
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', store_name(config)).strip('_')
+        self.path = os.path.join(self.settings['state_dir'], f"{slug}.json")
+        self.state = self._load() if self.enabled else {}
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A plan recorded for another address of the store says nothing about this one
+        return state if state.get('base_url') == self.base_url else {}
+
+    def _fresh(self, saved_at):
+        return saved_at is not None and time.time() - saved_at < self.settings['ttl_hours'] * 3600
+
+    def _save(self):
+        self.state['base_url'] = self.base_url
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.path)
+
+    # --- Categories ---
+
+    def categories(self):
+        """The cached category list while it is fresh, else None."""
+        cached = self.state.get('categories')
+        if not self.enabled or not cached or not self._fresh(cached.get('saved_at')):
+            return None
+        return cached['items']
+
+    def save_categories(self, categories):
+        if not self.enabled or not categories:
+            return
+        self.state['categories'] = {'saved_at': time.time(), 'items': categories}
+        self._save()
+
+    # --- Page Counts ---
+
+    def known_pages(self, category):
+        """Pages 2..last for a category whose page count is cached and fresh, else []."""
+        entry = self.state.get('pages', {}).get(category_key(category)) if self.enabled else None
+        if not entry or not self._fresh(entry.get('saved_at')):
+            return []
+        return list(range(2, min(entry['last'], self.settings['max_pages']) + 1))
+
+    def record(self, rows_by_category):
+        """
+        Stores each category's real last page: the last one that listed a
+        product not already on an earlier page (some shops repeat their last
+        page past the end). A cached category whose page 1 is missing or
+        empty is gone. `rows_by_category` is {category key: (category,
+        {page: rows})} for the categories crawled to the end. Returns the
+        number of categories whose count changed.
+        """
+        if not self.enabled:
+            return 0
+        pages = self.state.setdefault('pages', {})
+        cached_urls = {canonical_url(category['url']) for category in (self.categories() or [])}
+        drifted = 0
+        now = time.time()
+        for key, (category, page_rows) in rows_by_category.items():
+            if not page_rows.get(1) and isinstance(category, dict) and canonical_url(category.get('url', '')) in cached_urls:
+                print(f"  Cached category '{category.get('name')}' is gone. The category list will be fetched again.")
+                self.state.pop('categories', None)
+                cached_urls = set()
+            seen, last = set(), 0
+            for page in sorted(p for p in page_rows if isinstance(p, int)):
+                urls = {canonical_url(row.product_url) for row in page_rows[page]
+                        if row.product_url and row.product_url != 'N/A'}
+                if not urls and page_rows[page]:
+                    urls = {(page, len(page_rows[page]))}
+                if urls - seen:
+                    last = page
+                seen |= urls
+            if last == 0:
+                pages.pop(key, None)
+                continue
+            if pages.get(key, {}).get('last') not in (None, last):
+                drifted += 1
+            pages[key] = {'last': last, 'saved_at': now}
+        self._save()
+        return drifted
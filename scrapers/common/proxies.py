@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from .concurrency import percentile
+from .events import WARNING, emit
+
+# --- Egress Proxy Pool ---
+#
+# Stores limit requests per client IP, so past a point more concurrency
+# from one address only buys 429s. With a pool of egress proxies
+# ("proxies": {"urls": [...]} in a site config, or --proxies on the CLI),
+# the Fetcher sends each request through the healthiest, least busy path,
+# and keeps a separate AIMD limit per host per path: each path finds its
+# own safe rate, so throughput grows with the number of healthy paths.
+#
+# Each path is scored on its recent latency and error rate. One that fails
+# too often is evicted for `cooldown` seconds, then readmitted on trial.
+# Sites whose server-side sessions are tied to the client address ("sticky":
+# true, e.g. AbansIT's AJAX endpoint) send everything through one pinned
+# path, and only move when it is evicted.
+
+DEFAULT_PROXIES = {
+    'urls': [],
+    'direct': False,              # Also use this machine's own address as a path
+    'sticky': False,              # Pin one path per Fetcher (server-side sessions)
+    'max_error_rate': 0.5,        # Evict a path whose recent error rate exceeds this...
+    'min_requests': 5,            # ...once it has handled at least this many requests
+    'cooldown': 60.0,             # Seconds an evicted path sits out before a trial
+    'window': 50                  # Recent requests used for latency / error rate
+}
+
+# Responses that say more about the path than the page (blocked address, proxy failure)
+EGRESS_ERROR_STATUSES = (403, 407, 429, 502, 503, 504)
+
+_DEFAULT_URLS = []
+
+def set_default_proxies(urls):
+    """Proxy URLs used by every site that doesn't list its own (--proxies)."""
+    global _DEFAULT_URLS
+    _DEFAULT_URLS = list(urls)
+
+def proxy_pool(config):
+    """A ProxyPool for the site, or None when it has no egress proxies."""
+    settings = dict(DEFAULT_PROXIES)
+    settings.update((config or {}).get('proxies', {}))
+    urls = settings['urls'] or _DEFAULT_URLS
+    if not urls:
+        return None
+    return ProxyPool(urls, settings)
+
+class Egress:
+    """One egress path: a proxy URL, or None for a direct connection."""
+
+    def __init__(self, url, window):
+        self.url = url
+        self.label = 'direct' if url is None else urlsplit(url).netloc or url
+        self.proxies = None if url is None else {'http': url, 'https': url}
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.evicted_until = None
+        self.evictions = 0
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+
+    def error_rate(self):
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def cost(self):
+        """Expected wait for one more request: typical latency, scaled by load and errors."""
+        latency = percentile(list(self._latencies), 0.50) or 0.1
+        return latency * (self.in_flight + 1) * (1 + 4 * self.error_rate())
+
+class ProxyPool:
+    """Picks an egress path per request and tracks each path's health."""
+
+    def __init__(self, urls, settings):
+        self.settings = settings
+        self.egresses = [Egress(url, settings['window']) for url in urls]
+        if settings['direct']:
+            self.egresses.append(Egress(None, settings['window']))
+        self._lock = threading.Lock()
+        self._pinned = None
+
+    def __len__(self):
+        return len(self.egresses)
+
+    def acquire(self):
+        """The path for the next request (the pinned one for sticky sites)."""
+        with self._lock:
+            now = time.monotonic()
+            healthy = [e for e in self.egresses if e.evicted_until is None or e.evicted_until <= now]
+            if self.settings['sticky'] and self._pinned in healthy:
+                egress = self._pinned
+            elif healthy:
+                egress = min(healthy, key=Egress.cost)
+            else:
+                # Everything is evicted: use the path that comes back soonest rather than stall
+                egress = min(self.egresses, key=lambda e: e.evicted_until)
+            if self.settings['sticky'] and egress is not self._pinned:
+                if self._pinned is not None:
+                    emit('proxy_repinned', WARNING, old=self._pinned.label, new=egress.label)
+                self._pinned = egress
+            egress.in_flight += 1
+            return egress
+
+    def cancel(self, egress):
+        """Gives back a path taken by acquire() for a request that was never sent."""
+        with self._lock:
+            egress.in_flight -= 1
+
+    def release(self, egress, latency, error=False):
+        """Records how a request through `egress` went; evicts the path if it keeps failing."""
+        with self._lock:
+            egress.in_flight -= 1
+            egress.requests += 1
+            egress.errors += 1 if error else 0
+            egress._latencies.append(latency)
+            egress._outcomes.append(error)
+
+            s = self.settings
+            now = time.monotonic()
+            if egress.evicted_until is not None:
+                if egress.evicted_until > now:
+                    # A request from before the eviction; the trial comes after the cooldown
+                    return
+                if not error:
+                    egress.evicted_until = None
+                    return
+            elif not (error and len(egress._outcomes) >= s['min_requests']
+                      and egress.error_rate() > s['max_error_rate']):
+                return
+            # Failing path, or failed trial: sit out another cooldown
+            egress.evicted_until = now + s['cooldown']
+            egress.evictions += 1
+            egress._outcomes.clear()
+            emit('proxy_evicted', WARNING, egress=egress.label, cooldown=s['cooldown'])
+
+    def metrics(self):
+        with self._lock:
+            now = time.monotonic()
+            return {e.label: {
+                'requests': e.requests,
+                'errors': e.errors,
+                'evictions': e.evictions,
+                'evicted': e.evicted_until is not None and e.evicted_until > now,
+                'p50': round(percentile(list(e._latencies), 0.50), 3)
+            } for e in self.egresses}
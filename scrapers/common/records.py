@@ -0,0 +1,180 @@
+import sys
+from urllib.parse import urlsplit
+
+# --- Compact Product Records ---
+#
+# A scrape can produce hundreds of thousands of rows. Storing each one as a
+# dict repeats every key and the per-site constants (country, year, store)
+# on every row. Instead each row is a slotted Product holding only the
+# per-product values, with category/brand strings interned, and the
+# per-site constants live once on the ProductBatch. Rows only become a
+# DataFrame at the sink: to_frame() for the site's own export layout, or
+# to_canonical_frame() for the schema shared by every site.
+
+PRODUCT_FIELDS = ('category', 'brand', 'model', 'price', 'product_url', 'image_url')
+
+# Output layout used unless a site declares its own (module COLUMNS or the
+# engine's 'columns' extraction setting). Values name Product fields or
+# batch constants (country, year, store).
+DEFAULT_COLUMNS = [
+    ('Category', 'category'),
+    ('Brand', 'brand'),
+    ('Model', 'model'),
+    ('Price (LKR)', 'price'),
+    ('Product URL', 'product_url'),
+    ('Image URL', 'image_url'),
+    ('Country', 'country'),
+    ('Year (Target)', 'year')
+]
+
+BATCH_CONSTANTS = ('country', 'year', 'store', 'currency')
+
+# Schema shared by every site, so batches from different stores can be
+# concatenated and compared in one frame. Prices are float64 in the batch's
+# `currency`; string columns that repeat per row are categoricals.
+CANONICAL_COLUMNS = (
+    'store', 'country', 'category', 'brand', 'model', 'price', 'currency',
+    'product_url', 'image_url', 'year'
+)
+CATEGORICAL_COLUMNS = ('store', 'country', 'category', 'brand', 'currency')
+
+def store_name(config):
+    """The site's display name: the configured 'store', else the base URL's host."""
+    return config.get('store') or urlsplit(config['base_url']).netloc
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Product:
+    """One scraped product. Optional stage output (SKU, image paths, ...) goes in `extra`."""
+
+    __slots__ = PRODUCT_FIELDS + ('extra',)
+
+    def __init__(self, category, brand, model, price, product_url=None, image_url=None, extra=None):
+        # Categorical strings repeat across thousands of rows: keep one copy
+        self.category = _intern(category)
+        self.brand = _intern(brand)
+        self.model = model
+        self.price = price
+        self.product_url = product_url
+        self.image_url = image_url
+        self.extra = extra
+
+    def set_extra(self, column, value):
+        if self.extra is None:
+            self.extra = {}
+        self.extra[column] = value
+
+    def to_tuple(self):
+        """Plain tuple form for JSON/queue transport."""
+        return (self.category, self.brand, self.model, self.price,
+                self.product_url, self.image_url, self.extra)
+
+    @classmethod
+    def from_tuple(cls, values):
+        return cls(*values)
+
+    def __reduce__(self):
+        # Rebuild through __init__ so strings are re-interned after unpickling
+        return (Product, self.to_tuple())
+
+    def __repr__(self):
+        return f"Product({', '.join(f'{name}={getattr(self, name)!r}' for name in PRODUCT_FIELDS)})"
+
+
+class ProductBatch:
+    """
+    A site's products plus the constants shared by every row. `partial`
+    marks a run that didn't read the whole site (its time budget ran out,
+    or pages failed for good).
+    """
+
+    def __init__(self, config, rows=None, columns=None, partial=False):
+        self.constants = {name: config.get(name) for name in BATCH_CONSTANTS}
+        self.constants['store'] = store_name(config)
+        self.columns = columns or DEFAULT_COLUMNS
+        self.rows = rows if rows is not None else []
+        self.partial = partial
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def extend(self, rows):
+        self.rows.extend(rows)
+
+    def column_for(self, field):
+        """The export column holding a Product field or constant, or None if the layout omits it."""
+        for column, source in self.columns:
+            if source == field:
+                return column
+        return None
+
+    def to_frame(self):
+        """Builds the output DataFrame column by column, broadcasting batch constants."""
+        import pandas as pd
+
+        data = {}
+        for column, field in self.columns:
+            if field in self.constants:
+                data[column] = pd.Series([self.constants[field]] * len(self.rows), dtype='category') \
+                    if self.rows else pd.Series([], dtype='object')
+            else:
+                data[column] = [getattr(row, field) for row in self.rows]
+
+        self._add_extras(data)
+        return pd.DataFrame(data)
+
+    def _add_extras(self, data):
+        # Stage output (SKU, image paths, ...) becomes trailing columns
+        extra_columns = []
+        for row in self.rows:
+            if row.extra:
+                for column in row.extra:
+                    if column not in data and column not in extra_columns:
+                        extra_columns.append(column)
+        for column in extra_columns:
+            data[column] = [row.extra.get(column) if row.extra else None for row in self.rows]
+
+    def to_canonical_frame(self):
+        """Builds a frame in CANONICAL_COLUMNS order (extras appended), regardless of the site's layout."""
+        import pandas as pd
+
+        count = len(self.rows)
+        data = {}
+        for field in CANONICAL_COLUMNS:
+            if field in self.constants:
+                data[field] = [self.constants[field]] * count
+            else:
+                data[field] = [getattr(row, field) for row in self.rows]
+        data['price'] = pd.to_numeric(pd.Series(data['price'], dtype='object'), errors='coerce').astype('float64')
+        data['year'] = pd.Series(data['year'], dtype='Int16')
+        for field in CATEGORICAL_COLUMNS:
+            data[field] = pd.Series(data[field], dtype='category')
+
+        self._add_extras(data)
+        return pd.DataFrame(data)
+
+
+def combine_frames(frames):
+    """
+    Concatenates canonical frames from several batches. Plain pd.concat
+    turns categoricals with different categories into object columns, so
+    the categories are unioned first to keep the combined frame compact.
+    """
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=list(CANONICAL_COLUMNS))
+
+    for field in CATEGORICAL_COLUMNS:
+        categories = union_categoricals([frame[field] for frame in frames]).categories
+        for frame in frames:
+            frame[field] = frame[field].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,269 @@
+import gzip
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlsplit
+
+from .records import Product, store_name
+from .urls import canonical_url
+
+# --- Sitemap-Driven Incremental Discovery ---
+#
+# CS-Cart and WooCommerce publish XML sitemaps with a `lastmod` per URL. With
+# "discovery": "sitemap" in a site config, discovery reads them and only
+# schedules the categories that may have changed since the previous run:
+#
+#   - categories that are new, or whose own lastmod changed
+#   - categories that listed a product whose lastmod changed or which has
+#     left the sitemap
+#   - categories without a lastmod, when the sitemap has products the last
+#     run never saw (they can't be placed otherwise)
+#
+# Products of the untouched categories are carried forward from the state
+# saved by the previous run (finish_crawl), so the output is still the whole
+# catalogue. A missing or old state means a full crawl, which also bounds
+# how long any drift can survive.
+
+DEFAULT_SITEMAP = {
+    'state_dir': '.cache/sitemaps',
+    'full_every_days': 7          # Crawl everything again after this long
+}
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+MAX_SITEMAP_FILES = 500
+
+# Refresh plans from discovery, picked up by finish_crawl in the same process
+_REFRESHES = {}
+
+# --- Streaming Sitemap Reader ---
+
+def _local(tag):
+    return tag[len(SITEMAP_NS):] if tag.startswith(SITEMAP_NS) else tag.rsplit('}', 1)[-1]
+
+def read_sitemap(stream):
+    """
+    Yields ('sitemap' | 'url', loc, lastmod) from a sitemap or sitemap index
+    as it is parsed, clearing each entry afterwards so large files stream in
+    constant memory.
+    """
+    loc = lastmod = None
+    for _, element in ET.iterparse(stream, events=('end',)):
+        tag = _local(element.tag)
+        if tag == 'loc':
+            loc = (element.text or '').strip()
+        elif tag == 'lastmod':
+            lastmod = (element.text or '').strip() or None
+        elif tag in ('sitemap', 'url'):
+            if loc:
+                yield tag, loc, lastmod
+            loc = lastmod = None
+            element.clear()
+
+def iter_sitemap_urls(fetcher, roots, follow=None):
+    """
+    Yields (url, lastmod) for every page in the sitemaps under `roots`
+    (the first root that answers is used). Child sitemaps are followed when
+    their URL matches the `follow` regex, or always when it is None.
+    """
+    follow = re.compile(follow) if follow else None
+    for root in roots:
+        pending, visited = [root], set()
+        found = False
+        while pending and len(visited) < MAX_SITEMAP_FILES:
+            url = pending.pop(0)
+            if url in visited:
+                continue
+            visited.add(url)
+
+            response = fetcher.get(url, stream=True)
+            try:
+                if response.status_code != 200:
+                    continue
+                response.raw.decode_content = True
+                stream = gzip.GzipFile(fileobj=response.raw) if url.endswith('.gz') else response.raw
+                for kind, loc, lastmod in read_sitemap(stream):
+                    found = True
+                    if kind == 'sitemap':
+                        if follow is None or follow.search(loc):
+                            pending.append(loc)
+                    else:
+                        yield loc, lastmod
+            except ET.ParseError as e:
+                print(f"  Could not parse sitemap {url}: {e}")
+            finally:
+                response.close()
+        if found:
+            return
+
+# --- Refresh Planning ---
+
+def category_name_from_url(url):
+    """'https://shop.lk/product-category/gaming-laptops/' -> 'Gaming Laptops'."""
+    slug = urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]
+    return slug.replace('-', ' ').replace('_', ' ').title() or url
+
+def unique_names(categories):
+    """Suffixes repeated category names: fetched rows are matched back to their category by name."""
+    counts = {}
+    named = []
+    for category in categories:
+        count = counts[category['name']] = counts.get(category['name'], 0) + 1
+        named.append(category if count == 1 else dict(category, name=f"{category['name']} ({count})"))
+    return named
+
+def state_path(config, settings):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', store_name(config)).strip('_')
+    return os.path.join(settings['state_dir'], f"{slug}.json")
+
+def load_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class SitemapRefresh:
+    """What one incremental run fetches, and what it carries forward from the last one."""
+
+    def __init__(self, config, settings, categories, category_lastmods, product_lastmods, state):
+        self.path = state_path(config, settings)
+        self.categories = categories
+        self.category_lastmods = category_lastmods
+        self.product_lastmods = product_lastmods
+        self.state = state or {}
+        self.full = self._needs_full_crawl(settings)
+        self.selected = categories if self.full else self._changed_categories()
+
+    def _needs_full_crawl(self, settings):
+        full_at = self.state.get('full_at')
+        return full_at is None or time.time() - full_at > settings['full_every_days'] * 86400
+
+    def _changed_categories(self):
+        old_categories = self.state.get('categories', {})
+        old_products = self.state.get('products', {})
+        old_rows = self.state.get('rows', {})
+        new_products = any(url not in old_products for url in self.product_lastmods)
+
+        selected = []
+        for category in self.categories:
+            key = canonical_url(category['url'])
+            lastmod = self.category_lastmods.get(key)
+            listed = [Product.from_tuple(values).product_url for values in old_rows.get(key, [])]
+            listed = [canonical_url(url) for url in listed if url and url != 'N/A']
+            if (
+                key not in old_categories
+                or (lastmod is not None and lastmod != old_categories[key])
+                or any(url not in self.product_lastmods or self.product_lastmods[url] != old_products.get(url)
+                       for url in listed)
+                or (lastmod is None and new_products)
+            ):
+                selected.append(category)
+        return selected
+
+    def merge(self, rows, unfinished=()):
+        """
+        Adds the carried-forward products of categories not fetched this run
+        (dropping products that left the sitemap), saves the new state and
+        returns the full row list. Categories in `unfinished` were cut short
+        (by a deadline or failed pages): their fresh rows are topped up with
+        last run's and they are fetched again next run.
+        """
+        cut_short = {canonical_url(category['url']) for category in unfinished if isinstance(category, dict)}
+        by_name = {category['name']: canonical_url(category['url']) for category in self.selected}
+        fresh = {}
+        for row in rows:
+            fresh.setdefault(by_name.get(row.category), []).append(row)
+
+        old_categories = self.state.get('categories', {})
+        old_rows = self.state.get('rows', {})
+        state = {
+            'full_at': time.time() if self.full and not cut_short else self.state.get('full_at'),
+            'categories': {},
+            'products': self.product_lastmods,
+            'rows': {}
+        }
+        merged = []
+        carried = 0
+        for category in self.categories:
+            key = canonical_url(category['url'])
+            category_rows = fresh.get(key)
+            if category_rows and key not in cut_short:
+                state['categories'][key] = self.category_lastmods.get(key)
+            else:
+                # Not fetched (or the fetch found nothing, or stopped early): keep last run's view and retry next time
+                category_rows = category_rows or []
+                fetched = {canonical_url(row.product_url) for row in category_rows if row.product_url}
+                old = [
+                    row for row in map(Product.from_tuple, old_rows.get(key, []))
+                    if not row.product_url or row.product_url == 'N/A'
+                    or (canonical_url(row.product_url) in self.product_lastmods
+                        and canonical_url(row.product_url) not in fetched)
+                ]
+                carried += len(old)
+                category_rows = category_rows + old
+                if key in old_categories:
+                    state['categories'][key] = old_categories[key]
+            state['rows'][key] = [row.to_tuple() for row in category_rows]
+            merged.extend(category_rows)
+        merged.extend(fresh.get(None, []))
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temporary, self.path)
+        print(f"  Sitemap refresh: {carried} unchanged products carried forward from the previous run.")
+        return merged
+
+# --- Protocol Helpers ---
+
+def discover_changed(config, fetcher, spec, menu_categories):
+    """
+    Categories to fetch in an incremental run, or None to fall back to a
+    normal full discovery (no usable sitemap). `spec` is the platform's
+    sitemap settings; `menu_categories` returns the usual categories.
+    """
+    settings = dict(DEFAULT_SITEMAP)
+    settings.update(config.get('sitemap', {}))
+
+    roots = spec['url'] if isinstance(spec['url'], list) else [spec['url']]
+    roots = [urljoin(config['base_url'], '/' + root.lstrip('/')) for root in roots]
+    category_pattern = re.compile(spec['category'])
+    product_pattern = re.compile(spec['product'])
+
+    print(f"Reading sitemaps from {roots[0]}...")
+    sitemap_categories, category_lastmods, product_lastmods = [], {}, {}
+    try:
+        for url, lastmod in iter_sitemap_urls(fetcher, roots, spec.get('follow')):
+            if product_pattern.search(url):
+                product_lastmods[canonical_url(url)] = lastmod
+            elif category_pattern.search(url):
+                category_lastmods[canonical_url(url)] = lastmod
+                sitemap_categories.append({'name': category_name_from_url(url), 'url': url})
+    except Exception as e:
+        print(f"  Could not read sitemaps ({e}). Falling back to full discovery.")
+        return None
+    if not product_lastmods:
+        print("  No product URLs in the sitemaps. Falling back to full discovery.")
+        return None
+
+    categories = sitemap_categories if spec['categories'] == 'sitemap' and sitemap_categories \
+        else menu_categories()
+    categories = unique_names(categories)
+    refresh = SitemapRefresh(config, settings, categories, category_lastmods, product_lastmods,
+                             load_state(state_path(config, settings)))
+    _REFRESHES[config['base_url']] = refresh
+
+    mode = 'full crawl' if refresh.full else 'incremental'
+    print(f"  Sitemaps list {len(product_lastmods)} products; {mode}: "
+          f"{len(refresh.selected)} of {len(categories)} categories to fetch.")
+    return refresh.selected
+
+def merge_unchanged(config, rows, unfinished=()):
+    """Completes an incremental run's rows with the unchanged categories. No-op for full discovery."""
+    refresh = _REFRESHES.pop(config['base_url'], None)
+    if refresh is None:
+        return rows
+    return refresh.merge(rows, unfinished)
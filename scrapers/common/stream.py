@@ -0,0 +1,158 @@
+import re
+
+try:
+    from lxml import etree
+    STREAMING_AVAILABLE = True
+except ImportError:
+    etree = None
+    STREAMING_AVAILABLE = False
+
+# --- Streaming Listing Parser ---
+#
+# Buffered parsing waits for the whole body, then builds a tree of the whole
+# page, so a page costs download time plus parse time and briefly holds the
+# body and its tree together. A ListingStream is fed the body chunk by chunk
+# as it downloads (lxml's incremental HTML parser) and hands each product
+# container to a callback as soon as its closing tag arrives; finished
+# elements are then dropped from the tree, so only the open ancestors and
+# the current container are ever held.
+#
+# Containers, `next` links and pagination widgets are recognised when their
+# tags open, so those selectors must be compound selectors ('li.product',
+# 'a[class*="next"]', 'div.ty-pagination'); compile_matcher() returns None
+# for anything else and callers fall back to buffered parsing.
+
+STREAM_CHUNK_BYTES = 1 << 15
+
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+COMPOUND_RE = re.compile(r'(?P<tag>[A-Za-z][\w-]*|\*)?(?P<rest>(?:[.#][\w-]+|\[[^\]]+\])*)$')
+PART_RE = re.compile(r'\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[^\]]+)\]')
+ATTR_RE = re.compile(r'\s*(?P<name>[\w-]+)\s*(?:(?P<op>[*^$~|]?=)\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'|(?P<bare>[^\s"\']+)))?\s*$')
+
+ATTR_TESTS = {
+    None: lambda value, wanted: True,
+    '=': lambda value, wanted: value == wanted,
+    '*=': lambda value, wanted: wanted in value,
+    '^=': lambda value, wanted: value.startswith(wanted),
+    '$=': lambda value, wanted: value.endswith(wanted),
+    '~=': lambda value, wanted: wanted in value.split(),
+    '|=': lambda value, wanted: value == wanted or value.startswith(wanted + '-')
+}
+
+def _compile_compound(selector):
+    match = COMPOUND_RE.match(selector.strip())
+    if not match or not selector.strip():
+        return None
+    tag = match.group('tag')
+    tag = None if tag in (None, '*') else tag.lower()
+    classes, tests = set(), []
+    for part in PART_RE.finditer(match.group('rest')):
+        if part.group('cls'):
+            classes.add(part.group('cls'))
+        elif part.group('id'):
+            tests.append(('id', '=', part.group('id')))
+        else:
+            attr = ATTR_RE.match(part.group('attr'))
+            if not attr:
+                return None
+            wanted = next((v for v in attr.group('dq', 'sq', 'bare') if v is not None), None)
+            tests.append((attr.group('name').lower(), attr.group('op'), wanted))
+
+    def matches(element):
+        if tag is not None and element.tag != tag:
+            return False
+        if classes and not classes.issubset(element.get('class', '').split()):
+            return False
+        for name, op, wanted in tests:
+            value = element.get(name)
+            if value is None or not ATTR_TESTS[op](value, wanted):
+                return False
+        return True
+
+    return matches
+
+def compile_matcher(selector):
+    """
+    Predicate over lxml elements for a selector list of compound selectors
+    ('li.product, div.item'); None when the selector needs combinators or
+    pseudo-classes, which can't be decided when a tag opens.
+    """
+    if not selector:
+        return None
+    compounds = [_compile_compound(part) for part in selector.split(',')]
+    if any(compound is None for compound in compounds):
+        return None
+    if len(compounds) == 1:
+        return compounds[0]
+    return lambda element: any(compound(element) for compound in compounds)
+
+class ListingStream:
+    """
+    Incremental parse of one listing page. `on_container(element)` is
+    called with each product container's lxml element as soon as it closes
+    (the element is cleared afterwards, so callers copy what they need).
+    After close(), `found` counts the containers, `widget_seen` tells whether
+    the page had a pagination widget and `next_seen` whether it linked a
+    next page (inside the widget, when there is one).
+    """
+
+    def __init__(self, container, on_container, next_link=None, widget=None, encoding=None):
+        self._parser = None
+        self._encoding = encoding
+        self._container = container
+        self._on_container = on_container
+        self._next = next_link
+        self._widget = widget
+        self._open_containers = 0
+        self.found = 0
+        self.widget_seen = False
+        self.next_seen = False
+
+    def feed(self, chunk):
+        if self._parser is None:
+            # Header charset, else the page's <meta>, else UTF-8 (as BeautifulSoup would guess)
+            meta = META_CHARSET_RE.search(chunk)
+            encoding = self._encoding or (meta.group(1).decode('ascii') if meta else 'utf-8')
+            self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self):
+        if self._parser is None:
+            return
+        self._parser.close()
+        self._drain()
+
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            if event == 'start':
+                self._opened(element)
+                continue
+
+            if self._container(element):
+                self._open_containers -= 1
+                self.found += 1
+                self._on_container(element)
+            # Descendants of an open container are kept until the container itself closes
+            if self._open_containers == 0:
+                self._release(element)
+
+    def _opened(self, element):
+        if self._container(element):
+            self._open_containers += 1
+        if self._widget is not None and self._widget(element):
+            self.widget_seen = True
+        if self._next is not None and not self.next_seen and self._next(element):
+            # With a pagination widget, only a `next` link inside it counts
+            self.next_seen = self._widget is None or any(self._widget(a) for a in element.iterancestors())
+
+    @staticmethod
+    def _release(element):
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
@@ -0,0 +1,125 @@
+import hashlib
+import math
+import threading
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# --- URL Canonicalisation and Seen-Sets ---
+#
+# The same listing or product is often linked under several spellings:
+# overlapping submenu categories, tracking parameters, reordered query
+# strings, a trailing slash or not. canonical_url() maps them onto one key
+# so a run can fetch each page and keep each product once. The canonical
+# form is only used as a key; requests still go to the URL the site gave.
+
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'yclid', 'dclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref', 'srsltid', 'sessionid', 'sid'
+}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+DEFAULT_SEEN = {
+    'bloom': False,        # Use a Bloom filter instead of a set (fixed memory, rare false positives)
+    'capacity': 1000000,   # Expected number of URLs when using the Bloom filter
+    'error_rate': 0.0001   # Target false-positive rate of the Bloom filter
+}
+
+def canonical_url(url, base_url=None):
+    """
+    'HTTPS://Shop.com:443/laptops/?utm_source=x&b=2&a=1#top' -> 'https://shop.com/laptops?a=1&b=2'.
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the remaining parameters and strips trailing slashes.
+    """
+    if base_url:
+        url = urljoin(base_url, url)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/') or '/'
+    if not parts.query:
+        return f"{scheme}://{host}{path}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: never misses a member, rarely claims a non-member."""
+
+    def __init__(self, capacity, error_rate):
+        self.bit_count = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, key):
+        """Adds key. Returns True if it was (probably) not present before."""
+        added = False
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        return added
+
+    def __contains__(self, key):
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class SeenSet:
+    """
+    Thread-safe record of canonical URLs already handled in this run. Backed
+    by a plain set, or by a Bloom filter for very large crawls (a false
+    positive then drops a URL that was in fact new, at `error_rate`).
+    """
+
+    def __init__(self, settings=None, base_url=None):
+        options = dict(DEFAULT_SEEN)
+        options.update(settings or {})
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self._count = 0
+        if options['bloom']:
+            self._members = BloomFilter(options['capacity'], options['error_rate'])
+        else:
+            self._members = set()
+
+    def add(self, url):
+        """Records url. Returns True the first time a URL (in any spelling) is seen."""
+        key = canonical_url(url, self.base_url)
+        with self._lock:
+            if isinstance(self._members, set):
+                if key in self._members:
+                    return False
+                self._members.add(key)
+            elif not self._members.add(key):
+                return False
+            self._count += 1
+            return True
+
+    def __contains__(self, url):
+        return canonical_url(url, self.base_url) in self._members
+
+    def __len__(self):
+        return self._count
+
+
+def first_by_url(rows, seen):
+    """Yields rows whose product URL hasn't been seen yet; rows without a URL always pass."""
+    for row in rows:
+        url = row.product_url
+        if not url or url == 'N/A' or seen.add(url):
+            yield row
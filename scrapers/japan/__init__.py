@@ -1 +0,0 @@
-from .tokyopc import scrape_tokyopc
@@ -1,6 +1,3 @@
 from .buyabans import scrape_buyabans
-from .laptoplk import scrape_laptop_lk
 from .singersl import scrape_singer_sl
-from .unitysystems import scrape_unitysystems
 from .abansit import scrape_abansit
-from .nanotek import scrape_nanotek
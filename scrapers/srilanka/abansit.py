@@ -1,11 +1,14 @@
 import requests
 from bs4 import BeautifulSoup
 import re
-import time
-import random
 import json
+import sys
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
+from scrapers.common import DEFAULT_CONCURRENCY
+from scrapers.common.crawl import crawl
+from scrapers.common.events import DEBUG, WARNING, emit
+from scrapers.common.records import Product, store_name
 
 # --- Brand and Session Helpers ---
 
@@ -38,153 +41,134 @@ def setup_session():
         status_forcelist=[500, 502, 503, 504, 524], 
         allowed_methods=["GET"]
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=DEFAULT_CONCURRENCY['max_limit'])
     http = requests.Session()
     http.mount("https://", adapter)
     return http
 
-def scrape_abansit(config):
-    """
-    Scrapes product data from Abans IT using their AJAX pagination endpoint.
-    """
-    all_products_data = []
-    session = setup_session()
-    base_url = config['base_url']
-    
-    categories = config.get('categories', [])
-    
-    page = 1
-    
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'X-Requested-With': 'XMLHttpRequest',
-        'Referer': 'https://abansit.lk/products',
+# --- Page Tasks ---
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Referer': 'https://abansit.lk/products',
+}
+
+def discover_tasks(config, fetcher):
+    """The AJAX endpoint pages over all configured categories at once."""
+    return [(None, 1)]
+
+def fetch_task(config, fetcher, category, page):
+    url = f"{config['base_url']}{page}"
+    params = {
+        'brands': '[]',
+        'min_price': config.get('min_price', 0),
+        'max_price': config.get('max_price', 1000000),
+        'page_name': 'all_products',
+        'categories': json.dumps(config.get('categories', [])),
+        'ram': '[]',
+        'storage': '[]',
+        'processor': '[]'
     }
 
-    print(f"--- Starting Scrape for Abans IT ---")
-
-    while True:
-        url = f"{base_url}{page}"
-        
-        params = {
-            'brands': '[]',
-            'min_price': config.get('min_price', 0),
-            'max_price': config.get('max_price', 1000000),
-            'page_name': 'all_products',
-            'categories': json.dumps(categories),
-            'ram': '[]',
-            'storage': '[]',
-            'processor': '[]'
-        }
-        
-        print(f"Scraping Page {page}...")
-        
+    emit('page_fetch', DEBUG, store=store_name(config), page=page, url=url)
+    response = fetcher.get(url, headers=HEADERS, params=params, timeout=20)
+    if response.status_code == 404:
+        emit('category_end', store=store_name(config), page=page, reason='not found')
+        return None
+    # Anything else is a failed page, retried by the crawl rather than mistaken for the end
+    response.raise_for_status()
+    return response.content
+
+def parse_task(config, content, category, page):
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        raise ValueError('response is not JSON')
+
+    product_html = data.get('product_table', '')
+    if not product_html.strip():
+        emit('category_end', store=store_name(config), page=page, reason='empty product table')
+        return [], []
+
+    soup = BeautifulSoup(product_html, 'html.parser')
+    products = soup.select('.product-shortcode.style-1')
+
+    if not products:
+        emit('category_end', store=store_name(config), page=page, reason='no product cards')
+        return [], []
+
+    rows = []
+    for product in products:
         try:
-            response = session.get(url, headers=HEADERS, params=params, timeout=20)
+            title_elem = product.select_one('.title')
+            if not title_elem:
+                continue
             
-            if response.status_code != 200:
-                print(f"Failed to fetch page {page}. Status code: {response.status_code}")
-                break
+            if title_elem.name != 'a':
+                name_anchor = title_elem.select_one('a')
+                if name_anchor:
+                    product_name = name_anchor.text.strip()
+                else:
+                    product_name = title_elem.text.strip()
+            else:
+                product_name = title_elem.text.strip()
             
-            try:
-                data = response.json()
-            except json.JSONDecodeError:
-                print(f"Failed to decode JSON on page {page}. Response might not be JSON.")
-                break
-            
-            product_html = data.get('product_table', '')
-            if not product_html.strip():
-                print("No products found in response (empty HTML). Ending scrape.")
-                break
+            product_name = " ".join(product_name.split())
+
+            product_url = "N/A"
+            if title_elem.name == 'a':
+                product_url = title_elem.get('href')
+            else:
+                link_elem = product.select_one('a.preview') or product.select_one('a.image')
+                if link_elem:
+                    product_url = link_elem.get('href')
+                    
+            price_elem = product.select_one('.price')
+            price_text = "0"
+            if price_elem:
                 
-            soup = BeautifulSoup(product_html, 'html.parser')
-            
-            products = soup.select('.product-shortcode.style-1')
+                new_price = price_elem.select_one('.new-price')
+                if new_price:
+                    price_text = new_price.text
+                else:
+                    price_text = price_elem.text
+                    
             
-            if not products:
-                print(f"No product cards found in HTML on page {page}. Ending scrape.")
-                break
+            # Strip dots left over from currency prefixes such as 'Rs.'
+            price_text = re.sub(r'[^\d.]', '', price_text).strip('.')
+            try:
+                price = float(price_text)
+            except ValueError:
+                price = 0.0
                 
-            print(f"Found {len(products)} products on page {page}.")
             
-            for product in products:
-                try:
-                    title_elem = product.select_one('.title')
-                    if not title_elem:
-                        continue
-                    
-                    if title_elem.name != 'a':
-                        name_anchor = title_elem.select_one('a')
-                        if name_anchor:
-                            product_name = name_anchor.text.strip()
-                        else:
-                            product_name = title_elem.text.strip()
-                    else:
-                        product_name = title_elem.text.strip()
-                    
-                    product_name = " ".join(product_name.split())
-
-                    product_url = "N/A"
-                    if title_elem.name == 'a':
-                        product_url = title_elem.get('href')
-                    else:
-                        link_elem = product.select_one('a.preview') or product.select_one('a.image')
-                        if link_elem:
-                            product_url = link_elem.get('href')
-                            
-                    price_elem = product.select_one('.price')
-                    price_text = "0"
-                    if price_elem:
-                        
-                        new_price = price_elem.select_one('.new-price')
-                        if new_price:
-                            price_text = new_price.text
-                        else:
-                            price_text = price_elem.text
-                            
-                    
-                    price_text = re.sub(r'[^\d.]', '', price_text)
-                    try:
-                        price = float(price_text)
-                    except ValueError:
-                        price = 0.0
-                        
-                    
-                    if not (config['min_price'] <= price <= config['max_price']):
-                        continue
-
-                    
-                    brand = extract_brand_from_name(product_name)
-                    
-                    
-                    image_url = "N/A"
-                    img_elem = product.select_one('img')
-                    if img_elem:
-                        image_url = img_elem.get('src')
+            if not (config['min_price'] <= price <= config['max_price']):
+                continue
 
-                    
-                    all_products_data.append({
-                        'Category': 'All Products',
-                        'Brand': brand,
-                        'Model': product_name,
-                        'Price (LKR)': price,
-                        'Product URL': product_url,
-                        'Image URL': image_url,
-                        'Country': config['country'],
-                        'Year (Target)': config['year']
-                    })
-                    
-                except Exception as e:
-                    print(f"Error parsing product: {e}")
-                    continue
             
-            page += 1
+            brand = extract_brand_from_name(product_name)
             
-            time.sleep(random.uniform(1, 3))
+            
+            image_url = "N/A"
+            img_elem = product.select_one('img')
+            if img_elem:
+                image_url = img_elem.get('src')
+
+            
+            rows.append(Product('All Products', brand, product_name, price, product_url, image_url))
             
         except Exception as e:
-            print(f"Error scraping page {page}: {e}")
-            break
+            emit('product_error', WARNING, store=store_name(config), page=page, error=str(e))
+            continue
+
+    return rows, [page + 1]
+
+# --- Main Scraper Function ---
 
-    return all_products_data
+def scrape_abansit(config):
+    """
+    Scrapes product data from Abans IT using their AJAX pagination endpoint.
+    """
+    return crawl(config, sys.modules[__name__])
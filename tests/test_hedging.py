@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapers.common.fetch import Fetcher
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, url):
+        self.url = url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class SlowSession:
+    """Answers every GET after `delay(call_number)` seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+        self.responses = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay(call))
+        response = FakeResponse(url)
+        self.responses.append(response)
+        return response
+
+
+def make_fetcher(session, limit, **hedging):
+    concurrency = {'initial_limit': limit, 'min_limit': limit, 'max_limit': limit}
+    return Fetcher(session, {'concurrency': concurrency, 'hedging': hedging})
+
+
+def test_latency_excludes_the_wait_for_a_slot():
+    # Four requests through one slot: each waits for the others, but only its GET is timed
+    fetcher = make_fetcher(SlowSession(lambda call: 0.1), limit=1)
+    with ThreadPoolExecutor(max_workers=4) as callers:
+        list(callers.map(fetcher.get, [f"http://shop.test/{i}" for i in range(4)]))
+    assert fetcher.hedger.metrics()['shop.test']['p99_unhedged'] < 0.2
+    fetcher.close()
+
+
+def test_slow_request_is_hedged_on_a_spare_slot():
+    session = SlowSession(lambda call: 2.0 if call == 6 else 0.01)
+    fetcher = make_fetcher(session, limit=2, min_samples=5, max_fraction=1.0)
+    for i in range(5):
+        fetcher.get(f"http://shop.test/{i}")
+
+    started = time.monotonic()
+    response = fetcher.get("http://shop.test/slow")
+    assert time.monotonic() - started < 1.0
+    assert fetcher.hedger.metrics()['shop.test']['won'] == 1
+    limiter = fetcher.limiter_for("http://shop.test/")
+    assert limiter.in_flight == 1  # The losing attempt still holds the spare slot
+
+    fetcher.close()  # Waits for the loser, which is then closed and gives its slot back
+    assert limiter.in_flight == 0
+    assert not response.closed and session.responses[-1].closed
+
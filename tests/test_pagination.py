@@ -0,0 +1,48 @@
+from scrapers.common import engine
+
+LAST_PAGE = 11
+SHOP = 'http://shop.test/shop/'
+
+
+class FakeResponse:
+    def __init__(self, url, content):
+        self.url = url
+        self.content = content
+        self.status_code = 200 if content is not None else 404
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeFetcher:
+    """A WooCommerce shop whose page links only reach page 3."""
+
+    def __init__(self):
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        page = int(url.rstrip('/').rsplit('/', 1)[-1]) if '/page/' in url else 1
+        if page > LAST_PAGE:
+            return FakeResponse(url, None)
+        items = ''.join(f'<li class="product"><h2 class="woocommerce-loop-product__title">HP {page}-{i}</h2>'
+                        f'<a class="woocommerce-LoopProduct-link" href="/p/{page}-{i}"></a>'
+                        f'<span class="price">Rs 1{i},000</span></li>' for i in range(3))
+        links = ''.join(f'<a class="page-numbers" href="{SHOP}page/{n}/">{n}</a>' for n in (2, 3))
+        return FakeResponse(url, f'<ul>{items}</ul>{links}'.encode())
+
+
+def test_probed_pages_are_not_downloaded_again():
+    config = {'base_url': SHOP, 'platform': 'woocommerce', 'min_price': 0, 'max_price': 10 ** 9,
+              'extraction': {'pagination': {'plan': 'probe'}}}
+    category = {'name': 'All', 'url': SHOP}
+    fetcher = FakeFetcher()
+    content = engine.fetch_task(config, fetcher, category, 1)
+
+    assert engine.plan_pages(config, fetcher, category, content) == list(range(2, LAST_PAGE + 1))
+    probed = set(fetcher.requested[1:])
+    for page in range(2, LAST_PAGE + 1):
+        rows, _ = engine.parse_task(config, engine.fetch_task(config, fetcher, category, page), category, page)
+        assert [row.model for row in rows][0] == f'HP {page}-0'
+    assert len(fetcher.requested) == len(set(fetcher.requested))
+    assert probed - {f'{SHOP}page/{page}/' for page in range(2, LAST_PAGE + 1)}  # The probe also saw past the end
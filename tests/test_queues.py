@@ -0,0 +1,80 @@
+import pytest
+
+from distributed import worker
+from distributed.queues import RedisQueue, SQLiteQueue
+from scrapers.common.records import Product
+
+
+def make_queue(tmp_path, max_attempts=3):
+    queue = SQLiteQueue(str(tmp_path / 'queue.db'), max_attempts)
+    queue.put_tasks('Site', [({'name': 'laptops'}, 1)])
+    return queue
+
+
+def test_lease_is_exclusive_until_completed(tmp_path):
+    queue = make_queue(tmp_path)
+    task = queue.lease('w1', 60)
+    assert task['page'] == 1 and task['category'] == {'name': 'laptops'}
+    assert queue.lease('w2', 60) is None
+
+    assert queue.complete(task, 'w1', [Product('laptops', 'HP', 'HP 15s', 1000.0)], [2])
+    assert queue.counts() == {'pending': 1, 'leased': 0, 'done': 1, 'failed': 0}
+    assert [row.model for row in queue.iter_results('Site')] == ['HP 15s']
+    queue.close()
+
+
+def test_failed_task_is_retried_up_to_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.fail(queue.lease('w1', 60), 'w1', 'HTTP 500')
+    assert queue.counts()['pending'] == 1
+
+    queue.fail(queue.lease('w1', 60), 'w1', 'HTTP 500')
+    assert queue.counts()['failed'] == 1
+    assert queue.finished()
+    assert queue.failed_tasks()[0]['attempts'] == 2
+    queue.close()
+
+
+def test_expired_lease_counts_as_an_attempt(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=1)
+    task = queue.lease('w1', -1)
+    assert queue.lease('w2', 60) is None
+    assert queue.failed_tasks()[0]['error'] == 'lease expired'
+    assert not queue.complete(task, 'w1', [], [])
+    queue.close()
+
+
+def test_worker_opens_the_queue_with_the_coordinators_max_attempts(tmp_path, monkeypatch):
+    # Workers make the retry decisions, so they must use the coordinator's limit
+    opened = []
+
+    def open_queue(url, max_attempts):
+        opened.append(max_attempts)
+        return SQLiteQueue(str(tmp_path / 'queue.db'), max_attempts)
+
+    monkeypatch.setattr(worker, 'open_queue', open_queue)
+    assert worker.run_worker('sqlite:///unused.db', 'w1', max_attempts=5) == 0
+    assert opened == [5]
+
+
+def test_redis_queue_moves_tasks_atomically(monkeypatch):
+    # Runs the Lua scripts on fakeredis when it is installed with Lua support
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url',
+                        classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)))
+    queue = RedisQueue('redis://localhost/0', max_attempts=1)
+    queue.put_tasks('Site', [({'name': 'laptops'}, 1)])
+
+    task = queue.lease('w1', 60)
+    assert queue.complete(task, 'w1', [Product('laptops', 'HP', 'HP 15s', 1000.0)], [2, 1])
+    assert queue.counts() == {'pending': 1, 'leased': 0, 'done': 1, 'failed': 0}
+    assert [row.model for row in queue.iter_results('Site')] == ['HP 15s']
+
+    stale = queue.lease('w1', -1)
+    assert queue.lease('w2', 60) is None
+    assert queue.failed_tasks()[0]['error'] == 'lease expired'
+    assert not queue.complete(stale, 'w1', [], [3])
+    assert queue.finished()
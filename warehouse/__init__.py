@@ -0,0 +1,3 @@
+# Bulk loading of saved runs into SQLite or PostgreSQL
+
+from .sink import DEFAULT_SINK, close_default_sink, default_sink, open_sink, set_default_sink
@@ -1,7 +1,9 @@
 import os
 import sys
+import argparse
 import pandas as pd
 from config.sites import SUPPORTED_SITES
+from pipeline import enrich_products, download_images
 
 REQUIRED_PACKAGES = ['requests', 'pandas', 'openpyxl', 'urllib3', 'bs4']
 VERSION_FILE = "version.txt"
@@ -145,7 +147,7 @@ def get_user_choice():
 
 
 def save_data(data, config):
-    """Saves the scraped data to an Excel file using pandas, removing duplicates."""
+    """Saves a ProductBatch to an Excel file using pandas, removing duplicates."""
     filename = config['output_filename']
     if not data:
         print("No data was scraped to save.")
@@ -153,10 +155,12 @@ def save_data(data, config):
 
     print(f"\n--- 6. Saving Data to {filename} ---")
     try:
-        df = pd.DataFrame(data)
+        df = data.to_frame()
         
         initial_count = len(df)
-        df.drop_duplicates(subset=['Model', 'Price (LKR)'], keep='first', inplace=True)
+        # Column names differ per site layout (e.g. 'Price (JPY)'), so look them up
+        subset = [column for column in (data.column_for('model'), data.column_for('price')) if column]
+        df.drop_duplicates(subset=subset or None, keep='first', inplace=True)
         final_count = len(df)
         
         if initial_count > final_count:
@@ -169,9 +173,82 @@ def save_data(data, config):
     except Exception as e:
         print(f"❌ ERROR: Failed to save to Excel. Details: {e}")
 
+    record_history(data)
+    update_catalog(data)
+    load_into_sink(data)
 
-if __name__ == "__main__":
-    
+
+def load_into_sink(data):
+    """Upserts the run into the database given with --sink, if any."""
+    from warehouse import default_sink
+
+    try:
+        sink = default_sink()
+        if sink is None:
+            return
+        counts = sink.load(data)
+    except Exception as e:
+        print(f"  ⚠️ Failed to load into the database sink: {e}")
+        return
+    print(f"  Database sink updated: {counts['rows']} products loaded in {counts['seconds']:.2f}s.")
+
+
+def update_catalog(data):
+    """Refreshes this site's products in the search index used by the 'query' command."""
+    from catalog import CatalogIndex
+
+    try:
+        index = CatalogIndex()
+        counts = index.update(data)
+        index.close()
+    except Exception as e:
+        print(f"  ⚠️ Failed to update the search index: {e}")
+        return
+    print(f"  Search index updated: {counts['upserted']} products refreshed, {counts['removed']} removed.")
+
+
+def record_history(data):
+    """Appends the run to the price history (skipped with a notice if pyarrow isn't installed)."""
+    from history import PriceHistory
+
+    try:
+        path = PriceHistory().append(data)
+    except RuntimeError as e:
+        print(f"  ℹ️ Price history not recorded: {e}")
+        return
+    except Exception as e:
+        print(f"  ⚠️ Failed to record price history: {e}")
+        return
+    if path:
+        print(f"  Price history updated: {path}")
+
+
+def save_combined(batches, filename, currency=None, rates_file=None):
+    """Saves several sites' batches as one file in the canonical schema, optionally priced in one currency."""
+    from scrapers.common.records import combine_frames
+    from pipeline.currency import DEFAULT_RATES_FILE, convert_prices, load_rates
+
+    df = combine_frames([batch.to_canonical_frame() for batch in batches])
+    if df.empty:
+        print("No data was scraped to save.")
+        return
+
+    print(f"\n--- Saving {len(df)} products from {df['store'].nunique()} stores to {filename} ---")
+    if currency:
+        _, rates = load_rates(rates_file or DEFAULT_RATES_FILE)
+        convert_prices(df, rates, currency)
+    try:
+        if filename.endswith('.csv'):
+            df.to_csv(filename, index=False)
+        else:
+            df.to_excel(filename, index=False, engine='openpyxl')
+        print(f"✅ SUCCESS: Combined data saved to {filename}")
+    except Exception as e:
+        print(f"❌ ERROR: Failed to save combined file. Details: {e}")
+
+
+def run_interactive():
+    """The default guided flow: checks, site selection, scrape, save."""
     display_header()
     check_dependencies()
     check_for_updates()
@@ -181,11 +258,282 @@ if __name__ == "__main__":
     scraper_function = chosen_site['scraper']
     scraper_config = chosen_site['config']
     
+    enrich = False
+    if 'enrichment' in scraper_config:
+        enrich = input("Fetch product detail pages for SKU/stock/specs? (y/n): ").lower() == 'y'
+    
+    images = False
+    if 'images' in scraper_config:
+        images = input("Download product images and thumbnails? (y/n): ").lower() == 'y'
+    
     print("\n--- 5. Running Scraper ---")
     scraped_data = scraper_function(scraper_config)
     
+    if enrich and scraped_data:
+        scraped_data.rows = list(enrich_products(scraped_data.rows, scraper_config))
+    
+    if images and scraped_data:
+        scraped_data.rows = list(download_images(scraped_data.rows, scraper_config))
+    
     save_data(scraped_data, scraper_config)
     
     print("\n--------------------------------------------------------------")
     print("✨ Bye now ! Have a great day.")
     print("--------------------------------------------------------------")
+
+
+def run_coordinator_command(args):
+    """Seeds the shared queue, waits for workers and saves one file per site."""
+    from distributed import run_coordinator
+
+    site_names = args.sites or [name for sites in SUPPORTED_SITES.values() for name in sites]
+    merged = run_coordinator(
+        args.queue,
+        site_names,
+        local_workers=args.local_workers,
+        lease_seconds=args.lease_seconds,
+        max_attempts=args.max_attempts,
+        resume=args.resume
+    )
+    for config, batch in merged.values():
+        save_data(batch, config)
+    if args.combined:
+        save_combined([batch for _, batch in merged.values()], args.combined,
+                      currency=args.currency, rates_file=args.fx_rates)
+
+
+def run_worker_command(args):
+    """Leases and processes page tasks until the shared queue is drained."""
+    from distributed import run_worker
+
+    run_worker(args.queue, worker_id=args.worker_id, lease_seconds=args.lease_seconds,
+               exit_when_idle=not args.wait, max_attempts=args.max_attempts)
+
+
+def run_history_command(args):
+    """Answers price-trend questions from the recorded history."""
+    from history import PriceHistory
+
+    history = PriceHistory(args.dir)
+    if args.query == 'lowest':
+        result = history.lowest_prices(args.days, store=args.store, model=args.model)
+    elif args.query == 'changes':
+        result = history.price_changes(store=args.store)
+    elif args.query == 'brand-median':
+        result = history.brand_median_by_day(args.days, store=args.store, brand=args.brand)
+    elif args.query == 'series':
+        result = history.series(args.model, store=args.store, days=args.days)
+    else:
+        print(f"Compacted {history.compact(args.month)} files.")
+        return
+
+    if result is None or result.empty:
+        print("No matching history.")
+        return
+    print(result.head(args.limit).to_string(index=False))
+    if len(result) > args.limit:
+        print(f"... {len(result) - args.limit} more rows (use --limit).")
+
+
+def run_match_command(args):
+    """Links the same product across stores and saves the match table."""
+    import time
+    from pipeline.matching import match_products, match_summary
+    from scrapers.common.crawl import site_module
+
+    if args.input:
+        products = pd.read_csv(args.input) if args.input.endswith('.csv') else pd.read_excel(args.input)
+    else:
+        from history import PriceHistory
+        products = PriceHistory(args.dir).latest_products()
+        if products is None:
+            print("No price history yet. Run some scrapes first or pass --input.")
+            return
+
+    known_brands = set()
+    for sites in SUPPORTED_SITES.values():
+        for entry in sites.values():
+            # Engine sites list theirs under 'brands' in the config, or use the engine default
+            module = site_module(entry['scraper'])
+            known_brands.update(entry['config'].get('brands') or getattr(module, 'KNOWN_BRANDS', None)
+                                or getattr(module, 'DEFAULT_BRANDS', []))
+    # Longest first so 'Western Digital' wins over shorter names it contains
+    known_brands = sorted(known_brands, key=len, reverse=True)
+
+    print(f"\n--- Matching {len(products)} products across {products['store'].nunique()} stores ---")
+    started = time.time()
+    table = match_products(products, known_brands, {'min_score': args.min_score})
+    print(f"  {match_summary(table)} ({time.time() - started:.1f}s)")
+    if table.empty:
+        return
+    if args.output.endswith('.csv'):
+        table.to_csv(args.output, index=False)
+    else:
+        table.to_excel(args.output, index=False, engine='openpyxl')
+    print(f"✅ SUCCESS: Match table saved to {args.output}")
+
+
+def run_query_command(args):
+    """Searches the catalog index built by previous runs."""
+    import time
+    from catalog import CatalogIndex
+
+    index = CatalogIndex(args.db)
+    started = time.perf_counter()
+    results = index.search(' '.join(args.text), store=args.store, max_price=args.max_price, limit=args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    index.close()
+
+    if not results:
+        print(f"No products match '{' '.join(args.text)}'.")
+        return
+    print(pd.DataFrame(results).to_string(index=False))
+    print(f"\n{len(results)} results in {elapsed:.1f} ms.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Price Scraper CLI. Run without arguments for the interactive flow."
+    )
+    parser.add_argument('--log-level', choices=['debug', 'info', 'warning', 'error'], default='info',
+                        help="Lowest event level written to the run log (debug includes every request).")
+    parser.add_argument('--log-file', help="JSON Lines run log (default: logs/run_<timestamp>.jsonl).")
+    parser.add_argument('--no-log-file', action='store_true', help="Don't write a run log.")
+    parser.add_argument('--budget', type=float, metavar='MINUTES',
+                        help="Stop scraping after this many minutes and save what was collected.")
+    parser.add_argument('--proxies', metavar='URL,URL',
+                        help="Egress proxies to spread requests over (sites may also list their own).")
+    parser.add_argument('--sink', metavar='URL',
+                        help="Also load every saved run into sqlite:///<path> or postgresql://<host>/<db>.")
+    parser.add_argument('--sink-key', metavar='COLUMN,COLUMN',
+                        help="Columns the sink upserts on (default: store,product_key).")
+    parser.add_argument('--sink-batch-size', type=int, metavar='ROWS', help="Rows per bulk insert (default: 5000).")
+    parser.add_argument('--sink-commit-every', type=int, metavar='ROWS',
+                        help="Rows per transaction (default: 50000).")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--verbose', action='store_true', help="Print every event instead of a progress line.")
+    output.add_argument('--quiet', action='store_true', help="Print neither events nor the progress line.")
+    commands = parser.add_subparsers(dest='command')
+
+    coordinator = commands.add_parser('coordinator', help="Seed a shared task queue and merge worker results.")
+    coordinator.add_argument('--queue', default='sqlite:///crawl_queue.db',
+                             help="sqlite:///<path> or redis://<host>:<port>/<db>")
+    coordinator.add_argument('--sites', nargs='*',
+                             help="Site names (or unique prefixes) to crawl. Defaults to every supported site.")
+    coordinator.add_argument('--local-workers', type=int, default=0,
+                             help="Also start this many worker processes on this machine.")
+    coordinator.add_argument('--lease-seconds', type=int, default=180)
+    coordinator.add_argument('--max-attempts', type=int, default=3)
+    coordinator.add_argument('--resume', action='store_true',
+                             help="Keep tasks/results already in the queue instead of starting fresh.")
+    coordinator.add_argument('--combined', metavar='FILE',
+                             help="Also save every site in one canonical-schema .xlsx/.csv file.")
+    coordinator.add_argument('--currency',
+                             help="With --combined, add a price column converted to this currency (e.g. USD).")
+    coordinator.add_argument('--fx-rates', metavar='FILE',
+                             help="Exchange rates JSON for --currency (default: config/fx_rates.json).")
+    coordinator.set_defaults(handler=run_coordinator_command)
+
+    worker = commands.add_parser('worker', help="Process page tasks from a shared queue.")
+    worker.add_argument('--queue', default='sqlite:///crawl_queue.db')
+    worker.add_argument('--worker-id')
+    worker.add_argument('--lease-seconds', type=int, default=180)
+    worker.add_argument('--max-attempts', type=int, default=3,
+                        help="Attempts before a task is failed for good; use the coordinator's value.")
+    worker.add_argument('--wait', action='store_true',
+                        help="Keep polling when the queue is empty instead of exiting.")
+    worker.set_defaults(handler=run_worker_command)
+
+    history = commands.add_parser('history', help="Query the price history recorded by previous runs.")
+    queries = history.add_subparsers(dest='query', required=True)
+
+    def add_query(name, help_text):
+        query = queries.add_parser(name, help=help_text)
+        query.add_argument('--dir', default='price_history', help="History directory.")
+        query.add_argument('--store', help="Limit to one store (e.g. TokyoPC or www.nanotek.lk).")
+        query.add_argument('--limit', type=int, default=50, help="Maximum rows to print.")
+        return query
+
+    lowest = add_query('lowest', "Lowest price per model over the last N days.")
+    lowest.add_argument('--days', type=int, default=30)
+    lowest.add_argument('--model', help="Only models containing this text.")
+
+    add_query('changes', "Price changes between each store's last two runs.")
+
+    median = add_query('brand-median', "Median price per brand per day.")
+    median.add_argument('--days', type=int, default=30)
+    median.add_argument('--brand')
+
+    series = add_query('series', "Price over time for models containing the given text.")
+    series.add_argument('model')
+    series.add_argument('--days', type=int)
+
+    compact = add_query('compact', "Merge a finished month's daily files into one file per store.")
+    compact.add_argument('month', help="YYYY-MM")
+
+    history.set_defaults(handler=run_history_command)
+
+    query = commands.add_parser('query', help="Search every site's latest products by model, brand or category.")
+    query.add_argument('text', nargs='+', help="Words to search for; the last may be a prefix (e.g. 'asus vivo').")
+    query.add_argument('--db', default='catalog_index.db', help="Search index file.")
+    query.add_argument('--store', help="Limit to one store.")
+    query.add_argument('--max-price', type=float)
+    query.add_argument('--limit', type=int, default=20)
+    query.set_defaults(handler=run_query_command)
+
+    match = commands.add_parser('match', help="Link the same product across stores.")
+    match.add_argument('--input', help="Combined .csv/.xlsx export (default: latest run of each store in the history).")
+    match.add_argument('--dir', default='price_history', help="History directory.")
+    match.add_argument('--output', default='Cross_Store_Matches.xlsx')
+    match.add_argument('--min-score', type=float, default=0.6,
+                       help="Title similarity (0-1) needed to treat two listings as the same product.")
+    match.set_defaults(handler=run_match_command)
+
+    return parser
+
+
+# Commands that scrape, and so produce page events
+SCRAPING_COMMANDS = (None, 'coordinator', 'worker')
+
+
+def setup_events(args):
+    """Starts the buffered event log and the console progress line for a scraping run."""
+    from scrapers.common.events import configure_events, default_log_file
+
+    if args.command not in SCRAPING_COMMANDS:
+        return None
+    log_file = None if args.no_log_file else (args.log_file or default_log_file())
+    console = 'events' if args.verbose else 'quiet' if args.quiet else 'progress'
+    return configure_events(log_file, level=args.log_level, console=console)
+
+
+if __name__ == "__main__":
+    from scrapers.common.events import shutdown_events
+
+    args = build_parser().parse_args()
+    if args.budget:
+        from scrapers.common.budget import start_run_budget
+        start_run_budget(args.budget * 60)
+    if args.proxies:
+        from scrapers.common.proxies import set_default_proxies
+        set_default_proxies(url.strip() for url in args.proxies.split(',') if url.strip())
+    if args.sink:
+        from warehouse import set_default_sink
+        set_default_sink(args.sink, {
+            'key': [column.strip() for column in args.sink_key.split(',')] if args.sink_key else None,
+            'batch_size': args.sink_batch_size,
+            'commit_every': args.sink_commit_every
+        })
+    log_file = setup_events(args)
+    try:
+        if args.command:
+            args.handler(args)
+        else:
+            run_interactive()
+    finally:
+        shutdown_events()
+        if args.sink:
+            from warehouse import close_default_sink
+            close_default_sink()
+    if log_file:
+        print(f"Run log: {log_file}")